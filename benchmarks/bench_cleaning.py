@@ -0,0 +1,86 @@
+"""
+Сравнение скорости очистки текста: прежняя реализация (два re.sub и цикл
+по словам, затем повторная фильтрация) против tokenize() из text_utils.
+
+Запуск из корня проекта:
+    python benchmarks/bench_cleaning.py [--repeat 5] [--scale 50]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_utils import STOP_WORDS_RU, count_word_frequencies  # noqa: E402
+
+
+def legacy_clean_text(text):
+    """Очистка текста в том виде, в каком она была до tokenize()."""
+    text = re.sub(r'[^\w\s-]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    filtered_words = []
+    for word in text.split():
+        word_lower = word.lower()
+        if word_lower not in STOP_WORDS_RU and len(word) > 1 and not word.isdigit():
+            filtered_words.append(word)
+    return ' '.join(filtered_words).strip()
+
+
+def legacy_word_frequencies(text):
+    """Подсчёт частот в том виде, в каком он был до tokenize()."""
+    words = legacy_clean_text(text).split()
+    words = [word.lower() for word in words
+             if word.lower() not in STOP_WORDS_RU and len(word) > 1]
+    return Counter(words)
+
+
+def load_corpus_text(corpus_folder):
+    """Склеивает все тексты корпуса в одну строку."""
+    parts = []
+    for filename in sorted(os.listdir(corpus_folder)):
+        if filename.endswith('.txt'):
+            with open(os.path.join(corpus_folder, filename), 'r', encoding='utf-8') as f:
+                parts.append(f.read())
+    return '\n'.join(parts)
+
+
+def best_time(func, text, repeat):
+    """Лучшее время из repeat запусков, в секундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк очистки текста')
+    parser.add_argument('--corpus', default='corpus', help='Папка с текстами')
+    parser.add_argument('--repeat', type=int, default=5, help='Количество повторов')
+    parser.add_argument('--scale', type=int, default=50,
+                        help='Во сколько раз размножить корпус')
+    args = parser.parse_args()
+
+    text = load_corpus_text(args.corpus) * args.scale
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+
+    # Результаты обеих реализаций должны совпадать
+    if legacy_word_frequencies(text) != count_word_frequencies(text):
+        print('✗ Частоты слов не совпадают с прежней реализацией')
+        sys.exit(1)
+
+    legacy = best_time(legacy_word_frequencies, text, args.repeat)
+    current = best_time(count_word_frequencies, text, args.repeat)
+
+    print(f"Объём текста: {size_mb:.1f} МБ")
+    print(f"Прежняя очистка:  {legacy:.3f} с ({size_mb / legacy:.1f} МБ/с)")
+    print(f"Новая очистка:    {current:.3f} с ({size_mb / current:.1f} МБ/с)")
+    print(f"Ускорение: x{legacy / current:.1f}")
+
+
+if __name__ == '__main__':
+    main()
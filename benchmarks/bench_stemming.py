@@ -0,0 +1,66 @@
+"""
+Стемминг с LRU-кэшем основ: доля попаданий в кэш и скорость при разных
+размерах кэша против стемминга каждого слова без кэша.
+
+Запуск из корня проекта:
+    python benchmarks/bench_stemming.py [--repeat 3] [--scale 50] [--cache-sizes 100 1000 100000]
+
+При --scale больше 1 корпус повторяется, и попаданий становится больше, чем
+в реальном корпусе того же размера; для честной оценки на большом корпусе
+сгенерируйте его (benchmarks/generate_corpus.py) и передайте через --corpus.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_utils import tokenize  # noqa: E402
+from stem_utils import stem, make_stemmer  # noqa: E402
+from bench_cleaning import load_corpus_text  # noqa: E402
+
+
+def best_time(func, words, repeat):
+    """Лучшее время из repeat запусков, в секундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(words)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк стемминга с кэшем основ')
+    parser.add_argument('--corpus', default='corpus', help='Папка с текстами')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов')
+    parser.add_argument('--scale', type=int, default=50,
+                        help='Во сколько раз размножить корпус')
+    parser.add_argument('--cache-sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                        help='Размеры LRU-кэша для сравнения')
+    args = parser.parse_args()
+
+    words = tokenize(load_corpus_text(args.corpus), remove_stopwords=False) * args.scale
+    print(f"Слов: {len(words)}, различных словоформ: {len(set(words))}")
+
+    uncached = best_time(lambda words: [stem(word) for word in words], words, args.repeat)
+    print(f"Без кэша:            {uncached:.3f} с ({len(words) / uncached:,.0f} слов/с)")
+
+    for cache_size in args.cache_sizes:
+        # Кэш создаётся заново перед каждым запуском, чтобы промахи тоже учитывались
+        def run(words, cache_size=cache_size):
+            stemmer = make_stemmer(cache_size)
+            result = [stemmer(word) for word in words]
+            run.info = stemmer.cache_info()
+            return result
+
+        elapsed = best_time(run, words, args.repeat)
+        info = run.info
+        hit_rate = info.hits / (info.hits + info.misses) if info.hits + info.misses else 0.0
+        print(f"Кэш {cache_size:>7}:        {elapsed:.3f} с ({len(words) / elapsed:,.0f} слов/с), "
+              f"попаданий {hit_rate:.1%}, ускорение x{uncached / elapsed:.1f}")
+
+
+if __name__ == '__main__':
+    main()
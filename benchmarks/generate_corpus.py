@@ -0,0 +1,128 @@
+"""
+Генератор синтетического корпуса, похожего на corpus/poem_*.txt:
+заголовок, строфы по четыре строки, пустые строки между строфами
+и дата в конце. Слова берутся из настоящего корпуса с частотами,
+близкими к закону Ципфа, поэтому словарь и длины слов — как у Ходасевича.
+
+Запуск из корня проекта:
+    python benchmarks/generate_corpus.py /tmp/synthetic --docs 10000
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_utils import get_files_in_folder, read_text_file  # noqa: E402
+from text_utils import tokenize  # noqa: E402
+
+MONTHS = ['января', 'февраля', 'марта', 'апреля', 'мая', 'июня', 'июля',
+          'августа', 'сентября', 'октября', 'ноября', 'декабря']
+PUNCTUATION = [',', ',', ',', '.', '—', '!', '?', '…', ';', ':']
+SYLLABLES = ['ка', 'ло', 'ми', 'не', 'ру', 'сто', 'ва', 'дом', 'ле', 'то', 'пре', 'зи']
+
+
+def load_vocabulary(corpus_folder='corpus'):
+    """
+    Собирает словарь из настоящего корпуса, отсортированный по частоте.
+
+    Args:
+        corpus_folder (str): Путь к папке с текстами
+
+    Returns:
+        list: Слова от самого частого к самому редкому
+    """
+    counts = {}
+    if os.path.isdir(corpus_folder):
+        for filename in get_files_in_folder(corpus_folder, '.txt'):
+            text = read_text_file(os.path.join(corpus_folder, filename))
+            for word in tokenize(text, remove_stopwords=False):
+                counts[word] = counts.get(word, 0) + 1
+    if not counts:
+        # Корпуса нет — составляем «русские» слова из слогов
+        rng = random.Random(0)
+        return [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+                for _ in range(5000)]
+    return sorted(counts, key=counts.get, reverse=True)
+
+
+def make_poem(rng, vocabulary, weights, min_stanzas=2, max_stanzas=8):
+    """
+    Составляет одно синтетическое стихотворение.
+
+    Args:
+        rng (random.Random): Генератор случайных чисел
+        vocabulary (list): Словарь
+        weights (list): Накопленные веса слов (закон Ципфа)
+        min_stanzas (int): Минимум строф
+        max_stanzas (int): Максимум строф
+
+    Returns:
+        str: Текст стихотворения
+    """
+    def line(min_words, max_words):
+        words = rng.choices(vocabulary, cum_weights=weights, k=rng.randint(min_words, max_words))
+        words[0] = words[0].capitalize()
+        return ' '.join(words) + rng.choice(PUNCTUATION)
+
+    parts = [line(1, 3).rstrip(',;:') if rng.random() < 0.3 else '* * *', '', '']
+    for _ in range(rng.randint(min_stanzas, max_stanzas)):
+        parts.extend(line(3, 7) for _ in range(4))
+        parts.append('')
+    parts.append(f"{rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(1904, 1920)}")
+    return '\n'.join(parts)
+
+
+def generate_corpus(folder, docs=1000, seed=0, min_stanzas=2, max_stanzas=8,
+                    corpus_folder='corpus'):
+    """
+    Записывает синтетический корпус в папку.
+
+    Args:
+        folder (str): Папка для файлов (создаётся при необходимости)
+        docs (int): Количество документов
+        seed (int): Начальное значение генератора — одинаковый seed даёт одинаковый корпус
+        min_stanzas (int): Минимум строф в документе
+        max_stanzas (int): Максимум строф в документе
+        corpus_folder (str): Настоящий корпус, из которого берётся словарь
+
+    Returns:
+        int: Суммарный размер записанных файлов в байтах
+    """
+    rng = random.Random(seed)
+    vocabulary = load_vocabulary(corpus_folder)
+    weights = []
+    total = 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1.0 / rank
+        weights.append(total)
+
+    os.makedirs(folder, exist_ok=True)
+    width = max(2, len(str(docs)))
+    total_bytes = 0
+    for i in range(1, docs + 1):
+        text = make_poem(rng, vocabulary, weights, min_stanzas, max_stanzas)
+        data = text.encode('utf-8')
+        with open(os.path.join(folder, f"poem_{i:0{width}d}.txt"), 'wb') as f:
+            f.write(data)
+        total_bytes += len(data)
+    return total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация синтетического корпуса')
+    parser.add_argument('folder', help='Папка для синтетического корпуса')
+    parser.add_argument('--docs', type=int, default=1000, help='Количество документов')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+    parser.add_argument('--min-stanzas', type=int, default=2, help='Минимум строф в документе')
+    parser.add_argument('--max-stanzas', type=int, default=8, help='Максимум строф в документе')
+    args = parser.parse_args()
+
+    total_bytes = generate_corpus(args.folder, args.docs, args.seed,
+                                  args.min_stanzas, args.max_stanzas)
+    print(f"✓ Создано документов: {args.docs} ({total_bytes / (1024 * 1024):.1f} МБ) в {args.folder}")
+
+
+if __name__ == '__main__':
+    main()
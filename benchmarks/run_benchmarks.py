@@ -0,0 +1,233 @@
+"""
+Замеры скорости всех этапов анализа корпуса на синтетических данных.
+
+Для каждого масштаба генерируется корпус (см. generate_corpus.py) и
+прогоняется настоящий конвейер — main.analyze_corpus и main.get_report,
+без кэша. Время этапов берётся из событий профайлера (PROFILER.stage),
+поэтому замеряются те же этапы, что и в --profile: поиск файлов, анализ,
+слияние частот, словосочетания, итоги по метаданным, CSV, отчёт и сайт.
+Этап анализа дополнительно раскладывается на фазы по событиям файлов:
+reading (чтение и декодирование), cleaning (разбиение на слова, нижний
+регистр, стоп-слова) и counting (метрики и частоты). С --workers больше
+одного время фаз складывается по всем процессам, то есть пропускная
+способность фаз — в расчёте на одно ядро; с чтением наперёд (--prefetch)
+reading — только время ожидания уже читаемого файла.
+Каждый масштаб прогоняется в отдельном процессе, чтобы пиковая память
+(ru_maxrss) относилась только к нему. Результат — JSON с пропускной
+способностью (МБ/с, документов/с) и пиковой памятью, чтобы сравнивать
+коммиты между собой.
+
+Запуск из корня проекта:
+    python benchmarks/run_benchmarks.py --docs 1000 10000
+    python benchmarks/run_benchmarks.py --corpus corpus
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import contextlib
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_utils import get_files_in_folder  # noqa: E402
+from profile_utils import PROFILER  # noqa: E402
+from main import analyze_corpus, get_report  # noqa: E402
+from generate_corpus import generate_corpus  # noqa: E402
+
+# Фазы этапа analysis -> поле события файла с их временем
+PHASE_STAGES = {'reading': 'read_time', 'cleaning': 'clean_time', 'counting': 'count_time'}
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """
+    Пиковая память процесса (RSS) в мегабайтах.
+
+    Returns:
+        float: Пиковая память или None, если модуль resource недоступен
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return round(peak / (1024 * 1024), 1)  # На macOS — в байтах
+    return round(peak / 1024, 1)  # На Linux — в килобайтах
+
+
+def current_commit():
+    """Короткий хэш текущего коммита или None вне git-репозитория."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_pipeline(corpus_folder, output_folder, workers=1, prefetch=0):
+    """
+    Прогоняет анализ корпуса и отчёт и собирает время каждого этапа.
+
+    Args:
+        corpus_folder (str): Папка с текстами
+        output_folder (str): Рабочая папка: в ней появятся results/ и html/
+        workers (int): Количество процессов для анализа
+        prefetch (int): Потоков чтения наперёд (0 — чтение целиком входит в reading)
+
+    Returns:
+        dict: Этап или фаза -> секунды, а также количество документов и байт
+    """
+    corpus_folder = os.path.abspath(corpus_folder)
+    files = get_files_in_folder(corpus_folder, '.txt')
+    total_bytes = sum(os.path.getsize(os.path.join(corpus_folder, filename)) for filename in files)
+
+    timings = {}
+
+    def collect(event):
+        if event['category'] == 'stage':
+            timings[event['name']] = timings.get(event['name'], 0.0) + event['wall']
+        elif event['category'] == 'file':
+            for phase, field in PHASE_STAGES.items():
+                timings[phase] = timings.get(phase, 0.0) + event.get(field, 0.0)
+
+    PROFILER.register_hook(collect)
+    cwd = os.getcwd()
+    os.chdir(output_folder)  # analyze_corpus и get_report пишут в results/ и html/ текущей папки
+    try:
+        # Вывод конвейера не нужен, но печать остаётся в замере, как при обычном запуске
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            table = analyze_corpus(corpus_folder, workers=workers, use_cache=False, prefetch=prefetch)
+            get_report(table)
+    finally:
+        os.chdir(cwd)
+        PROFILER.unregister_hook(collect)
+
+    return {'docs': len(files), 'bytes': total_bytes, 'timings': timings}
+
+
+def run_scale(corpus_folder, workers=1, prefetch=0):
+    """
+    Прогоняет run_pipeline в отдельном процессе, чтобы пиковая память
+    не копилась от масштаба к масштабу.
+
+    Args:
+        corpus_folder (str): Папка с текстами
+        workers (int): Количество процессов для анализа
+        prefetch (int): Потоков чтения наперёд
+
+    Returns:
+        dict: Результат run_pipeline и peak_rss_mb процесса
+    """
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-scale', corpus_folder,
+                                '--workers', str(workers), '--prefetch', str(prefetch)],
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def summarize(run):
+    """
+    Переводит секунды в пропускную способность.
+
+    Args:
+        run (dict): Результат run_pipeline
+
+    Returns:
+        dict: Этап -> {seconds, mb_per_s, docs_per_s}
+    """
+    size_mb = run['bytes'] / (1024 * 1024)
+    stages = {}
+    for stage, seconds in run['timings'].items():
+        stages[stage] = {
+            'seconds': round(seconds, 6),
+            'mb_per_s': round(size_mb / seconds, 2) if seconds else None,
+            'docs_per_s': round(run['docs'] / seconds, 1) if seconds else None,
+        }
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк этапов анализа корпуса')
+    parser.add_argument('--docs', type=int, nargs='+', default=[1000],
+                        help='Размеры синтетических корпусов (10**3 .. 10**6)')
+    parser.add_argument('--corpus', help='Замерить готовый корпус вместо синтетического')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+    parser.add_argument('--min-stanzas', type=int, default=2, help='Минимум строф в документе')
+    parser.add_argument('--max-stanzas', type=int, default=8, help='Максимум строф в документе')
+    parser.add_argument('--output', help='Путь к JSON с результатами '
+                                         '(по умолчанию benchmarks/results/bench_<коммит>.json)')
+    parser.add_argument('--workers', type=int, default=1, help='Количество процессов для анализа')
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='Потоков чтения наперёд (по умолчанию 0 — фаза reading замеряет всё чтение)')
+    # Внутренний режим: один масштаб в отдельном процессе, результат — JSON в stdout
+    parser.add_argument('--run-scale', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scale:
+        work_folder = tempfile.mkdtemp(prefix='corpus_bench_run_')
+        try:
+            run = run_pipeline(args.run_scale, work_folder, args.workers, args.prefetch)
+        finally:
+            shutil.rmtree(work_folder, ignore_errors=True)
+        run['peak_rss_mb'] = peak_rss_mb()
+        print(json.dumps(run))
+        return
+
+    commit = current_commit()
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         f"bench_{commit or 'nogit'}.json")
+    report = {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': [],
+    }
+
+    work_folder = tempfile.mkdtemp(prefix='corpus_bench_')
+    try:
+        if args.corpus:
+            scales = [(args.corpus, None)]
+        else:
+            scales = []
+            for docs in args.docs:
+                folder = os.path.join(work_folder, f"corpus_{docs}")
+                generate_corpus(folder, docs, args.seed, args.min_stanzas, args.max_stanzas)
+                scales.append((folder, docs))
+
+        for folder, docs in scales:
+            try:
+                run = run_scale(folder, args.workers, args.prefetch)
+            except subprocess.CalledProcessError as e:
+                print(f"✗ Ошибка при замере {folder}:\n{e.stderr}")
+                continue
+            report['runs'].append({
+                'corpus': args.corpus or 'synthetic',
+                'docs': run['docs'],
+                'megabytes': round(run['bytes'] / (1024 * 1024), 3),
+                'stages': summarize(run),
+                'total_seconds': round(sum(seconds for stage, seconds in run['timings'].items()
+                                           if stage not in PHASE_STAGES), 6),
+                'peak_rss_mb': run['peak_rss_mb'],
+            })
+            total = report['runs'][-1]['total_seconds']
+            print(f"✓ {run['docs']} документов: {total:.3f} с, пик памяти {run['peak_rss_mb']} МБ")
+            if docs is not None:
+                shutil.rmtree(folder, ignore_errors=True)  # Освобождаем место перед следующим масштабом
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✓ Результаты сохранены в {output}")
+
+
+if __name__ == '__main__':
+    main()
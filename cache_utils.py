@@ -0,0 +1,231 @@
+import os
+import json
+import hashlib
+from collections import Counter
+
+# Кэш результатов анализа: по одной JSON-строке на файл корпуса.
+# Ключ записи — путь к файлу, а актуальность проверяется по времени
+# изменения, размеру и (если они не совпали) по хэшу содержимого.
+# CACHE_VERSION увеличивается, когда меняется состав метрик в записи.
+CACHE_VERSION = 5
+
+def file_content_hash(filepath, block_size=1024 * 1024):
+    """
+    Считает SHA-1 хэш содержимого файла, читая его блоками.
+
+    Args:
+        filepath (str): Путь к файлу
+        block_size (int): Размер блока в байтах
+
+    Returns:
+        str: Хэш в шестнадцатеричном виде
+    """
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(filepath):
+    """
+    Время изменения, размер и хэш файла для записи кэша. Снимается до
+    чтения файла: если файл изменят во время анализа, запись не совпадёт
+    с новым содержимым и файл будет проанализирован заново.
+
+    Args:
+        filepath (str): Путь к файлу
+
+    Returns:
+        dict: Ключи mtime_ns, size и sha1
+    """
+    stat = os.stat(filepath)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': file_content_hash(filepath)}
+
+def load_analysis_cache(cache_path):
+    """
+    Загружает кэш анализа из JSON-lines файла.
+
+    Args:
+        cache_path (str): Путь к файлу кэша
+
+    Returns:
+        dict: Путь к файлу -> запись кэша (пустой словарь, если кэша нет)
+    """
+    cache = {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                cache[entry['path']] = entry
+    except FileNotFoundError:
+        return {}
+    except (ValueError, KeyError) as e:
+        # Повреждённый кэш не страшен: просто пересчитаем всё заново
+        print(f"⚠ Кэш {cache_path} повреждён и будет перестроен: {e}")
+        return {}
+    return cache
+
+class AnalysisCacheWriter:
+    """
+    Пишет кэш анализа по одной записи, не собирая записи в памяти.
+
+    Записи идут во временный файл рядом с кэшем; commit() подменяет им
+    старый кэш целиком, abort() удаляет его, оставляя старый кэш как был.
+
+    Attributes:
+        cache_path (str): Путь к файлу кэша
+        count (int): Сколько записей записано
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.tmp_path = cache_path + '.tmp'
+        self.count = 0
+        folder = os.path.dirname(cache_path)
+        try:
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        except Exception as e:
+            print(f"Ошибка при записи кэша {cache_path}: {e}")
+            self.file = None
+
+    def write(self, entry):
+        """
+        Дописывает запись кэша.
+
+        Args:
+            entry (dict): Запись (make_cache_entry или запись из load_analysis_cache)
+        """
+        if self.file is not None:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.count += 1
+
+    def commit(self):
+        """
+        Подменяет старый кэш записанным.
+
+        Returns:
+            bool: True, если запись прошла успешно, иначе False
+        """
+        if self.file is None:
+            return False
+        try:
+            self.file.close()
+            os.replace(self.tmp_path, self.cache_path)  # Подменяем файл целиком, чтобы не оставить его наполовину записанным
+            return True
+        except Exception as e:
+            print(f"Ошибка при записи кэша {self.cache_path}: {e}")
+            return False
+        finally:
+            self.file = None
+
+    def abort(self):
+        """Удаляет недописанный кэш; старый кэш остаётся без изменений."""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def save_analysis_cache(cache_path, cache):
+    """
+    Сохраняет кэш анализа в JSON-lines файл.
+
+    Args:
+        cache_path (str): Путь к файлу кэша
+        cache (dict): Путь к файлу -> запись кэша
+
+    Returns:
+        bool: True, если запись прошла успешно, иначе False
+    """
+    writer = AnalysisCacheWriter(cache_path)
+    try:
+        for path in sorted(cache):
+            writer.write(cache[path])
+    except Exception as e:
+        print(f"Ошибка при записи кэша {cache_path}: {e}")
+        writer.abort()
+        return False
+    return writer.commit()
+
+def get_cached_result(cache, filepath, ngram_orders=None, stem=False, minhash=False):
+    """
+    Ищет в кэше актуальный результат анализа файла.
+
+    Сначала сравниваются время изменения и размер; если они отличаются,
+    сравнивается хэш содержимого (файл могли просто перезаписать тем же текстом).
+
+    Args:
+        cache (dict): Загруженный кэш
+        filepath (str): Путь к файлу
+        ngram_orders (tuple): Какие n-граммы нужны; запись без них считается устаревшей
+        stem (bool): Нужны ли метрики по основам слов
+        minhash (bool): Нужна ли подпись MinHash; запись без неё считается устаревшей
+
+    Returns:
+        dict: Ключи row, word_freq, ngram_freq (и minhash) или None, если файл изменился
+    """
+    entry = cache.get(filepath)
+    if entry is None or entry.get('version') != CACHE_VERSION:
+        return None
+    if ngram_orders and entry.get('ngram_orders') != list(ngram_orders):
+        return None
+    if entry.get('stem', False) != stem:
+        return None
+    if minhash and 'minhash' not in entry:
+        return None
+    stat = os.stat(filepath)
+    if entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+        if entry['size'] != stat.st_size or entry['sha1'] != file_content_hash(filepath):
+            return None
+        # Содержимое то же — запоминаем новое время изменения
+        entry['mtime_ns'] = stat.st_mtime_ns
+    ngram_freq = entry.get('ngram_freq')
+    result = {
+        'row': entry['row'],
+        'word_freq': Counter(entry['word_freq']),
+        'ngram_freq': Counter(ngram_freq) if ngram_freq is not None else None,
+    }
+    if minhash:
+        result['minhash'] = entry['minhash']
+    return result
+
+def make_cache_entry(filepath, fingerprint, result, ngram_orders=None, stem=False):
+    """
+    Создаёт запись кэша для только что проанализированного файла.
+
+    Частоты слов хранятся всегда, в том числе в режиме приближённого топа,
+    чтобы запись годилась для любого следующего запуска. Частоты не копируются:
+    запись ссылается на те же Counter, что и результат.
+
+    Args:
+        filepath (str): Путь к файлу
+        fingerprint (dict): file_fingerprint, снятый до чтения файла
+        result (dict): Результат анализа: row, word_freq, ngram_freq (и minhash)
+        ngram_orders (tuple): Длины посчитанных n-грамм
+        stem (bool): Посчитаны ли метрики по основам слов
+
+    Returns:
+        dict: Запись кэша
+    """
+    entry = {
+        'path': filepath,
+        'version': CACHE_VERSION,
+        'mtime_ns': fingerprint['mtime_ns'],
+        'size': fingerprint['size'],
+        'sha1': fingerprint['sha1'],
+        'row': result['row'],
+        'word_freq': result['word_freq'],
+    }
+    if result.get('ngram_freq') is not None:
+        entry['ngram_orders'] = list(ngram_orders)
+        entry['ngram_freq'] = result['ngram_freq']
+    if stem:
+        entry['stem'] = True
+    if 'minhash' in result:
+        entry['minhash'] = result['minhash']  # None — в тексте нет слов
+    return entry
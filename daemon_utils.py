@@ -0,0 +1,595 @@
+import os
+import json
+import time
+import threading
+import socketserver
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from file_utils import iter_files, iter_csv_rows, STATISTICS_SCHEMA, METADATA_SCHEMA
+from text_utils import TextStats
+from results_utils import StatsTable
+from ngram_utils import CorpusNgrams
+from stem_utils import make_stemmer
+from facet_utils import FacetIndex, load_facets, save_facets
+from report_utils import summarize_results
+from cache_utils import load_analysis_cache, save_analysis_cache, get_cached_result
+
+# Постоянно работающий режим анализа (python main.py --serve).
+#
+# CorpusModel один раз загружает корпус (неизменившиеся файлы — из кэша
+# анализа) и держит в памяти метрики каждого файла, частоты слов и n-грамм
+# корпуса и итоги по метаданным. CorpusWatcher следит за папкой корпуса
+# (через inotify, если установлен inotify_simple, иначе опросом) и заново
+# анализирует только тронутые файлы: их старый вклад вычитается из частот
+# корпуса, новый прибавляется. Запросы к модели идут по локальному HTTP
+# (или Unix-сокету) и отвечаются из памяти; готовые ответы запоминаются до
+# следующего изменения корпуса. statistics.csv и report.txt пишутся не на
+# каждое изменение, а когда правки затихли (DebouncedWriter).
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # pragma: no cover - зависит от окружения
+    INotify = None
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+WATCH_INTERVAL = 1.0
+DEBOUNCE_DELAY = 2.0
+DEBOUNCE_MAX_DELAY = 30.0
+
+def _subtract(counter, other):
+    """Вычитает частоты other из counter, удаляя слова с нулевой частотой."""
+    for key, count in other.items():
+        left = counter[key] - count
+        if left > 0:
+            counter[key] = left
+        else:
+            del counter[key]
+
+class CorpusModel:
+    """
+    Корпус, загруженный в память: метрики файлов, частоты корпуса и итоги
+    по метаданным с пошаговым обновлением.
+
+    Attributes:
+        corpus_folder (str): Папка корпуса
+        files (dict): Путь к файлу -> результат анализа (row, word_freq, ngram_freq)
+        signatures (dict): Путь к файлу -> (время изменения, размер) при последнем анализе
+        word_freq (Counter): Частоты слов корпуса
+        ngram_freq (Counter): Частоты n-грамм корпуса
+        facets (FacetIndex): Итоги по годам, авторам и периодам
+        version (int): Номер состояния; увеличивается при каждом изменении корпуса
+        lock (threading.RLock): Блокировка для запросов из потоков сервера
+    """
+
+    def __init__(self, corpus_folder, analyze, ngram_orders=(2, 3), ngram_min_count=2,
+                 recursive=False, stem_cache_size=None, metadata_path='data/metadata.csv',
+                 cache_path=None, facets_path=None):
+        """
+        Args:
+            corpus_folder (str): Папка корпуса
+            analyze (function): Анализ списка путей -> результаты в том же порядке, с записями
+                                кэша (main.run_file_analysis с cache_entries=True)
+            ngram_orders (tuple): Длины n-грамм, которые считает analyze
+            ngram_min_count (int): Минимальная частота словосочетания в итогах
+            recursive (bool): Следить и за вложенными папками
+            stem_cache_size (int): Размер кэша стеммера для запросов по тексту;
+                                   None — без стемминга (как и в analyze)
+            metadata_path (str): Путь к metadata.csv
+            cache_path (str): Путь к кэшу анализа (по умолчанию results/analysis_cache.jsonl)
+            facets_path (str): Путь к итогам по метаданным (по умолчанию results/facets.pkl)
+        """
+        self.corpus_folder = corpus_folder
+        self.analyze = analyze
+        self.ngram_orders = tuple(ngram_orders or ())
+        self.ngram_min_count = ngram_min_count
+        self.recursive = recursive
+        self.stem = bool(stem_cache_size)
+        self.stemmer = make_stemmer(stem_cache_size) if stem_cache_size else None
+        self.metadata_path = metadata_path
+        self.cache_path = cache_path or os.path.join('results', 'analysis_cache.jsonl')
+        self.facets_path = facets_path or os.path.join('results', 'facets.pkl')
+        self.files = {}
+        self.signatures = {}
+        self.word_freq = Counter()
+        self.ngram_freq = Counter()
+        self.facets = FacetIndex(stem=self.stem)
+        self.metadata_map = {}
+        self._metadata_signature = None
+        self.cache = {}
+        self.version = 0
+        self.lock = threading.RLock()
+        self._table = None
+        self._responses = {}
+
+    def load(self):
+        """
+        Загружает корпус: неизменившиеся файлы берутся из кэша анализа,
+        остальные анализируются.
+
+        Returns:
+            int: Количество загруженных файлов
+        """
+        self.cache = load_analysis_cache(self.cache_path)
+        self.facets = load_facets(self.facets_path, self.stem) or FacetIndex(stem=self.stem)
+        self.refresh(*self.scan())
+        return len(self.files)
+
+    def _signature(self, filepath):
+        """(время изменения, размер) файла или None, если файла нет."""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def scan(self):
+        """
+        Сравнивает папку корпуса с загруженным состоянием (по времени
+        изменения и размеру файлов, без чтения содержимого).
+
+        Returns:
+            tuple: (новые и изменённые пути, удалённые пути, текущие подписи файлов)
+        """
+        current = {}
+        for name in iter_files(self.corpus_folder, '.txt', self.recursive):
+            filepath = os.path.join(self.corpus_folder, name)
+            signature = self._signature(filepath)
+            if signature is not None:
+                current[filepath] = signature
+        changed = sorted(filepath for filepath, signature in current.items()
+                         if self.signatures.get(filepath) != signature)
+        removed = [filepath for filepath in self.signatures if filepath not in current]
+        return changed, removed, current
+
+    def _reload_metadata(self):
+        """Перечитывает metadata.csv, если он изменился. Возвращает True при изменении."""
+        signature = self._signature(self.metadata_path)
+        if signature == self._metadata_signature:
+            return False
+        self._metadata_signature = signature
+        if signature is None:
+            self.metadata_map = {}
+        else:
+            self.metadata_map = {row['filename']: row
+                                 for row in iter_csv_rows(self.metadata_path, METADATA_SCHEMA)}
+        return True
+
+    def refresh(self, changed, removed, signatures):
+        """
+        Анализирует заново изменённые файлы и убирает удалённые.
+
+        Args:
+            changed (list): Новые и изменённые пути (см. scan)
+            removed (list): Удалённые пути
+            signatures (dict): Подписи файлов из scan
+
+        Returns:
+            int: Сколько файлов обновлено или удалено
+        """
+        results = {}
+        to_analyze = []
+        for filepath in changed:
+            if not os.path.exists(filepath):
+                continue  # Файл удалили после scan — уберём его при следующей проверке
+            # Файл могли перезаписать тем же текстом — тогда хватит кэша
+            cached = get_cached_result(self.cache, filepath, self.ngram_orders, self.stem)
+            if cached is not None:
+                results[filepath] = cached
+            else:
+                to_analyze.append(filepath)
+        for filepath, result in zip(to_analyze, self.analyze(to_analyze) if to_analyze else []):
+            result.pop('event', None)
+            results[filepath] = result
+            self.cache[filepath] = result.pop('cache_entry')
+        metadata_changed = self._reload_metadata()
+        if not results and not removed and not metadata_changed:
+            return 0
+
+        with self.lock:
+            for filepath in removed:
+                self._remove(filepath)
+                self.cache.pop(filepath, None)
+                self.signatures.pop(filepath, None)
+            for filepath, result in results.items():
+                self._remove(filepath)
+                self.files[filepath] = result
+                self.word_freq.update(result['word_freq'])
+                if result.get('ngram_freq'):
+                    self.ngram_freq.update(result['ngram_freq'])
+                self.signatures[filepath] = signatures[filepath]
+            columns = list(STATISTICS_SCHEMA)
+            facet_results = {result['row'][0]: (dict(zip(columns, result['row'])), result['word_freq'])
+                             for result in self.files.values()}
+            self.facets.sync(facet_results, self.metadata_map,
+                             {result['row'][0] for result in results.values()})
+            self.version += 1
+            self._table = None
+            self._responses.clear()
+        return len(results) + len(removed)
+
+    def _remove(self, filepath):
+        """Вычитает вклад файла из частот корпуса."""
+        old = self.files.pop(filepath, None)
+        if old is None:
+            return
+        _subtract(self.word_freq, old['word_freq'])
+        if old.get('ngram_freq'):
+            _subtract(self.ngram_freq, old['ngram_freq'])
+
+    def table(self):
+        """
+        Таблица в том же виде, что возвращает analyze_corpus: строки в порядке
+        имён файлов, частоты слов корпуса, сводка по словосочетаниям и итоги
+        по метаданным. Строится заново только после изменения корпуса.
+
+        Returns:
+            StatsTable: Снимок текущего состояния
+        """
+        with self.lock:
+            if self._table is None:
+                table = StatsTable()
+                for result in sorted(self.files.values(), key=lambda result: result['row'][0]):
+                    table.append(result['row'])
+                table.word_freq = Counter(self.word_freq)
+                if self.ngram_orders:
+                    ngrams = CorpusNgrams(max_entries=len(self.ngram_freq) + 1,
+                                          min_count=self.ngram_min_count)
+                    ngrams.update(self.ngram_freq)
+                    table.ngram_summary = ngrams.summarize(table.word_freq)
+                table.facets = self.facets
+                self._table = table
+            return self._table
+
+    def save(self):
+        """Сохраняет кэш анализа и итоги по метаданным для следующего холодного запуска."""
+        with self.lock:
+            save_analysis_cache(self.cache_path, {filepath: self.cache[filepath]
+                                                  for filepath in self.files if filepath in self.cache})
+            save_facets(self.facets, self.facets_path)
+
+    def _find_file(self, name):
+        """Результат анализа файла по имени из statistics.csv (или None)."""
+        result = self.files.get(os.path.join(self.corpus_folder, name))
+        if result is None:
+            result = next((result for result in self.files.values() if result['row'][0] == name), None)
+        return result
+
+    def query(self, route, params):
+        """
+        Отвечает на запрос по данным в памяти.
+
+        Args:
+            route (str): 'corpus', 'files', 'file', 'top', 'ngrams' или 'facet'
+            params (dict): Параметры запроса (имя -> строка)
+
+        Returns:
+            tuple: (код HTTP, объект для JSON)
+        """
+        n = int(params.get('n', 10))
+        with self.lock:
+            if route == 'corpus':
+                table = self.table()
+                summary = summarize_results(table)
+                return 200, {
+                    'version': self.version,
+                    'files': summary['total_files'],
+                    'words': summary['total_words'],
+                    'unique': summary['total_unique'],
+                    'vocabulary': len(self.word_freq),
+                    'avg_ttr': round(summary['avg_ttr'], 3),
+                    'avg_mattr': round(summary['avg_mattr'], 3),
+                    'avg_mtld': round(summary['avg_mtld'], 3),
+                    'avg_hdd': round(summary['avg_hdd'], 3),
+                    'top_words': self.word_freq.most_common(n),
+                }
+            if route == 'files':
+                return 200, list(self.table())
+            if route == 'file':
+                result = self._find_file(params.get('name', ''))
+                if result is None:
+                    return 404, {'error': f"Файл не найден: {params.get('name', '')}"}
+                row = dict(zip(STATISTICS_SCHEMA, result['row']))
+                row['top_words'] = result['word_freq'].most_common(n)
+                return 200, row
+            if route == 'top':
+                return 200, self.word_freq.most_common(n)
+            if route == 'ngrams':
+                return 200, self.table().ngram_summary
+            if route == 'facet':
+                facet = params.get('facet', 'year')
+                if facet not in self.facets.facets:
+                    return 400, {'error': f"Неизвестный разрез: {facet}"}
+                value = params.get('value')
+                if value is None:
+                    return 200, [[key, group.as_dict(n)] for key, group in self.facets.groups(facet)]
+                key = int(value) if facet == 'year' and value.isdigit() else value
+                group = self.facets.group(facet, key)
+                if group is None:
+                    return 404, {'error': f"Нет текстов со значением {value}"}
+                return 200, group.as_dict(n)
+        return 404, {'error': f"Неизвестный запрос: /{route}"}
+
+    def respond(self, route, params):
+        """
+        Ответ на запрос в виде JSON; повторные запросы до изменения корпуса
+        отдаются из памяти без пересчёта.
+
+        Returns:
+            tuple: (код HTTP, тело ответа в UTF-8)
+        """
+        key = (route, tuple(sorted(params.items())))
+        with self.lock:
+            response = self._responses.get(key)
+            if response is None:
+                try:
+                    status, payload = self.query(route, params)
+                except ValueError as e:
+                    status, payload = 400, {'error': str(e)}
+                response = (status, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+                if status == 200:
+                    self._responses[key] = response
+            return response
+
+    def analyze_text(self, text, n=5):
+        """
+        Метрики произвольного текста — как analyze_text_file, но без файла.
+
+        Args:
+            text (str): Текст
+            n (int): Сколько частых слов вернуть
+
+        Returns:
+            dict: Столбцы STATISTICS_SCHEMA (кроме filename) и top_words
+        """
+        stats = TextStats(text, stemmer=self.stemmer)
+        row = dict(zip(STATISTICS_SCHEMA, stats.as_row('')))
+        del row['filename']
+        row['top_words'] = stats.most_common(n)
+        return row
+
+class DebouncedWriter:
+    """
+    Откладывает запись результатов, пока изменения не затихнут на delay
+    секунд, но не дольше max_delay с первого незаписанного изменения.
+
+    Attributes:
+        write (function): Запись результатов
+        delay (float): Сколько секунд тишины ждать перед записью
+        max_delay (float): Наибольшая задержка при непрерывных правках
+    """
+
+    def __init__(self, write, delay=DEBOUNCE_DELAY, max_delay=DEBOUNCE_MAX_DELAY):
+        self.write = write
+        self.delay = delay
+        self.max_delay = max_delay
+        self._first = None
+        self._last = None
+
+    def mark(self):
+        """Отмечает изменение, которое нужно записать."""
+        now = time.monotonic()
+        if self._first is None:
+            self._first = now
+        self._last = now
+
+    @property
+    def pending(self):
+        """bool: Есть ли незаписанные изменения."""
+        return self._first is not None
+
+    def time_left(self):
+        """
+        Сколько секунд осталось до записи.
+
+        Returns:
+            float: Секунды (0 — пора писать) или None, если писать нечего
+        """
+        if self._first is None:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(self._last + self.delay, self._first + self.max_delay) - now)
+
+    def flush(self, force=False):
+        """
+        Записывает результаты, если подошло время (или force).
+
+        Returns:
+            bool: True, если запись была
+        """
+        if not self.pending or not force and self.time_left() > 0:
+            return False
+        self._first = self._last = None
+        self.write()
+        return True
+
+class CorpusWatcher:
+    """
+    Следит за папкой корпуса и обновляет модель при изменениях.
+
+    С inotify (пакет inotify_simple, только Linux) проверка запускается по
+    событиям файловой системы, иначе — каждые interval секунд. Сама проверка
+    в обоих случаях сравнивает время изменения и размер файлов (CorpusModel.scan).
+
+    Attributes:
+        model (CorpusModel): Модель корпуса
+        writer (DebouncedWriter): Отложенная запись результатов
+        interval (float): Период опроса (с inotify — период страховочной проверки)
+    """
+
+    def __init__(self, model, writer, interval=WATCH_INTERVAL, use_inotify=True):
+        self.model = model
+        self.writer = writer
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.inotify = None
+        if use_inotify and INotify is not None:
+            try:
+                self.inotify = INotify()
+                self._watch_folders()
+            except OSError as e:
+                print(f"⚠ inotify недоступен, папка корпуса будет опрашиваться: {e}")
+                self.inotify = None
+
+    @property
+    def mode(self):
+        """str: 'inotify' или 'polling'."""
+        return 'inotify' if self.inotify is not None else 'polling'
+
+    def _watch_folders(self):
+        """Ставит наблюдение inotify на папку корпуса (и вложенные, если recursive)."""
+        mask = (flags.CREATE | flags.CLOSE_WRITE | flags.DELETE | flags.MOVED_FROM
+                | flags.MOVED_TO | flags.DELETE_SELF)
+        folders = [self.model.corpus_folder]
+        if self.model.recursive:
+            folders += [os.path.join(root, name) for root, dirs, _ in os.walk(self.model.corpus_folder)
+                        for name in dirs]
+        for folder in folders:
+            self.inotify.add_watch(folder, mask)  # Повторное наблюдение за той же папкой не дублируется
+        if os.path.exists(os.path.dirname(self.model.metadata_path) or '.'):
+            self.inotify.add_watch(os.path.dirname(self.model.metadata_path) or '.', mask)
+
+    def _wait(self, timeout):
+        """Ждёт изменений не дольше timeout секунд. Возвращает False при остановке."""
+        if self.inotify is None:
+            return not self.stop_event.wait(timeout)
+        # Событий может прийти много подряд — дочитываем их, пока не затихнут
+        if self.inotify.read(timeout=int(timeout * 1000)):
+            while self.inotify.read(timeout=50):
+                pass
+        return not self.stop_event.is_set()
+
+    def check(self):
+        """
+        Одна проверка корпуса: обновляет модель и отмечает изменения для записи.
+
+        Returns:
+            int: Сколько файлов обновлено или удалено
+        """
+        updated = self.model.refresh(*self.model.scan())
+        if updated:
+            self.writer.mark()
+            if self.inotify is not None and self.model.recursive:
+                self._watch_folders()  # Могли появиться новые вложенные папки
+        return updated
+
+    def run(self):
+        """Цикл наблюдения до вызова stop(); незаписанные изменения пишутся в конце."""
+        try:
+            while True:
+                time_left = self.writer.time_left()
+                timeout = self.interval if time_left is None else min(self.interval, time_left)
+                if not self._wait(timeout):
+                    break
+                try:
+                    updated = self.check()
+                    if updated:
+                        print(f"↻ Обновлено файлов: {updated} (состояние {self.model.version})")
+                except Exception as e:
+                    # Файл могли изменить во время чтения — проверим его снова на следующем шаге
+                    print(f"⚠ Ошибка при обновлении корпуса: {e}")
+                self.writer.flush()
+        finally:
+            self.writer.flush(force=True)
+            if self.inotify is not None:
+                self.inotify.close()
+
+    def stop(self):
+        """Останавливает цикл наблюдения."""
+        self.stop_event.set()
+
+class CorpusRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов к модели корпуса (модель задаёт make_request_handler).
+
+    GET /corpus, /files, /file?name=..., /top?n=..., /ngrams,
+    /facet?facet=year&value=1906 — данные корпуса в JSON;
+    POST /text с текстом в теле — метрики этого текста.
+    """
+
+    protocol_version = 'HTTP/1.1'  # Соединение не закрывается после ответа
+    # Заголовки и тело уходят одной записью в сокет: иначе второй пакет ждёт
+    # подтверждения первого (алгоритм Нейгла) и ответ задерживается на ~40 мс
+    wbufsize = -1
+    model = None
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        self._send(*self.model.respond(url.path.strip('/') or 'corpus', params))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        text = self.rfile.read(length).decode('utf-8', errors='replace')
+        if url.path.strip('/') != 'text':
+            self._send(404, json.dumps({'error': f"Неизвестный запрос: {url.path}"},
+                                       ensure_ascii=False).encode('utf-8'))
+            return
+        payload = self.model.analyze_text(text)
+        self._send(200, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    def address_string(self):
+        # У Unix-сокета нет адреса клиента
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        # Журнал каждого запроса не нужен: запросов много, и они быстрые
+        pass
+
+def make_request_handler(model):
+    """
+    Создаёт класс обработчика запросов, привязанный к модели.
+
+    Args:
+        model (CorpusModel): Модель корпуса
+
+    Returns:
+        type: Подкласс CorpusRequestHandler
+    """
+    return type('BoundCorpusRequestHandler', (CorpusRequestHandler,), {'model': model})
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """HTTP-сервер на Unix-сокете; каждый клиент обслуживается в своём потоке."""
+        daemon_threads = True
+
+        def server_bind(self):
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)  # Сокет, оставшийся от прошлого запуска
+            super().server_bind()
+            self.server_name, self.server_port = 'localhost', 0
+else:  # pragma: no cover - Windows
+    ThreadingUnixHTTPServer = None
+
+def start_server(model, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    """
+    Запускает сервер запросов в фоновом потоке.
+
+    Args:
+        model (CorpusModel): Модель корпуса
+        host (str): Адрес (по умолчанию только локальный)
+        port (int): Порт
+        socket_path (str): Путь к Unix-сокету вместо TCP
+
+    Returns:
+        socketserver.BaseServer: Запущенный сервер (остановка — shutdown())
+    """
+    handler = make_request_handler(model)
+    if socket_path:
+        if ThreadingUnixHTTPServer is None:
+            raise OSError("Unix-сокеты не поддерживаются в этой системе")
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
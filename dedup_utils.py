@@ -0,0 +1,164 @@
+import random
+import hashlib
+from collections import defaultdict
+
+# Поиск почти одинаковых текстов (разные редакции и перепечатки одного
+# стихотворения) через MinHash и LSH.
+#
+# Текст представляется множеством шинглов — последовательностей из
+# SHINGLE_SIZE очищенных слов (те же слова, что у частот и n-грамм в
+# TextStats). MinHash сжимает множество в подпись из NUM_PERM чисел: доля
+# совпавших чисел у двух подписей оценивает коэффициент Жаккара множеств.
+# Подпись считается в том же проходе по тексту, что и остальные метрики,
+# и хранится в кэше анализа, поэтому пересчитывается только для изменённых
+# файлов. Чтобы не сравнивать все пары, подписи режутся на LSH_BANDS полос:
+# кандидатами становятся тексты, у которых совпала хотя бы одна полоса
+# целиком, — это O(n) по числу текстов. Кандидаты проверяются по оценке
+# Жаккара и объединяются в группы.
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+LSH_BANDS = 32  # 32 полосы по 4 числа: кандидатами почти наверняка станут пары с Жаккаром от ~0.5
+DEDUP_THRESHOLD = 0.5
+DEDUP_MODES = ('report', 'exclude', 'collapse')
+MINHASH_SEED = 1
+MERSENNE_PRIME = (1 << 61) - 1
+
+def _permutations(num_perm, seed):
+    """Коэффициенты (a, b) хэш-функций h -> (a * h + b) mod p."""
+    rng = random.Random(seed)
+    return [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)]
+
+_PERMUTATIONS = _permutations(NUM_PERM, MINHASH_SEED)
+
+def shingle_hash(shingle):
+    """
+    Хэш шингла, одинаковый во всех запусках (в отличие от встроенного hash).
+
+    Args:
+        shingle (str): Шингл «слово слово слово»
+
+    Returns:
+        int: 64-битный хэш
+    """
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class MinHash:
+    """
+    Подпись MinHash множества шинглов, которое подаётся частями.
+
+    Attributes:
+        count (int): Сколько различных шинглов подано (в пределах каждой части)
+        minimums (list): Текущие минимумы по каждой хэш-функции
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=MINHASH_SEED):
+        self.permutations = (_PERMUTATIONS if (num_perm, seed) == (NUM_PERM, MINHASH_SEED)
+                             else _permutations(num_perm, seed))
+        self.count = 0
+        self.minimums = [MERSENNE_PRIME] * num_perm
+
+    def update(self, shingles):
+        """
+        Добавляет шинглы.
+
+        Args:
+            shingles (iterable): Строки шинглов
+        """
+        hashes = set(map(shingle_hash, shingles))
+        if not hashes:
+            return
+        self.count += len(hashes)
+        minimums = self.minimums
+        for i, (a, b) in enumerate(self.permutations):
+            value = min((a * h + b) % MERSENNE_PRIME for h in hashes)
+            if value < minimums[i]:
+                minimums[i] = value
+
+    @property
+    def signature(self):
+        """list: Подпись (None, если шинглов не было)."""
+        return list(self.minimums) if self.count else None
+
+def estimate_jaccard(first, second):
+    """
+    Оценка коэффициента Жаккара по двум подписям MinHash.
+
+    Args:
+        first (list): Подпись
+        second (list): Подпись той же длины
+
+    Returns:
+        float: Доля совпавших позиций (от 0 до 1)
+    """
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+def lsh_candidates(signatures, bands=LSH_BANDS):
+    """
+    Находит пары-кандидаты: подписи, у которых совпала хотя бы одна полоса.
+
+    Args:
+        signatures (dict): Имя текста -> подпись
+        bands (int): Количество полос (длина подписи должна на него делиться)
+
+    Returns:
+        set: Пары имён (в порядке сортировки)
+    """
+    candidates = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for name, signature in signatures.items():
+            rows = len(signature) // bands
+            buckets[tuple(signature[band * rows:(band + 1) * rows])].append(name)
+        for names in buckets.values():
+            if len(names) > 1:
+                names.sort()
+                candidates.update((first, second) for i, first in enumerate(names)
+                                  for second in names[i + 1:])
+    return candidates
+
+def find_near_duplicates(signatures, sizes=None, threshold=DEDUP_THRESHOLD, bands=LSH_BANDS):
+    """
+    Группирует почти одинаковые тексты.
+
+    Args:
+        signatures (dict): Имя текста -> подпись MinHash (None — текст без шинглов, пропускается)
+        sizes (dict): Имя текста -> количество слов; представителем группы
+                      становится самый длинный текст (самая полная редакция)
+        threshold (float): Минимальная оценка Жаккара для пары
+        bands (int): Количество полос LSH
+
+    Returns:
+        list: Группы — словари с ключами representative (имя) и
+              members (пары (имя, оценка Жаккара с представителем) остальных текстов)
+    """
+    signatures = {name: signature for name, signature in signatures.items() if signature}
+    sizes = sizes or {}
+    parent = {}
+
+    def find(name):
+        # Система непересекающихся множеств со сжатием путей
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for first, second in lsh_candidates(signatures, bands):
+        if estimate_jaccard(signatures[first], signatures[second]) >= threshold:
+            parent.setdefault(first, first)
+            parent.setdefault(second, second)
+            root_first, root_second = find(first), find(second)
+            if root_first != root_second:
+                parent[max(root_first, root_second)] = min(root_first, root_second)
+
+    groups = defaultdict(list)
+    for name in parent:
+        groups[find(name)].append(name)
+    clusters = []
+    for names in groups.values():
+        representative = min(names, key=lambda name: (-sizes.get(name, 0), name))
+        members = [(name, round(estimate_jaccard(signatures[representative], signatures[name]), 3))
+                   for name in sorted(names) if name != representative]
+        clusters.append({'representative': representative, 'members': members})
+    return sorted(clusters, key=lambda cluster: cluster['representative'])
@@ -0,0 +1,169 @@
+import math
+from array import array
+from collections import Counter
+
+# Меры лексического разнообразия, мало зависящие от длины текста.
+#
+# Обычный TTR падает с ростом текста, поэтому длинные и короткие тексты
+# по нему сравнивать нельзя. Здесь считаются:
+#   MATTR — средний TTR по скользящему окну (Covington, McFall 2010);
+#   MTLD  — средняя длина отрезка, на котором TTR держится выше 0.72
+#           (McCarthy, Jarvis 2010), среднее прямого и обратного проходов;
+#   HD-D  — ожидаемый TTR случайной выборки из 42 слов по
+#           гипергеометрическому распределению (McCarthy, Jarvis 2007).
+# Окно MATTR и отрезки MTLD сдвигаются с пересчётом счётчиков только для
+# входящего и выходящего слова, поэтому всё считается за O(n), а не O(n x окно).
+# Слова — те же, что у ttr_count: text.split() без очистки.
+
+MATTR_WINDOW = 50
+MTLD_THRESHOLD = 0.72
+HDD_SAMPLE_SIZE = 42
+
+def mattr(ids, window=MATTR_WINDOW):
+    """
+    Moving-average TTR: средний TTR всех окон длины window.
+
+    Args:
+        ids (sequence): Номера (или сами) слова текста по порядку
+        window (int): Длина окна
+
+    Returns:
+        float: MATTR, округлённый до 3 знаков; для текста короче окна — обычный TTR
+    """
+    n = len(ids)
+    if n == 0:
+        return 0.0
+    if n <= window:
+        return round(len(set(ids)) / n, 3)
+    counts = Counter(ids[:window])
+    distinct = len(counts)
+    distinct_sum = distinct
+    for i in range(window, n):
+        # Слово ids[i] входит в окно, ids[i - window] выходит из него
+        incoming = ids[i]
+        outgoing = ids[i - window]
+        if incoming != outgoing:
+            if counts[incoming] == 0:
+                distinct += 1
+            counts[incoming] += 1
+            counts[outgoing] -= 1
+            if counts[outgoing] == 0:
+                distinct -= 1
+        distinct_sum += distinct
+    return round(distinct_sum / ((n - window + 1) * window), 3)
+
+def _mtld_factors(ids, threshold):
+    """Число отрезков MTLD (с дробной частью за неполный последний отрезок) за один проход."""
+    factors = 0.0
+    seen = set()
+    length = 0
+    for word_id in ids:
+        seen.add(word_id)
+        length += 1
+        if len(seen) / length <= threshold:
+            factors += 1
+            seen.clear()
+            length = 0
+    if length:
+        factors += (1 - len(seen) / length) / (1 - threshold)
+    return factors
+
+def mtld(ids, threshold=MTLD_THRESHOLD):
+    """
+    Measure of Textual Lexical Diversity: среднее прямого и обратного проходов.
+
+    Args:
+        ids (sequence): Номера (или сами) слова текста по порядку
+        threshold (float): Порог TTR, на котором заканчивается отрезок
+
+    Returns:
+        float: MTLD, округлённый до 3 знаков; если TTR ни разу не опустился
+               ниже порога, возвращается длина текста
+    """
+    n = len(ids)
+    if n == 0:
+        return 0.0
+    values = []
+    for sequence in (ids, reversed(ids)):
+        factors = _mtld_factors(sequence, threshold)
+        values.append(n / factors if factors else float(n))
+    return round(sum(values) / len(values), 3)
+
+def hdd(type_counts, sample_size=HDD_SAMPLE_SIZE):
+    """
+    HD-D: сумма по словам вероятностей встретить слово в случайной выборке
+    из sample_size слов, делённая на sample_size.
+
+    Args:
+        type_counts (iterable): Частоты каждого уникального слова
+        sample_size (int): Размер выборки
+
+    Returns:
+        float: HD-D, округлённый до 3 знаков (от 0 до 1)
+    """
+    type_counts = list(type_counts)
+    n = sum(type_counts)
+    if n == 0:
+        return 0.0
+    sample_size = min(sample_size, n)
+    log_total = math.lgamma(n + 1) - math.lgamma(n - sample_size + 1)
+    total = 0.0
+    # Слова с одинаковой частотой дают одинаковый вклад — считаем его один раз
+    for frequency, types in Counter(type_counts).items():
+        rest = n - frequency
+        if rest < sample_size:
+            p_missing = 0.0
+        else:
+            # C(n - f, s) / C(n, s) через логарифмы гамма-функции
+            p_missing = math.exp(math.lgamma(rest + 1) - math.lgamma(rest - sample_size + 1) - log_total)
+        total += types * (1 - p_missing)
+    return round(total / sample_size, 3)
+
+class LexicalDiversity:
+    """
+    Накопитель слов текста для MATTR, MTLD и HD-D.
+
+    Слова подаются частями через update() и хранятся как array('I')
+    номеров (4 байта на слово): MTLD нужен ещё и обратный проход по тексту.
+
+    Attributes:
+        word_to_id (dict): Слово -> номер внутри текста
+        ids (array): Номера слов текста по порядку
+    """
+
+    def __init__(self, window=MATTR_WINDOW, threshold=MTLD_THRESHOLD, sample_size=HDD_SAMPLE_SIZE):
+        self.window = window
+        self.threshold = threshold
+        self.sample_size = sample_size
+        self.word_to_id = {}
+        self.ids = array('I')
+
+    def update(self, words):
+        """
+        Добавляет очередные слова текста.
+
+        Args:
+            words (iterable): Слова по порядку
+        """
+        word_to_id = self.word_to_id
+        ids = self.ids
+        for word in words:
+            word_id = word_to_id.get(word)
+            if word_id is None:
+                word_id = word_to_id[word] = len(word_to_id)
+            ids.append(word_id)
+
+    @property
+    def mattr(self):
+        """float: MATTR по окну self.window."""
+        return mattr(self.ids, self.window)
+
+    @property
+    def mtld(self):
+        """float: MTLD с порогом self.threshold."""
+        return mtld(self.ids, self.threshold)
+
+    @property
+    def hdd(self):
+        """float: HD-D для выборки из self.sample_size слов."""
+        return hdd(Counter(self.ids).values(), self.sample_size)
@@ -0,0 +1,345 @@
+import os
+import sys
+import ast
+import json
+import mmap
+import struct
+from array import array
+from collections import Counter
+from vocab_utils import Vocabulary
+from results_utils import COLUMN_TYPECODES
+
+# Двоичный постолбцовый экспорт результатов (results/columnar/) для
+# тетрадок и других программ: метрики по файлам, частоты слов корпуса и
+# частоты слов каждого файла — без разбора строк CSV.
+#
+# Формат 'npy' не требует зависимостей: каждый числовой столбец пишется
+# отдельным файлом .npy (заголовок NumPy и сырые байты array), имена файлов
+# и словарь — текстом, по одному на строку. Частоты по файлам хранятся как
+# разреженная матрица CSR «файл x слово» (tf_indptr, tf_indices, tf_counts —
+# можно передать прямо в scipy.sparse.csr_matrix). Файлы .npy открываются
+# через mmap без копирования: np.load(..., mmap_mode='r') или, без NumPy,
+# load_columnar (memoryview поверх mmap).
+#
+# Формат 'arrow' (если установлен pyarrow) пишет те же данные файлами
+# Arrow IPC, которые тоже читаются через mmap без копирования.
+# В manifest.json записаны формат, столбцы и размеры.
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - зависит от окружения
+    pa = None
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+COLUMNAR_VERSION = 1
+EXPORT_FORMATS = ('npy', 'arrow')
+NPY_MAGIC = b'\x93NUMPY'
+
+def _npy_descr(typecode):
+    """Описание типа NumPy ('<i8', '<f8', ...) для кода типа array."""
+    kind = 'f' if typecode in 'fd' else 'u' if typecode in 'BHILQ' else 'i'
+    order = '<' if sys.byteorder == 'little' else '>'
+    return f"{order}{kind}{array(typecode).itemsize}"
+
+def _typecode(descr):
+    """Код типа array для описания типа NumPy (обратное к _npy_descr)."""
+    kind, size = descr[1], int(descr[2:])
+    candidates = 'fd' if kind == 'f' else 'BHILQ' if kind == 'u' else 'bhilq'
+    for typecode in candidates:
+        if array(typecode).itemsize == size:
+            return typecode
+    raise ValueError(f"Неподдерживаемый тип столбца: {descr}")
+
+def write_npy(filepath, values):
+    """
+    Пишет одномерный array в файл формата NumPy .npy (версия 1.0).
+
+    Args:
+        filepath (str): Путь к файлу
+        values (array): Значения
+    """
+    header = repr({'descr': _npy_descr(values.typecode), 'fortran_order': False,
+                   'shape': (len(values),)})
+    # Заголовок дополняется пробелами так, чтобы данные начинались с границы 64 байт
+    padding = 64 - (len(NPY_MAGIC) + 4 + len(header) + 1) % 64
+    header = (header + ' ' * padding + '\n').encode('latin1')
+    with open(filepath, 'wb') as f:
+        f.write(NPY_MAGIC + b'\x01\x00' + struct.pack('<H', len(header)) + header)
+        values.tofile(f)
+
+def read_npy(filepath):
+    """
+    Открывает одномерный файл .npy через mmap без копирования данных.
+
+    Args:
+        filepath (str): Путь к файлу
+
+    Returns:
+        memoryview: Значения (индексация, срезы, len; память — страницы файла)
+    """
+    with open(filepath, 'rb') as f:
+        if f.read(len(NPY_MAGIC)) != NPY_MAGIC:
+            raise ValueError(f"Не файл .npy: {filepath}")
+        major = f.read(2)[0]
+        length_format = '<H' if major == 1 else '<I'
+        header_length, = struct.unpack(length_format, f.read(struct.calcsize(length_format)))
+        header = ast.literal_eval(f.read(header_length).decode('latin1'))
+        offset = f.tell()
+        typecode = _typecode(header['descr'])
+        little = header['descr'][0] in '<|'
+        if little != (sys.byteorder == 'little'):
+            # Порядок байт другой машины — без копии не обойтись
+            values = array(typecode)
+            values.frombytes(f.read())
+            values.byteswap()
+            return memoryview(values)
+        if os.fstat(f.fileno()).st_size == offset:
+            return memoryview(array(typecode))  # Пустой столбец: отображать нечего
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped)[offset:].cast(typecode)
+
+def build_term_frequencies(file_freqs, vocabulary):
+    """
+    Собирает частоты слов по файлам в разреженную матрицу CSR.
+
+    Слова нумеруются по убыванию частоты в корпусе (при равенстве —
+    по алфавиту), так что первые k слов словаря — топ-k корпуса.
+
+    Частоты корпуса — сумма строк матрицы, поэтому словарь и матрица всегда
+    согласованы (в том числе когда частоты корпуса в таблице посчитаны
+    приближённо или без вариантов, см. --approx-top и --dedup collapse).
+
+    Args:
+        file_freqs (list): Частоты слов каждого файла по порядку строк — пары
+                           (номера слов, частоты) из Vocabulary.encode_counts
+        vocabulary (Vocabulary): Словарь, в котором закодированы file_freqs
+
+    Returns:
+        tuple: (Vocabulary, array частот корпуса по номерам слов,
+                tf_indptr, tf_indices, tf_counts)
+    """
+    totals = array('q', bytes(8 * len(vocabulary)))
+    for ids, counts in file_freqs:
+        for word_id, count in zip(ids, counts):
+            totals[word_id] += count
+    id_to_word = vocabulary.id_to_word
+    ordered = sorted((word_id for word_id in range(len(totals)) if totals[word_id]),
+                     key=lambda word_id: (-totals[word_id], id_to_word[word_id]))
+    # Номер слова в общем словаре -> номер в экспортируемом словаре
+    new_ids = array('I', bytes(4 * len(totals)))
+    for new_id, word_id in enumerate(ordered):
+        new_ids[word_id] = new_id
+    corpus_counts = array('q', (totals[word_id] for word_id in ordered))
+    indptr = array('q', [0])
+    indices = array('I')
+    counts = array('I')
+    for ids, file_counts in file_freqs:
+        # Номера слов в строке по возрастанию, как принято в CSR
+        for word_id, count in sorted(zip(map(new_ids.__getitem__, ids), file_counts)):
+            indices.append(word_id)
+            counts.append(count)
+        indptr.append(len(indices))
+    return Vocabulary(id_to_word[word_id] for word_id in ordered), corpus_counts, indptr, indices, counts
+
+def export_columnar(table, file_freqs, vocabulary, folder=os.path.join('results', 'columnar'),
+                    export_format='auto'):
+    """
+    Экспортирует метрики по файлам и частоты слов в двоичный постолбцовый формат.
+
+    Args:
+        table (StatsTable): Метрики по файлам
+        file_freqs (list): Частоты слов каждого файла в порядке строк table —
+                           пары (номера слов, частоты) из Vocabulary.encode_counts
+        vocabulary (Vocabulary): Словарь, в котором закодированы file_freqs
+        folder (str): Папка экспорта
+        export_format (str): 'npy', 'arrow' или 'auto' (arrow, если установлен pyarrow)
+
+    Returns:
+        str: Использованный формат или None, если запись не удалась
+    """
+    if export_format == 'auto':
+        export_format = 'arrow' if pa is not None else 'npy'
+    if export_format == 'arrow' and pa is None:
+        print("⚠ pyarrow не установлен — экспорт в формате npy")
+        export_format = 'npy'
+    if len(file_freqs) != len(table):
+        raise ValueError(f"Частот слов {len(file_freqs)}, а строк в таблице {len(table)}")
+    vocabulary, corpus_counts, indptr, indices, counts = build_term_frequencies(file_freqs, vocabulary)
+    numeric = [name for name, column_type in table.schema.items() if column_type in COLUMN_TYPECODES]
+    manifest_path = os.path.join(folder, 'manifest.json')
+    try:
+        os.makedirs(folder, exist_ok=True)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)  # Пока экспорт не дописан, загружать его нельзя
+        if export_format == 'arrow':
+            _write_arrow(folder, table, numeric, vocabulary, corpus_counts, indptr, indices, counts)
+        else:
+            with open(os.path.join(folder, 'files.txt'), 'w', encoding='utf-8') as f:
+                for filename in table.column('filename'):
+                    f.write(filename + '\n')
+            for name in numeric:
+                write_npy(os.path.join(folder, f'{name}.npy'), table.column(name))
+            vocabulary.save(os.path.join(folder, 'vocabulary.txt'))
+            write_npy(os.path.join(folder, 'corpus_counts.npy'), corpus_counts)
+            write_npy(os.path.join(folder, 'tf_indptr.npy'), indptr)
+            write_npy(os.path.join(folder, 'tf_indices.npy'), indices)
+            write_npy(os.path.join(folder, 'tf_counts.npy'), counts)
+        # Манифест пишется последним: по нему загрузчик понимает, что экспорт завершён
+        manifest = {
+            'version': COLUMNAR_VERSION,
+            'format': export_format,
+            'files': len(table),
+            'columns': numeric,
+            'words': len(vocabulary),
+            'entries': len(indices),
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return export_format
+    except Exception as e:
+        print(f"Ошибка при экспорте в {folder}: {e}")
+        return None
+
+def _write_arrow(folder, table, numeric, vocabulary, corpus_counts, indptr, indices, counts):
+    """Пишет метрики, словарь и частоты по файлам файлами Arrow IPC."""
+    def write(filename, columns):
+        arrow_table = pa.table(columns)
+        with pa.OSFile(os.path.join(folder, filename), 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+
+    write('statistics.arrow', {'filename': pa.array(table.column('filename'), pa.string()),
+                               **{name: pa.array(table.column(name)) for name in numeric}})
+    write('vocabulary.arrow', {'word': pa.array(vocabulary.id_to_word, pa.string()),
+                               'count': pa.array(corpus_counts, pa.int64())})
+    file_ids = array('I')
+    for row in range(len(indptr) - 1):
+        file_ids.extend([row] * (indptr[row + 1] - indptr[row]))
+    write('term_frequencies.arrow', {'file_id': pa.array(file_ids, pa.uint32()),
+                                     'word_id': pa.array(indices, pa.uint32()),
+                                     'count': pa.array(counts, pa.uint32())})
+
+class ColumnarData:
+    """
+    Экспортированные результаты, открытые через mmap.
+
+    Attributes:
+        format (str): 'npy' или 'arrow'
+        filenames (list): Имена файлов по порядку строк
+        columns (dict): Столбец -> значения (memoryview или numpy.ndarray
+                        поверх отображённого в память файла)
+        vocabulary (Vocabulary): Словарь; номер слова — позиция в corpus_counts
+        corpus_counts: Частоты слов корпуса по номерам слов
+        tf_indptr, tf_indices, tf_counts: Частоты по файлам в формате CSR
+    """
+
+    def __init__(self, format, filenames, columns, vocabulary, corpus_counts,
+                 tf_indptr, tf_indices, tf_counts):
+        self.format = format
+        self.filenames = filenames
+        self.columns = columns
+        self.vocabulary = vocabulary
+        self.corpus_counts = corpus_counts
+        self.tf_indptr = tf_indptr
+        self.tf_indices = tf_indices
+        self.tf_counts = tf_counts
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def column(self, name):
+        """
+        Столбец метрик.
+
+        Args:
+            name (str): Имя столбца ('filename' — имена файлов)
+
+        Returns:
+            Значения столбца
+        """
+        return self.filenames if name == 'filename' else self.columns[name]
+
+    def most_common(self, n=5):
+        """
+        Топ слов корпуса (словарь уже упорядочен по убыванию частоты).
+
+        Args:
+            n (int): Количество слов
+
+        Returns:
+            list: Пары (слово, количество)
+        """
+        return [(word, int(self.corpus_counts[i]))
+                for i, word in enumerate(self.vocabulary.id_to_word[:n])]
+
+    def file_frequencies(self, index):
+        """
+        Частоты слов одного файла.
+
+        Args:
+            index (int): Номер строки (файла)
+
+        Returns:
+            Counter: Слово -> частота
+        """
+        start, end = int(self.tf_indptr[index]), int(self.tf_indptr[index + 1])
+        id_to_word = self.vocabulary.id_to_word
+        return Counter({id_to_word[int(word_id)]: int(count)
+                        for word_id, count in zip(self.tf_indices[start:end], self.tf_counts[start:end])})
+
+def load_columnar(folder=os.path.join('results', 'columnar'), use_numpy=None):
+    """
+    Открывает результаты, сохранённые export_columnar, без копирования данных.
+
+    Args:
+        folder (str): Папка экспорта
+        use_numpy (bool): Открывать .npy через numpy.load(mmap_mode='r');
+                          по умолчанию — если NumPy установлен
+
+    Returns:
+        ColumnarData: Открытые результаты
+    """
+    with open(os.path.join(folder, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != COLUMNAR_VERSION:
+        raise ValueError(f"Неподдерживаемая версия экспорта: {manifest.get('version')}")
+
+    if manifest['format'] == 'arrow':
+        if pa is None:
+            raise ImportError("Для чтения экспорта arrow нужен pyarrow: pip install pyarrow")
+
+        def read(filename):
+            return pa.ipc.open_file(pa.memory_map(os.path.join(folder, filename), 'r')).read_all()
+
+        def values(arrow_table, name):
+            # Столбец из одного блока без пропусков отдаётся NumPy без копирования
+            return arrow_table.column(name).combine_chunks().to_numpy(zero_copy_only=False)
+
+        statistics = read('statistics.arrow')
+        words = read('vocabulary.arrow')
+        frequencies = read('term_frequencies.arrow')
+        # Строки частот сгруппированы по файлам: границы групп — CSR-указатели
+        sizes = np.bincount(values(frequencies, 'file_id'), minlength=len(statistics))
+        indptr = np.concatenate(([0], np.cumsum(sizes)))
+        return ColumnarData('arrow', statistics.column('filename').to_pylist(),
+                            {name: values(statistics, name) for name in manifest['columns']},
+                            Vocabulary(words.column('word').to_pylist()), values(words, 'count'),
+                            indptr, values(frequencies, 'word_id'), values(frequencies, 'count'))
+
+    if use_numpy is None:
+        use_numpy = np is not None
+
+    def read(name):
+        filepath = os.path.join(folder, f'{name}.npy')
+        return np.load(filepath, mmap_mode='r') if use_numpy else read_npy(filepath)
+
+    with open(os.path.join(folder, 'files.txt'), 'r', encoding='utf-8') as f:
+        filenames = [line.rstrip('\n') for line in f]
+    return ColumnarData('npy', filenames, {name: read(name) for name in manifest['columns']},
+                        Vocabulary.load(os.path.join(folder, 'vocabulary.txt')), read('corpus_counts'),
+                        read('tf_indptr'), read('tf_indices'), read('tf_counts'))
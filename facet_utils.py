@@ -0,0 +1,416 @@
+import os
+import pickle
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Сводки корпуса в разрезе метаданных: по годам, по авторам и по периодам
+# (годы, сгруппированные по range_width лет).
+#
+# Для каждой группы хранятся уже сложенные итоги: число текстов, сумма слов,
+# объединённые частоты слов (из них — число уникальных слов и топ), а также
+# отсортированные значения TTR и других мер разнообразия (для среднего и
+# медианы). Когда файл добавляется или меняется, из его групп вычитается
+# старый вклад и прибавляется новый — остальной корпус не пересчитывается.
+# Запрос по группе (например, «1906 против 1907») только читает готовые итоги.
+
+FACETS_VERSION = 2
+FACET_METRICS = ('ttr_count', 'mattr_count', 'mtld_count', 'hdd_count')
+FACET_NAMES = ('year', 'author', 'years')
+
+class FacetGroup:
+    """
+    Итоги одной группы текстов (одного года, автора или периода).
+
+    Attributes:
+        files (int): Количество текстов
+        word_count (int): Сумма слов
+        word_freq (Counter): Объединённые частоты очищенных слов
+        values (dict): Метрика -> отсортированный список значений по текстам
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.word_count = 0
+        self.word_freq = Counter()
+        self.values = {metric: [] for metric in FACET_METRICS}
+        self._top = None  # Топ слов, запомненный до следующего изменения группы
+
+    def add(self, row, word_freq):
+        """
+        Добавляет вклад одного текста.
+
+        Args:
+            row (dict): Строка метрик (столбцы STATISTICS_SCHEMA)
+            word_freq (Counter): Частоты слов текста
+        """
+        self.files += 1
+        self.word_count += row.get('word_count', 0)
+        self.word_freq.update(word_freq)
+        for metric, values in self.values.items():
+            insort(values, row.get(metric, 0))
+        self._top = None
+
+    def remove(self, row, word_freq):
+        """
+        Вычитает вклад текста, добавленный раньше через add().
+
+        Args:
+            row (dict): Та же строка метрик, что была добавлена
+            word_freq (Counter): Те же частоты слов
+        """
+        self.files -= 1
+        self.word_count -= row.get('word_count', 0)
+        for word, count in word_freq.items():
+            left = self.word_freq[word] - count
+            if left > 0:
+                self.word_freq[word] = left
+            else:
+                del self.word_freq[word]
+        for metric, values in self.values.items():
+            index = bisect_left(values, row.get(metric, 0))
+            if index < len(values):
+                del values[index]
+        self._top = None
+
+    @property
+    def unique_count(self):
+        """int: Количество уникальных очищенных слов группы."""
+        return len(self.word_freq)
+
+    def mean(self, metric='ttr_count'):
+        """
+        Среднее значение метрики по текстам группы.
+
+        Args:
+            metric (str): Столбец из FACET_METRICS
+
+        Returns:
+            float: Среднее, округлённое до 3 знаков (0.0 для пустой группы)
+        """
+        values = self.values[metric]
+        return round(sum(values) / len(values), 3) if values else 0.0
+
+    def median(self, metric='ttr_count'):
+        """
+        Медиана метрики по текстам группы (значения уже отсортированы).
+
+        Args:
+            metric (str): Столбец из FACET_METRICS
+
+        Returns:
+            float: Медиана, округлённая до 3 знаков (0.0 для пустой группы)
+        """
+        values = self.values[metric]
+        if not values:
+            return 0.0
+        middle = len(values) // 2
+        if len(values) % 2:
+            return round(values[middle], 3)
+        return round((values[middle - 1] + values[middle]) / 2, 3)
+
+    def most_common(self, n=5):
+        """
+        Топ слов группы. Слова с одинаковой частотой идут по алфавиту, чтобы
+        топ не зависел от порядка, в котором файлы добавлялись в группу.
+
+        Args:
+            n (int): Количество слов в топе
+
+        Returns:
+            list: Пары (слово, количество)
+        """
+        if self._top is None or len(self._top) < n:
+            self._top = heapq.nsmallest(n, self.word_freq.items(), key=lambda item: (-item[1], item[0]))
+        return self._top[:n]
+
+    def merge(self, other):
+        """
+        Объединяет итоги двух групп в новую группу (например, несколько лет).
+
+        Args:
+            other (FacetGroup): Другая группа
+
+        Returns:
+            FacetGroup: Новая группа
+        """
+        merged = FacetGroup()
+        merged._absorb(self)
+        merged._absorb(other)
+        merged._sort_values()
+        return merged
+
+    def _absorb(self, other):
+        """Прибавляет итоги другой группы на месте; значения метрик потом сортируются _sort_values."""
+        self.files += other.files
+        self.word_count += other.word_count
+        self.word_freq.update(other.word_freq)
+        for metric, values in other.values.items():
+            self.values[metric].extend(values)
+        self._top = None
+
+    def _sort_values(self):
+        """Сортирует значения метрик после _absorb."""
+        for values in self.values.values():
+            values.sort()
+
+    def as_dict(self, top=5):
+        """
+        Итоги группы одним словарём (для вывода и отчёта).
+
+        Args:
+            top (int): Сколько частых слов включить
+
+        Returns:
+            dict: files, word_count, unique_count, ttr_mean, ttr_median, mtld_mean, top_words
+        """
+        return {
+            'files': self.files,
+            'word_count': self.word_count,
+            'unique_count': self.unique_count,
+            'ttr_mean': self.mean('ttr_count'),
+            'ttr_median': self.median('ttr_count'),
+            'mtld_mean': self.mean('mtld_count'),
+            'top_words': self.most_common(top),
+        }
+
+def describe_group(key, group, top=3):
+    """
+    Строка с итогами группы для вывода и отчёта.
+
+    Args:
+        key: Значение разреза (год, автор, период)
+        group (FacetGroup): Итоги группы
+        top (int): Сколько частых слов показать
+
+    Returns:
+        str: Описание группы
+    """
+    words = ', '.join(word for word, _ in group.most_common(top))
+    return (f"{key}: текстов {group.files}, слов {group.word_count}, "
+            f"уникальных слов {group.unique_count}, TTR {group.mean()} (медиана {group.median()}), "
+            f"MTLD {group.mean('mtld_count')}, частые слова: {words}")
+
+def _sort_key(key):
+    """Годы-числа — по возрастанию, затем строковые значения по алфавиту."""
+    return (not isinstance(key, int), key if isinstance(key, int) else 0, str(key))
+
+class FacetIndex:
+    """
+    Итоги корпуса по годам, авторам и периодам с пошаговым обновлением.
+
+    Attributes:
+        range_width (int): Ширина периода в годах (1905-1909 при ширине 5)
+        stem (bool): Посчитаны ли частоты по основам слов
+        files (dict): Имя файла -> (строка метрик, метаданные, частоты слов)
+        facets (dict): 'year' | 'author' | 'years' -> {значение: FacetGroup}
+    """
+
+    def __init__(self, range_width=5, stem=False):
+        self.version = FACETS_VERSION
+        self.range_width = range_width
+        self.stem = stem
+        self.files = {}
+        self.facets = {name: {} for name in FACET_NAMES}
+
+    def __len__(self):
+        return len(self.files)
+
+    def facet_keys(self, meta):
+        """
+        Группы, в которые попадает текст с такими метаданными.
+
+        Args:
+            meta (dict): Строка metadata.csv (может быть пустой)
+
+        Returns:
+            dict: Имя разреза -> значение
+        """
+        keys = {'author': meta.get('author') or 'Неизвестен'}
+        year = meta.get('year')
+        if year not in (None, ''):
+            keys['year'] = year
+            if isinstance(year, int):
+                start = year - year % self.range_width
+                keys['years'] = f"{start}-{start + self.range_width - 1}"
+        return keys
+
+    def add_file(self, filename, row, word_freq, meta=None):
+        """
+        Добавляет файл или обновляет уже добавленный (старый вклад вычитается).
+
+        Args:
+            filename (str): Имя файла
+            row (dict): Строка метрик
+            word_freq (Counter): Частоты слов файла
+            meta (dict): Метаданные файла
+        """
+        if filename in self.files:
+            self.remove_file(filename)
+        meta = meta or {}
+        for facet, key in self.facet_keys(meta).items():
+            self.facets[facet].setdefault(key, FacetGroup()).add(row, word_freq)
+        self.files[filename] = (row, meta, Counter(word_freq))
+
+    def remove_file(self, filename):
+        """
+        Убирает вклад файла из всех групп.
+
+        Args:
+            filename (str): Имя файла
+        """
+        row, meta, word_freq = self.files.pop(filename)
+        for facet, key in self.facet_keys(meta).items():
+            group = self.facets[facet][key]
+            group.remove(row, word_freq)
+            if group.files == 0:
+                del self.facets[facet][key]
+
+    def sync_file(self, filename, row, word_freq, meta=None, changed=True):
+        """
+        Обновляет вклад одного файла, если он изменился (или ещё не добавлен).
+        Так итоги обновляются по мере анализа, без частот всех файлов сразу.
+
+        Args:
+            filename (str): Имя файла
+            row (dict): Строка метрик
+            word_freq (Counter): Частоты слов файла
+            meta (dict): Метаданные файла
+            changed (bool): Файл проанализирован заново
+
+        Returns:
+            bool: True, если вклад файла обновлён
+        """
+        meta = meta or {}
+        stored = self.files.get(filename)
+        if changed or stored is None or stored[0] != row or stored[1] != meta:
+            self.add_file(filename, row, word_freq, meta)
+            return True
+        return False
+
+    def prune(self, filenames):
+        """
+        Убирает файлы, которых больше нет в корпусе (или которые не должны
+        входить в итоги, например исключённые варианты текстов).
+
+        Args:
+            filenames (set): Имена файлов, которые остаются
+
+        Returns:
+            int: Сколько файлов убрано
+        """
+        removed = [filename for filename in self.files if filename not in filenames]
+        for filename in removed:
+            self.remove_file(filename)
+        return len(removed)
+
+    def sync(self, file_results, metadata_map, changed):
+        """
+        Приводит итоги в соответствие с текущим корпусом: добавляет новые и
+        изменившиеся файлы, убирает удалённые. Остальные файлы не трогаются.
+
+        Args:
+            file_results (dict): Имя файла -> (строка метрик, частоты слов)
+            metadata_map (dict): Имя файла -> метаданные
+            changed (set): Имена файлов, проанализированных заново
+
+        Returns:
+            tuple: (сколько файлов обновлено, сколько удалено)
+        """
+        removed = self.prune(file_results)
+        updated = 0
+        for filename, (row, word_freq) in file_results.items():
+            updated += self.sync_file(filename, row, word_freq, metadata_map.get(filename, {}),
+                                      filename in changed)
+        return updated, removed
+
+    def groups(self, facet):
+        """
+        Группы разреза по порядку значений.
+
+        Args:
+            facet (str): 'year', 'author' или 'years'
+
+        Returns:
+            list: Пары (значение, FacetGroup)
+        """
+        return sorted(self.facets[facet].items(), key=lambda item: _sort_key(item[0]))
+
+    def group(self, facet, key):
+        """
+        Группа разреза по значению.
+
+        Args:
+            facet (str): 'year', 'author' или 'years'
+            key: Значение (год, автор, период; период можно записать и через тире)
+
+        Returns:
+            FacetGroup: Группа или None, если текстов с таким значением нет
+        """
+        if facet == 'years' and isinstance(key, str):
+            key = key.replace('–', '-')
+        return self.facets[facet].get(key)
+
+    def query_years(self, start, end):
+        """
+        Итоги за произвольный диапазон лет — из уже сложенных итогов по годам.
+
+        Args:
+            start (int): Первый год
+            end (int): Последний год (включительно)
+
+        Returns:
+            FacetGroup: Объединённые итоги
+        """
+        # Итоги лет складываются в одну группу на месте, значения сортируются один раз
+        result = FacetGroup()
+        for year, group in self.facets['year'].items():
+            if isinstance(year, int) and start <= year <= end:
+                result._absorb(group)
+        result._sort_values()
+        return result
+
+def save_facets(facets, filepath):
+    """
+    Сохраняет итоги на диск (pickle), чтобы следующий запуск обновил их пошагово.
+
+    Args:
+        facets (FacetIndex): Итоги
+        filepath (str): Путь к файлу
+
+    Returns:
+        bool: True, если запись прошла успешно, иначе False
+    """
+    folder = os.path.dirname(filepath)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    try:
+        with open(filepath, 'wb') as f:
+            pickle.dump(facets, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return True
+    except Exception as e:
+        print(f"Ошибка при записи итогов по метаданным {filepath}: {e}")
+        return False
+
+def load_facets(filepath, stem=None):
+    """
+    Загружает итоги, сохранённые save_facets.
+
+    Args:
+        filepath (str): Путь к файлу
+        stem (bool): Нужны ли итоги по основам слов (None — любые)
+
+    Returns:
+        FacetIndex: Итоги или None, если файла нет, он повреждён или устарел
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            facets = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠ Итоги по метаданным {filepath} повреждены и будут пересчитаны: {e}")
+        return None
+    if getattr(facets, 'version', None) != FACETS_VERSION or stem is not None and facets.stem != stem:
+        return None
+    return facets
@@ -1,4 +1,11 @@
+import io
 import os # доступ к работе с операционной системой
+import csv
+import mmap
+import codecs
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 
 def read_text_file(filepath):
     """
@@ -18,80 +25,308 @@ def read_text_file(filepath):
         return "Ошибка: Файл не найден"
     except UnicodeDecodeError:
         return "Ошибка: Неверная кодировка файла"
-    
-def read_csv_file(filepath):
+
+def split_chunks_at_whitespace(blocks):
+    """
+    Перекраивает последовательность кусков текста так, чтобы каждый
+    кусок заканчивался на пробельном символе и слова не разрезались.
+
+    Args:
+        blocks (iterable): Куски текста произвольной длины
+
+    Yields:
+        str: Куски, разрезанные по пробельным символам
+    """
+    tail = ''  # Недочитанное слово с конца предыдущего куска
+    for block in blocks:
+        if not block:
+            continue
+        block = tail + block
+        # Ищем последний пробельный символ, чтобы не разрезать слово
+        cut = len(block)
+        while cut > 0 and not block[cut - 1].isspace():
+            cut -= 1
+        if cut == 0:  # Во всём куске нет ни одного пробела
+            tail = block
+            continue
+        yield block[:cut]
+        tail = block[cut:]
+    if tail:
+        yield tail
+
+def read_text_chunks(filepath, chunk_size=1024 * 1024, use_mmap=False):
+    """
+    Читает текстовый файл по частям, не загружая его в память целиком.
+
+    Каждая часть заканчивается на пробельном символе, поэтому слово
+    никогда не разрезается между двумя частями.
+
+    Args:
+        filepath (str): Путь к файлу
+        chunk_size (int): Примерный размер части в символах (по умолчанию 1 МБ)
+        use_mmap (bool): Отображать файл в память (mmap) вместо обычного чтения
+
+    Yields:
+        str: Очередная часть текста
+    """
+    try:
+        if use_mmap:
+            yield from split_chunks_at_whitespace(iter_mmap_blocks(filepath, chunk_size))
+            return
+        with open(filepath, 'r', encoding='utf-8') as f:
+            yield from split_chunks_at_whitespace(iter(lambda: f.read(chunk_size), ''))
+    except FileNotFoundError:
+        print(f"Ошибка: файл {filepath} не найден")
+    except UnicodeDecodeError:
+        print(f"Ошибка: неверная кодировка файла {filepath}")
+
+def make_text_decoder():
+    """
+    Инкрементальный декодер UTF-8, который, как open() в текстовом режиме,
+    переводит концы строк \r\n и \r в \n — даже когда \r\n разрезан
+    границей блока. Так количество строк не зависит от способа чтения файла.
+
+    Returns:
+        io.IncrementalNewlineDecoder: Декодер с методом decode(data, final=False)
+    """
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+
+def iter_mmap_blocks(filepath, block_size=1024 * 1024):
+    """
+    Отображает файл в память и декодирует его из UTF-8 блоками.
+
+    Байты не копируются в отдельную строку целиком: декодер получает
+    срезы memoryview над mmap. Инкрементальный декодер сам доклеивает
+    многобайтовые символы, разрезанные границей блока, и переводит концы
+    строк в \n (make_text_decoder).
+
+    Args:
+        filepath (str): Путь к файлу
+        block_size (int): Размер блока в байтах
+
+    Yields:
+        str: Декодированный блок текста
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # Пустой файл нельзя отобразить в память
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decoder = make_text_decoder()
+            view = memoryview(mm)
+            try:
+                for start in range(0, len(view), block_size):
+                    yield decoder.decode(view[start:start + block_size])
+                yield decoder.decode(b'', final=True)
+            finally:
+                view.release()  # Иначе mmap нельзя закрыть
+
+# Схемы CSV-файлов проекта: столбец -> тип значения.
+# Строка разбирается и приводится к типам один раз, при чтении.
+STATISTICS_SCHEMA = {
+    'filename': str,
+    'word_count': int,
+    'words_ucount': int,
+    'lines_count': int,
+    'ttr_count': float,
+    'mattr_count': float,
+    'mtld_count': float,
+    'hdd_count': float,
+}
+
+METADATA_SCHEMA = {
+    'filename': str,
+    'title': str,
+    'author': str,
+    'year': int,
+}
+
+def parse_csv_row(row, schema):
+    """
+    Приводит значения строки CSV к типам из схемы.
+
+    Пустые и отсутствующие значения заменяются значением по умолчанию
+    для типа (0, 0.0 или ''). Столбцы, которых нет в схеме, остаются строками.
+
+    Args:
+        row (dict): Строка из csv.DictReader
+        schema (dict): Столбец -> тип (int, float, str)
+
+    Returns:
+        dict: Строка с типизированными значениями
+    """
+    parsed = dict(row)
+    for column, column_type in schema.items():
+        value = row.get(column)
+        if value is None or value == '':
+            parsed[column] = column_type()
+        else:
+            try:
+                parsed[column] = column_type(value)
+            except ValueError:
+                parsed[column] = value  # Оставляем как есть, например год "1905-1906"
+    return parsed
+
+def iter_csv_rows(filepath, schema=None):
+    """
+    Построчно читает CSV-файл, не загружая его в память целиком.
+
+    Args:
+        filepath (str): Путь к CSV-файлу
+        schema (dict): Столбец -> тип; если не задана, все значения — строки
+
+    Yields:
+        dict: Очередная строка (заголовок -> значение)
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            if schema is None:
+                yield from reader
+            else:
+                for row in reader:
+                    yield parse_csv_row(row, schema)
+    except FileNotFoundError:
+        print(f"Ошибка: файл {filepath} не найден")
+
+def read_csv_file(filepath, schema=None):
     """
     Читает содержимое CSV-файла и возвращает список словарей.
 
     Args:
         filepath (str): Путь к CSV-файлу
+        schema (dict): Столбец -> тип; если не задана, все значения — строки
 
     Returns:
         list: Список словарей с данными
     """
-    data = []
     try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            lines = file.readlines() # Возвращает список строк, где каждая строка — элемент списка
-            if not lines:
-                return data
-            headers = lines[0].strip().split(',')
-            for line in lines[1:]:
-                values = line.strip().split(',')
-                row = {}
-                for i in range(len(values)):
-                    row[headers[i]] = values[i] 
-                data.append(row)
-                   # - headers[i] берет i-й элемент из списка заголовков (ключ для словаря)
-    # - values[i] берет i-й элемент из списка значений (значение для словаря)
-    # - Результат: создается пара ключ-значение в словаре row
-        return data
-    except FileNotFoundError:
-        print(f"Ошибка: файл {filepath} не найден")
-        return data
+        return list(iter_csv_rows(filepath, schema))
     except Exception as e:
         print(f"Ошибка при чтении {filepath}: {e}")
-        return data
+        return []
     
-def write_csv_file(filepath, headers, data):
+def write_csv_file(filepath, headers, data, batch_size=1000):
     """
     Записывает данные в CSV-файл.
 
+    Значения с запятыми и кавычками экранируются модулем csv.
+    Строки записываются пачками по batch_size через writerows,
+    поэтому data может быть и генератором.
+
     Args:
         filepath (str): Путь к результатному CSV-файлу
         headers (list): Список заголовков столбцов
-        data (list): Список строк данных
+        data (iterable): Строки данных
+        batch_size (int): Сколько строк записывать за один вызов writerows
     """
     folder = os.path.dirname(filepath)
     # Извлекает путь к директории (папке) из полного пути к файлу
 # и сохраняет его в переменную 'folder'
-    os.makedirs(folder, exist_ok=True)  # Создаём папку, если её нет; Если True: не вызывает ошибку, если директория уже существует
+    if folder:
+        os.makedirs(folder, exist_ok=True)  # Создаём папку, если её нет; Если True: не вызывает ошибку, если директория уже существует
     try:
-        with open(filepath, 'w', encoding='utf-8') as file:
-            file.write(','.join(headers) + '\n') # Записывает заголовки в файл в формате CSV (значения, разделенные запятыми)
+        with open(filepath, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(headers)
+            batch = []
             for row in data:
-                file.write(','.join(str(v) for v in row) + '\n') # Для каждого элемента v в текущей строке row преобразует его в строку
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    writer.writerows(batch)
+                    batch = []
+            writer.writerows(batch)
         return True
     except Exception as e:
         print(f"Ошибка при записи {filepath}: {e}")
         return False
     
-def get_files_in_folder(folder_path, extension):
+def iter_files(folder_path, extension, recursive=True):
+    """
+    Перебирает файлы с указанным расширением через os.scandir.
+
+    Тип записи (файл или папка) берётся из DirEntry, который заполняется
+    при чтении каталога, поэтому на каждый файл не нужен отдельный вызов
+    stat — на сетевых дисках (NFS) это главная часть времени обхода.
+    Символические ссылки на папки не обходятся, чтобы не попасть в цикл.
+
+    Args:
+        folder_path (str): Путь к папке
+        extension (str): Например, '.txt' ('' — любые файлы)
+        recursive (bool): Заходить ли во вложенные папки
+
+    Yields:
+        str: Путь к файлу относительно folder_path (для файлов верхнего уровня — просто имя)
+    """
+    folders = ['']
+    while folders:
+        prefix = folders.pop()
+        with os.scandir(os.path.join(folder_path, prefix)) as entries:
+            for entry in entries:
+                name = os.path.join(prefix, entry.name) if prefix else entry.name
+                if entry.is_file() and entry.name.endswith(extension):
+                    yield name
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    folders.append(name)
+
+def get_files_in_folder(folder_path, extension, recursive=False):
     """
     Возвращает список файлов с указанным расширением из папки.
 
     Args:
         folder_path (str): Путь к папке
         extension (str): Например, '.txt'
+        recursive (bool): Искать ли во вложенных папках
 
     Returns:
-        list: Список имён файлов
+        list: Список имён файлов (для вложенных папок — путей относительно folder_path)
+    """
+    return list(iter_files(folder_path, extension, recursive))
+
+def _read_small_text(filepath, max_size):
+    """Читает файл целиком, если он не больше max_size байт, иначе возвращает None."""
+    try:
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > max_size:
+                return None
+            data = f.read()
+        return make_text_decoder().decode(data, final=True)  # Концы строк — как при open()
+    except FileNotFoundError:
+        print(f"Ошибка: файл {filepath} не найден")
+    except UnicodeDecodeError:
+        print(f"Ошибка: неверная кодировка файла {filepath}")
+    return ''
+
+def prefetch_text_files(filepaths, max_size=1024 * 1024, workers=4, depth=None):
+    """
+    Читает файлы заранее в пуле потоков, пока вызывающий код обрабатывает
+    предыдущие: ожидание диска перекрывается с разбором текста.
+
+    Вперёд читается не больше depth файлов, поэтому память ограничена.
+    Файлы больше max_size не читаются — для них возвращается None, и их
+    нужно читать по частям (read_text_chunks), чтобы не держать целиком в памяти.
+
+    Args:
+        filepaths (iterable): Пути к файлам
+        max_size (int): Наибольший размер файла в байтах, который читается заранее
+        workers (int): Количество потоков чтения
+        depth (int): Сколько файлов читать вперёд (по умолчанию workers * 2)
+
+    Yields:
+        tuple: (путь к файлу, текст или None) в порядке filepaths;
+               при ошибке чтения текст пустой
     """
-    files = []
-    for filename in os.listdir(folder_path): # os.listdir возвращает список имен всех файлов и поддиректорий в этой директории
-        if filename.endswith(extension) and os.path.isfile(os.path.join(folder_path, filename)): # Объединяет путь к папке и имя файла в полный путь; # Функция проверяет, существует ли путь и является ли он обычным файлом
-            files.append(filename)
-    return files
+    depth = depth or workers * 2
+    paths = iter(filepaths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for filepath in islice(paths, depth):
+            pending.append((filepath, executor.submit(_read_small_text, filepath, max_size)))
+        while pending:
+            filepath, future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(_read_small_text, next_path, max_size)))
+            yield filepath, future.result()
 
 def write_text_file(filepath, text):
     """
@@ -116,26 +351,17 @@ def write_text_file(filepath, text):
         print(f"Ошибка при записи файла {filepath}: {e}")
         return False
     
-def count_texts(filepath):
+def count_texts(filepath, recursive=False):
     """
     Считает количество файлов формата .txt в заданной папке
 
     Args:
         filepath (str): путь к папке.
+        recursive (bool): считать ли файлы во вложенных папках.
 
     Returns: 
         int: количество файлов в заданной папке.
         
     """
-    count = 0
-    for filename in os.listdir(filepath):
-        # Полный путь к файлу
-        filepath = os.path.join(filepath, filename)
-        # Проверяем, что это файл и имеет расширение .txt
-        if os.path.isfile(filepath) and filename.lower().endswith('.txt'):
-            count += 1
-    
-    return count
-
-
-
+    # Расширение проверяем без учёта регистра: подходят и .TXT
+    return sum(1 for filename in iter_files(filepath, '', recursive) if filename.lower().endswith('.txt'))
@@ -0,0 +1,296 @@
+import os
+import pickle
+from array import array
+from file_utils import get_files_in_folder, read_text_file, read_csv_file, METADATA_SCHEMA
+from text_utils import tokenize, TOKEN_PATTERN
+from vocab_utils import Vocabulary, encode_text
+
+# Обратный индекс корпуса: для каждого слова хранится список вхождений
+# (номер файла, номер строки, номер слова в файле). Вхождения лежат
+# в array('I') плоскими тройками и закодированы разностями (дельтами):
+# номер файла — относительно предыдущего вхождения, а строка и позиция —
+# относительно предыдущего вхождения в том же файле. Числа получаются
+# маленькими, и весь индекс занимает немного места на диске.
+# Слова хранятся номерами из общего словаря (vocab_utils.Vocabulary):
+# списки вхождений лежат в списке по номеру слова.
+
+INDEX_VERSION = 3
+
+def file_signatures(corpus_folder, files):
+    """
+    Время изменения и размер каждого файла — по ним видно, что индекс устарел.
+
+    Args:
+        corpus_folder (str): Папка с текстами
+        files (list): Имена файлов
+
+    Returns:
+        list: Пары (mtime_ns, size) в порядке files
+    """
+    signatures = []
+    for filename in files:
+        stat = os.stat(os.path.join(corpus_folder, filename))
+        signatures.append((stat.st_mtime_ns, stat.st_size))
+    return signatures
+
+def encode_postings(postings):
+    """
+    Кодирует список вхождений разностями.
+
+    Args:
+        postings (list): Тройки (doc_id, line, pos), отсортированные по doc_id и pos
+
+    Returns:
+        array: Плоский массив закодированных троек
+    """
+    encoded = array('I')
+    prev_doc, prev_line, prev_pos = 0, 0, 0
+    for doc_id, line, pos in postings:
+        if doc_id != prev_doc:
+            prev_line, prev_pos = 0, 0  # В новом файле считаем строки и позиции заново
+        encoded.extend((doc_id - prev_doc, line - prev_line, pos - prev_pos))
+        prev_doc, prev_line, prev_pos = doc_id, line, pos
+    return encoded
+
+def decode_postings(encoded):
+    """
+    Восстанавливает список вхождений из разностей.
+
+    Args:
+        encoded (array): Результат encode_postings
+
+    Returns:
+        list: Тройки (doc_id, line, pos)
+    """
+    postings = []
+    doc_id, line, pos = 0, 0, 0
+    for i in range(0, len(encoded), 3):
+        doc_delta = encoded[i]
+        if doc_delta:
+            line, pos = 0, 0
+        doc_id += doc_delta
+        line += encoded[i + 1]
+        pos += encoded[i + 2]
+        postings.append((doc_id, line, pos))
+    return postings
+
+class CorpusIndex:
+    """
+    Обратный индекс корпуса с поиском слов, фраз и конкордансом (KWIC).
+
+    Attributes:
+        corpus_folder (str): Папка с текстами
+        files (list): Имена файлов, номер файла — индекс в этом списке
+        metadata (list): Словари {'title', 'author', 'year'} для каждого файла
+        vocabulary (Vocabulary): Словарь «слово -> номер»
+        postings (list): Номер слова -> закодированный массив вхождений
+        line_starts (list): Для каждого файла — array с номером первого слова каждой строки
+        signatures (list): (mtime_ns, size) каждого файла на момент построения индекса
+    """
+
+    def __init__(self, corpus_folder, files, metadata, vocabulary, postings, line_starts,
+                 signatures=None):
+        self.corpus_folder = corpus_folder
+        self.files = files
+        self.metadata = metadata
+        self.vocabulary = vocabulary
+        self.postings = postings
+        self.line_starts = line_starts
+        self.signatures = signatures
+        self._lines_cache = {}
+
+    def is_current(self):
+        """
+        Проверяет, что с момента построения индекса файлы корпуса не менялись,
+        не добавлялись и не удалялись.
+
+        Returns:
+            bool: True, если индекс соответствует папке корпуса
+        """
+        try:
+            files = sorted(get_files_in_folder(self.corpus_folder, '.txt'))
+            return files == self.files and file_signatures(self.corpus_folder, files) == self.signatures
+        except OSError:
+            return False
+
+    def lookup(self, term):
+        """
+        Ищет все вхождения слова.
+
+        Args:
+            term (str): Слово (регистр не важен)
+
+        Returns:
+            list: Тройки (filename, line, pos); line считается с 1
+        """
+        tokens = tokenize(term, remove_stopwords=False)
+        if len(tokens) != 1 or tokens[0] not in self.vocabulary:
+            return []
+        term_id = self.vocabulary.get_id(tokens[0])
+        return [(self.files[doc_id], line, pos)
+                for doc_id, line, pos in decode_postings(self.postings[term_id])]
+
+    def phrase_search(self, phrase):
+        """
+        Ищет фразу — слова, идущие подряд.
+
+        Args:
+            phrase (str): Фраза из одного или нескольких слов
+
+        Returns:
+            list: Тройки (filename, line, pos) для первого слова фразы
+        """
+        tokens = tokenize(phrase, remove_stopwords=False)
+        if not tokens or any(token not in self.vocabulary for token in tokens):
+            return []
+        term_ids = [self.vocabulary.get_id(token) for token in tokens]
+        # Позиции остальных слов фразы по файлам, чтобы проверять их за O(1)
+        following = []
+        for term_id in term_ids[1:]:
+            positions = set()
+            for doc_id, _, pos in decode_postings(self.postings[term_id]):
+                positions.add((doc_id, pos))
+            following.append(positions)
+        hits = []
+        for doc_id, line, pos in decode_postings(self.postings[term_ids[0]]):
+            if all((doc_id, pos + shift) in positions
+                   for shift, positions in enumerate(following, start=1)):
+                hits.append((self.files[doc_id], line, pos))
+        return hits
+
+    def concordance(self, query, width=40):
+        """
+        Строит строки конкорданса (keyword in context) для слова или фразы.
+
+        Args:
+            query (str): Слово или фраза
+            width (int): Сколько символов контекста показывать слева и справа
+
+        Returns:
+            list: Словари с ключами filename, title, year, line, left, keyword, right
+        """
+        query_length = len(tokenize(query, remove_stopwords=False))
+        doc_ids = {filename: doc_id for doc_id, filename in enumerate(self.files)}
+        results = []
+        for filename, line, pos in self.phrase_search(query):
+            doc_id = doc_ids[filename]
+            line_text = self._get_lines(doc_id)[line - 1]
+            # Номер слова внутри строки -> положение символов в исходной строке
+            first_word = pos - self.line_starts[doc_id][line - 1]
+            spans = [match.span() for match in TOKEN_PATTERN.finditer(line_text.lower())]
+            start = spans[first_word][0]
+            end = spans[first_word + query_length - 1][1]
+            meta = self.metadata[doc_id]
+            results.append({
+                'filename': filename,
+                'title': meta.get('title', 'Неизвестно'),
+                'year': meta.get('year', 'N/A'),
+                'line': line,
+                'left': line_text[:start][-width:],
+                'keyword': line_text[start:end],
+                'right': line_text[end:][:width],
+            })
+        return results
+
+    def _get_lines(self, doc_id):
+        """Читает строки файла (один раз на файл)."""
+        if doc_id not in self._lines_cache:
+            text = read_text_file(os.path.join(self.corpus_folder, self.files[doc_id]))
+            self._lines_cache[doc_id] = text.split('\n')
+        return self._lines_cache[doc_id]
+
+def build_index(corpus_folder, metadata_path='data/metadata.csv'):
+    """
+    Строит обратный индекс по всем текстам папки.
+
+    Слова выделяются той же функцией tokenize, что и в остальном анализе,
+    но стоп-слова сохраняются, чтобы по ним работал поиск фраз.
+
+    Args:
+        corpus_folder (str): Путь к папке с текстами
+        metadata_path (str): Путь к metadata.csv (названия и годы текстов)
+
+    Returns:
+        CorpusIndex: Построенный индекс
+    """
+    files = sorted(get_files_in_folder(corpus_folder, '.txt'))
+    # Подписи снимаются до чтения: если файл изменят во время построения, индекс сочтут устаревшим
+    signatures = file_signatures(corpus_folder, files)
+    metadata_map = {row['filename']: row for row in read_csv_file(metadata_path, METADATA_SCHEMA) if 'filename' in row}
+    vocabulary = Vocabulary()
+    raw_postings = []  # Номер слова -> список вхождений
+    line_starts = []
+    for doc_id, filename in enumerate(files):
+        text = read_text_file(os.path.join(corpus_folder, filename))
+        starts = array('I')
+        pos = 0
+        for line_number, line in enumerate(text.split('\n'), start=1):
+            starts.append(pos)
+            for term_id in encode_text(line, vocabulary, remove_stopwords=False):
+                if term_id == len(raw_postings):
+                    raw_postings.append([])  # Слово встретилось впервые
+                raw_postings[term_id].append((doc_id, line_number, pos))
+                pos += 1
+        line_starts.append(starts)
+    postings = [encode_postings(term_postings) for term_postings in raw_postings]
+    metadata = [metadata_map.get(filename, {}) for filename in files]
+    return CorpusIndex(corpus_folder, files, metadata, vocabulary, postings, line_starts, signatures)
+
+def save_index(index, filepath):
+    """
+    Сохраняет индекс на диск.
+
+    Args:
+        index (CorpusIndex): Индекс
+        filepath (str): Путь к файлу индекса
+
+    Returns:
+        bool: True, если запись прошла успешно, иначе False
+    """
+    folder = os.path.dirname(filepath)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    data = {
+        'version': INDEX_VERSION,
+        'corpus_folder': index.corpus_folder,
+        'files': index.files,
+        'metadata': index.metadata,
+        'vocabulary': index.vocabulary.id_to_word,
+        'postings': index.postings,
+        'line_starts': index.line_starts,
+        'signatures': index.signatures,
+    }
+    try:
+        with open(filepath, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return True
+    except Exception as e:
+        print(f"Ошибка при записи индекса {filepath}: {e}")
+        return False
+
+def load_index(filepath):
+    """
+    Загружает индекс, сохранённый save_index.
+    Файл индекса должен быть создан этим проектом (pickle не для чужих файлов).
+
+    Args:
+        filepath (str): Путь к файлу индекса
+
+    Returns:
+        CorpusIndex: Индекс или None, если файл не найден или устарел
+                     (другая версия или тексты корпуса изменились после построения)
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    if data.get('version') != INDEX_VERSION:
+        return None
+    index = CorpusIndex(data['corpus_folder'], data['files'], data['metadata'],
+                        Vocabulary(data['vocabulary']), data['postings'], data['line_starts'],
+                        data['signatures'])
+    # Позиции слов в индексе верны только для тех текстов, по которым он построен
+    if not index.is_current():
+        return None
+    return index
@@ -1,169 +1,751 @@
+import io
 import os
-import csv
-from file_utils import get_files_in_folder, read_text_file, write_csv_file, read_csv_file
-from text_utils import count_words, count_unique_words, count_lines, get_most_common_words, calculate_ttr
-
-def analyze_text_file(filepath):
+import argparse
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from file_utils import (get_files_in_folder, read_text_chunks, prefetch_text_files, iter_csv_rows,
+                        METADATA_SCHEMA)
+from text_utils import TextStats
+from vocab_utils import Vocabulary
+from results_utils import StatsTable
+from index_utils import build_index, save_index, load_index
+from sketch_utils import make_top_sketch
+from ngram_utils import CorpusNgrams
+from diversity_utils import MATTR_WINDOW
+from stem_utils import make_stemmer, STEM_CACHE_SIZE
+from facet_utils import FacetIndex, FACET_NAMES, load_facets, save_facets, describe_group
+from export_utils import export_columnar, load_columnar, EXPORT_FORMATS
+from dedup_utils import find_near_duplicates, DEDUP_MODES, DEDUP_THRESHOLD
+from daemon_utils import (CorpusModel, CorpusWatcher, DebouncedWriter, start_server, DEFAULT_HOST,
+                          DEFAULT_PORT, WATCH_INTERVAL, DEBOUNCE_DELAY)
+from report_utils import summarize_results, write_text_report, render_html_site
+from profile_utils import PROFILER, Span, PHASES, timed
+from similarity_utils import find_similar_texts
+from cache_utils import (load_analysis_cache, AnalysisCacheWriter, get_cached_result, make_cache_entry,
+                         file_fingerprint)
+
+def analyze_text_file(filepath, top_sketch=None):
     """
     Анализирует один текстовый файл и выводит статистику.
 
     Args:
         filepath (str): Путь к текстовому файлу 
+        top_sketch: Скетч из sketch_utils для приближённого топа слов
+                    в ограниченной памяти (по умолчанию — точный подсчёт)
     """
     print("=" * 70)
     print(f"📊 Анализ файла: {os.path.basename(filepath)}") 
     print("=" * 70)
-    text = read_text_file(filepath)
+    # Все метрики считаются за один проход по файлу
+    stats = analyze_file_stream(filepath, top_sketch=top_sketch)
+
+    print(f"Количество слов: {stats.word_count}")
+    print(f"Количество уникальных слов: {stats.unique_count}")
+    print(f"Количество строк: {stats.line_count}")
+    print(f"Коэффициент тип-токен (TTR): {stats.ttr}")
+    print(f"Средний TTR по окну {MATTR_WINDOW} слов (MATTR): {stats.mattr}")
+    print(f"MTLD: {stats.mtld}")
+    print(f"HD-D: {stats.hdd}")
+
+    top_words = stats.most_common()
+    print(f"\nНаиболее употребляемые слова: {top_words}{describe_top_error(stats.word_freq)}")
+
+def describe_top_error(word_freq):
+    """
+    Описывает погрешность топа слов для вывода.
+
+    Args:
+        word_freq: Counter (точный подсчёт) или скетч из sketch_utils
 
-    word_count = count_words(text)
-    words_ucount = count_unique_words(text)
-    lines_count = count_lines(text)
-    ttr_count = calculate_ttr(text)
+    Returns:
+        str: Пустая строка для точного подсчёта, иначе пояснение с границей погрешности
+    """
+    if not hasattr(word_freq, 'max_error'):
+        return ""
+    return f" (приближённо, погрешность частоты не больше {word_freq.max_error})"
+
+def subtract_frequencies(corpus_freq, word_freq):
+    """
+    Вычитает частоты слов файла из частот корпуса.
+
+    Args:
+        corpus_freq: Counter или скетч из sketch_utils
+        word_freq (Counter): Частоты слов файла, добавленные раньше
+    """
+    if not isinstance(corpus_freq, Counter):
+        corpus_freq.subtract(word_freq)
+        return
+    for word, count in word_freq.items():
+        left = corpus_freq[word] - count
+        if left > 0:
+            corpus_freq[word] = left
+        else:
+            del corpus_freq[word]
+
+def analyze_file_stream(filepath, chunk_size=1024 * 1024, top_sketch=None, ngram_orders=None,
+                        stemmer=None, with_minhash=False, timings=None):
+    """
+    Анализирует текстовый файл по частям, не загружая его целиком.
+    Файлы больше одной части читаются через mmap.
 
-    print(f"Количество слов: {word_count}")
-    print(f"Количество уникальных слов: {words_ucount}")
-    print(f"Количество строк: {lines_count}")
-    print(f"Коэффициент тип-токен (TTR): {round(ttr_count, 3)}")
+    Args:
+        filepath (str): Путь к текстовому файлу
+        chunk_size (int): Размер части файла в символах
+        top_sketch: Скетч из sketch_utils вместо точного Counter частот
+        ngram_orders (tuple): Длины n-грамм, которые считаются в том же проходе
+        stemmer (function): Стеммер — считать метрики по основам слов
+        with_minhash (bool): Считать подпись MinHash для поиска почти одинаковых текстов
+        timings (dict): Замеры фаз (profile_utils.PHASES), к которым прибавляется
+                        время чтения, очистки и подсчёта
 
-    top_words = get_most_common_words(text)
-    print(f"\nНаиболее употребляемые слова: {top_words}")
+    Returns:
+        TextStats: Метрики файла вместе с частотами слов (и n-грамм)
+    """
+    stats = TextStats(top_sketch=top_sketch, ngram_orders=ngram_orders, stemmer=stemmer,
+                      with_minhash=with_minhash, timings=timings)
+    use_mmap = os.path.isfile(filepath) and os.path.getsize(filepath) > chunk_size
+    chunks = read_text_chunks(filepath, chunk_size, use_mmap=use_mmap)
+    if timings is not None:
+        chunks = timed(chunks, timings, 'read_time')
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+def iter_file_results(filepaths, chunk_size=1024 * 1024, profile=False, trace_memory=False,
+                      ngram_orders=None, prefetch=0, root=None, stem_cache_size=None, minhash=False,
+                      cache_entries=False, top_sketch=None):
+    """
+    Анализирует файлы по одному и отдаёт результат каждого сразу после
+    анализа, не накапливая частоты всех файлов в памяти.
 
-def analyze_corpus(corpus_folder):
+    Args:
+        filepaths (list): Пути к файлам
+        chunk_size (int): Размер части файла в символах
+        profile (bool): Замерять время каждого файла
+        trace_memory (bool): Замерять пик памяти каждого файла (tracemalloc)
+        ngram_orders (tuple): Длины n-грамм для подсчёта
+        prefetch (int): Сколько потоков читают следующие файлы, пока разбирается
+                        текущий (0 — читать последовательно)
+        root (str): Папка корпуса; имя файла в строке — путь относительно неё
+                    (по умолчанию — имя файла без папки)
+        stem_cache_size (int): Размер LRU-кэша стеммера; None — слова не стеммируются
+        minhash (bool): Считать подписи MinHash (ключ minhash в результате)
+        cache_entries (bool): Готовить запись кэша каждого файла (ключ cache_entry);
+                              время изменения, размер и хэш файла снимаются до его чтения
+        top_sketch: Скетч из sketch_utils, в который сразу складываются частоты
+                    слов файлов; word_freq в результате тогда None
+
+    Yields:
+        dict: Ключи row (строка для statistics.csv), word_freq,
+              ngram_freq (Counter или None) и event (событие профиля с временем
+              фаз чтения, очистки и подсчёта или None)
+    """
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()  # В процессе-воркере tracemalloc ещё не запущен
+    # Кэш основ общий для всех файлов группы: частые формы стеммируются один раз
+    stemmer = make_stemmer(stem_cache_size) if stem_cache_size else None
+    fingerprints = {}
+
+    def take_fingerprints(paths):
+        # Путь берётся отсюда непосредственно перед чтением файла (и перед
+        # отправкой в поток чтения наперёд), поэтому отпечаток снят до чтения
+        for filepath in paths:
+            fingerprints[filepath] = file_fingerprint(filepath)
+            yield filepath
+
+    paths = take_fingerprints(filepaths) if cache_entries else filepaths
+    if prefetch > 0:
+        # Небольшие файлы читаются заранее в потоках; большие — по частям, как обычно
+        texts = prefetch_text_files(paths, chunk_size, workers=prefetch)
+    else:
+        texts = ((filepath, None) for filepath in paths)
+    waited = {'read_time': 0.0}
+    if profile:
+        # Время ожидания текста, прочитанного наперёд, относится к фазе чтения файла
+        texts = timed(texts, waited, 'read_time')
+    for filepath, text in texts:
+        filename = os.path.relpath(filepath, root) if root else os.path.basename(filepath)
+        timings = None
+        span = None
+        if profile:
+            timings = dict.fromkeys(PHASES, 0.0)
+            timings['read_time'] = waited['read_time']
+            waited['read_time'] = 0.0
+            span = Span(filename, 'file', trace_memory)
+        if text is None:
+            stats = analyze_file_stream(filepath, chunk_size, ngram_orders=ngram_orders, stemmer=stemmer,
+                                        with_minhash=minhash, timings=timings)
+        else:
+            stats = TextStats(text, ngram_orders=ngram_orders, stemmer=stemmer, with_minhash=minhash,
+                              timings=timings)
+        event = None
+        if span is not None:
+            bytes_read = os.path.getsize(filepath) if os.path.isfile(filepath) else 0
+            event = span.finish(bytes_read=bytes_read, tokens=stats.word_count, **timings)
+        result = {
+            'row': stats.as_row(filename),
+            'word_freq': stats.word_freq,
+            'ngram_freq': stats.ngram_freq,
+            'event': event,
+        }
+        if minhash:
+            result['minhash'] = stats.minhash_signature
+        if cache_entries:
+            result['cache_entry'] = make_cache_entry(filepath, fingerprints.pop(filepath), result,
+                                                     ngram_orders, stemmer is not None)
+        if top_sketch is not None:
+            top_sketch.update(stats.word_freq)
+            result['word_freq'] = None  # Точные частоты остаются только в записи кэша
+        yield result
+
+def analyze_files_batch(filepaths, top_sketch, *args):
+    """
+    Анализирует группу файлов. Используется как задача для процесса-воркера:
+    в родительский процесс возвращаются только строки метрик и частоты
+    (или скетч частот всей группы).
+
+    Args:
+        filepaths (list): Пути к файлам
+        top_sketch: Пустой скетч для частот группы или None — частоты по файлам
+        *args: Остальные параметры iter_file_results в том же порядке
+
+    Returns:
+        tuple: (результаты iter_file_results, заполненный скетч или None)
+    """
+    return list(iter_file_results(filepaths, *args, top_sketch=top_sketch)), top_sketch
+
+def split_into_batches(items, batch_size):
+    """
+    Делит список на группы по batch_size элементов, сохраняя порядок.
+
+    Args:
+        items (list): Исходный список
+        batch_size (int): Размер группы
+
+    Returns:
+        list: Список групп
+    """
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+def run_file_analysis(filepaths, chunk_size=1024 * 1024, workers=1, batch_size=None,
+                      profile=False, trace_memory=False, ngram_orders=None, prefetch=0, root=None,
+                      stem_cache_size=None, minhash=False, cache_entries=False, top_sketch=None):
+    """
+    Анализирует список файлов последовательно или в нескольких процессах.
+    Результаты отдаются по мере готовности: по одному файлу при
+    последовательном анализе и по группе файлов при параллельном.
+
+    Args:
+        filepaths (list): Пути к файлам
+        chunk_size (int): Размер части файла в символах
+        workers (int): Количество процессов (1 — без параллелизма)
+        batch_size (int): Сколько файлов отдавать процессу за раз
+        profile (bool): Замерять время каждого файла
+        trace_memory (bool): Замерять пик памяти каждого файла
+        ngram_orders (tuple): Длины n-грамм для подсчёта
+        prefetch (int): Потоков чтения наперёд в каждом процессе (0 — без чтения наперёд)
+        root (str): Папка корпуса для относительных имён файлов
+        stem_cache_size (int): Размер кэша стеммера в каждом процессе; None — без стемминга
+        minhash (bool): Считать подписи MinHash
+        cache_entries (bool): Готовить запись кэша каждого файла
+        top_sketch: Скетч частот корпуса: каждый процесс складывает частоты своих
+                    файлов в собственный скетч, и скетчи объединяются (merge),
+                    поэтому точные частоты файлов не пересылаются
+
+    Yields:
+        dict: Результаты iter_file_results в порядке filepaths
+    """
+    if workers <= 1 or len(filepaths) <= 1:
+        yield from iter_file_results(filepaths, chunk_size, profile, trace_memory, ngram_orders,
+                                     prefetch, root, stem_cache_size, minhash, cache_entries, top_sketch)
+        return
+
+    # Мелкие файлы (стихотворения) объединяем в группы, чтобы
+    # пересылка между процессами не съедала выигрыш от параллелизма
+    if batch_size is None:
+        batch_size = max(1, len(filepaths) // (workers * 4))
+    batches = split_into_batches(filepaths, batch_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map возвращает результаты в порядке групп, поэтому вывод детерминирован
+        sketches = [top_sketch.empty() if top_sketch is not None else None for _ in batches]
+        for batch_results, batch_sketch in executor.map(analyze_files_batch, batches, sketches,
+                                          [chunk_size] * len(batches),
+                                          [profile] * len(batches),
+                                          [trace_memory] * len(batches),
+                                          [ngram_orders] * len(batches),
+                                          [prefetch] * len(batches),
+                                          [root] * len(batches),
+                                          [stem_cache_size] * len(batches),
+                                          [minhash] * len(batches),
+                                          [cache_entries] * len(batches)):
+            if top_sketch is not None:
+                top_sketch.merge(batch_sketch)
+            yield from batch_results
+
+def analyze_corpus(corpus_folder, chunk_size=1024 * 1024, workers=1, batch_size=None,
+                   use_cache=True, cache_path=None, top_sketch=None, ngram_orders=(2, 3),
+                   ngram_min_count=2, ngram_max_entries=1_000_000, recursive=False, prefetch=4,
+                   stem_cache_size=None, metadata_path='data/metadata.csv', facets_path=None,
+                   export_format=None, dedup=None, dedup_threshold=DEDUP_THRESHOLD):
     """
     Анализирует все тексты в папке, сохраняет результаты и выводит статистику.
 
+    Файлы читаются потоково: частоты слов каждого файла сразу добавляются
+    в общий словарь корпуса, поэтому память ограничена размером словаря,
+    а не размером корпуса.
+
     Args:
         corpus_folder (str): Путь к папке с текстами 
+        chunk_size (int): Размер части большого файла в символах
+        workers (int): Количество процессов для анализа (1 — без параллелизма)
+        batch_size (int): Сколько файлов отдавать процессу за раз
+                          (по умолчанию — около четырёх групп на процесс)
+        use_cache (bool): Брать результаты неизменившихся файлов из кэша
+        cache_path (str): Путь к кэшу (по умолчанию results/analysis_cache.jsonl)
+        top_sketch: Скетч из sketch_utils для частот корпуса — топ слов
+                    считается приближённо, но в фиксированной памяти: процессы
+                    складывают частоты своих файлов в собственные скетчи, которые
+                    затем объединяются, и точные частоты файлов попадают только в
+                    кэш на диске; итоги по метаданным и двоичный экспорт не считаются
+        ngram_orders (tuple): Длины словосочетаний (n-грамм), которые считаются
+                              в том же проходе, что и слова; пустой кортеж — не считать
+        ngram_min_count (int): Минимальная частота словосочетания в итогах
+        ngram_max_entries (int): Сколько n-грамм держать в памяти до сброса на диск
+        recursive (bool): Искать тексты и во вложенных папках
+        prefetch (int): Сколько потоков читают файлы наперёд, пока разбирается
+                        текущий (0 — читать последовательно)
+        stem_cache_size (int): Если задан, уникальные слова, TTR, разнообразие, топ слов
+                               и словосочетания считаются по основам слов (стеммер
+                               Snowball с LRU-кэшем такого размера); None — без стемминга
+        metadata_path (str): Путь к metadata.csv (для итогов по годам и авторам)
+        facets_path (str): Путь к сохранённым итогам по метаданным
+                           (по умолчанию results/facets.pkl)
+        export_format (str): Экспортировать метрики и частоты слов в двоичном
+                             постолбцовом виде в results/columnar: 'npy', 'arrow'
+                             или 'auto'; None — не экспортировать
+        dedup (str): Поиск почти одинаковых текстов (MinHash и LSH): 'report' —
+                     только показать группы, 'exclude' — оставить в статистике
+                     одного представителя группы, 'collapse' — оставить строки
+                     всех файлов, но частоты корпуса считать по представителю;
+                     None — не искать
+        dedup_threshold (float): Минимальная оценка коэффициента Жаккара для пары
+
+    Returns:
+        StatsTable: Метрики по файлам, частоты слов, сводка по словосочетаниям,
+                    итоги по годам, авторам и периодам (FacetIndex) и группы
+                    почти одинаковых текстов
     """
     print("=" * 70)
     print("📊 Анализ корпуса текстов")
     print("=" * 70)
 
     # 1. Получаем список всех текстовых файлов из папки
-    files = get_files_in_folder(corpus_folder, '.txt')
+    # Сортируем, чтобы порядок строк в statistics.csv не зависел от файловой системы
+    with PROFILER.stage('discovery'):
+        files = sorted(get_files_in_folder(corpus_folder, '.txt', recursive))
+        filepaths = [os.path.join(corpus_folder, filename) for filename in files]
     
-    # Создаём пустой список для результата анализа
-    data = []
-    all_text = ""
-
-    # 2. Проходим по каждому файлу из списка
-    for filename in files:
-        # Строим полный путь к файлу
-        filepath = os.path.join(corpus_folder, filename)
-        # Читаем текст из файла
-        text = read_text_file(filepath)
-        all_text += text + " "     # Добавляем к общему тексту с разделителем
-        # Считаем сколько слов в тексте
-        word_count = count_words(text)
-        words_ucount = count_unique_words(text)
-        lines_count = count_lines(text)
-        ttr_count = calculate_ttr(text)
-        data.append([filename, word_count, words_ucount, lines_count, ttr_count])
+    # Создаём пустую таблицу для результата анализа (по столбцам, в памяти)
+    data = StatsTable()
+    if top_sketch is not None:
+        data.word_freq = top_sketch
+    corpus_freq = data.word_freq  # Частоты слов во всём корпусе
+    if cache_path is None:
+        cache_path = os.path.join('results', 'analysis_cache.jsonl')
+    if facets_path is None:
+        facets_path = os.path.join('results', 'facets.pkl')
+    if export_format and top_sketch is not None:
+        print("⚠ Двоичный экспорт частот слов недоступен в режиме приближённого топа слов")
+        export_format = None
+
+    # Итоги по годам, авторам и периодам: пересчитываются только изменившиеся файлы
+    facets = None
+    if top_sketch is not None:
+        # Итогам по группам нужны точные частоты слов каждого файла
+        print("⚠ Итоги по годам, авторам и периодам не обновляются в режиме приближённого топа слов")
+    else:
+        stem = bool(stem_cache_size)
+        facets = (load_facets(facets_path, stem) if use_cache else None) or FacetIndex(stem=stem)
+        metadata_map = {row['filename']: row for row in iter_csv_rows(metadata_path, METADATA_SCHEMA)}
+    columns = list(data.schema)
+
+    # Результат каждого файла сразу складывается в частоты корпуса, n-граммы
+    # и итоги по метаданным, а запись кэша сразу уходит на диск. До конца
+    # анализа в памяти остаются только строка метрик, подпись MinHash (для
+    # поиска вариантов) и частоты слов файла, если они нужны для экспорта, —
+    # массивами номеров общего словаря, а не Counter со строками
+    rows = {}
+    signatures = {}
+    export_freqs = {}
+    export_vocabulary = Vocabulary()
+
+    def fold(filepath, result, changed):
+        row = result['row']
+        rows[filepath] = row
+        if dedup:
+            signatures[filepath] = result.get('minhash')
+        word_freq = result['word_freq']
+        if word_freq is not None:  # Со скетчем частоты проанализированных файлов уже в нём
+            corpus_freq.update(word_freq)  # Добавляем частоты файла к частотам корпуса
+        if ngrams is not None and result['ngram_freq'] is not None:
+            ngrams.update(result['ngram_freq'])
+        if facets is not None:
+            facets.sync_file(row[0], dict(zip(columns, row)), word_freq, metadata_map.get(row[0]), changed)
+        if export_format:
+            export_freqs[filepath] = export_vocabulary.encode_counts(word_freq)
+
+    ngrams = CorpusNgrams(ngram_max_entries, ngram_min_count) if ngram_orders else None
+    cache_writer = AnalysisCacheWriter(cache_path) if use_cache else None
+    try:
+        # 2. Берём из кэша неизменившиеся файлы, остальные анализируем заново
+        with PROFILER.stage('cache_lookup'):
+            cache = load_analysis_cache(cache_path) if use_cache else {}
+            to_analyze = []
+            for filepath in filepaths:
+                cached = get_cached_result(cache, filepath, ngram_orders, bool(stem_cache_size), bool(dedup))
+                if cached is None:
+                    to_analyze.append(filepath)
+                    continue
+                cache_writer.write(cache.pop(filepath))  # Запись переходит в новый кэш как есть
+                fold(filepath, cached, changed=False)
+            # Остальные записи устарели или относятся к удалённым файлам
+            del cache
+
+        with PROFILER.stage('analysis', files=len(to_analyze)) as stage:
+            analyzed = run_file_analysis(to_analyze, chunk_size, workers, batch_size,
+                                         profile=PROFILER.active, trace_memory=PROFILER.trace_memory,
+                                         ngram_orders=ngram_orders, prefetch=prefetch, root=corpus_folder,
+                                         stem_cache_size=stem_cache_size, minhash=bool(dedup),
+                                         cache_entries=use_cache, top_sketch=top_sketch)
+            stage['tokens'] = 0
+            stage['bytes_read'] = 0
+            for filepath, result in zip(to_analyze, analyzed):
+                event = result.pop('event')
+                if event is not None:
+                    PROFILER.add_event(event)
+                    stage['tokens'] += event['tokens']
+                    stage['bytes_read'] += event['bytes_read']
+                if cache_writer is not None:
+                    cache_writer.write(result.pop('cache_entry'))
+                fold(filepath, result, changed=True)
+
+        with PROFILER.stage('cache_save'):
+            if cache_writer is not None:
+                cache_writer.commit()
+
+        # Почти одинаковые тексты (редакции, перепечатки) ищутся по подписям всех
+        # файлов, когда их частоты уже сложены в частоты корпуса
+        variants = set()
+        if dedup:
+            with PROFILER.stage('dedup'):
+                data.duplicates = find_near_duplicates(
+                    {rows[filepath][0]: signatures[filepath] for filepath in filepaths},
+                    {rows[filepath][0]: rows[filepath][1] for filepath in filepaths}, dedup_threshold)
+                signatures.clear()
+                variants = {name for cluster in data.duplicates for name, _ in cluster['members']}
+                if dedup in ('exclude', 'collapse'):
+                    # Вклад вариантов вычитается из частот корпуса: их частоты
+                    # считаются ещё раз (вариантов обычно немного), чтобы не держать
+                    # частоты всех файлов в памяти до конца поиска
+                    variant_paths = [filepath for filepath in filepaths if rows[filepath][0] in variants]
+                    recounted = run_file_analysis(variant_paths, chunk_size, workers, batch_size,
+                                                  ngram_orders=ngram_orders, prefetch=prefetch,
+                                                  root=corpus_folder, stem_cache_size=stem_cache_size)
+                    for filepath, result in zip(variant_paths, recounted):
+                        if result['row'] != rows[filepath]:
+                            print(f"⚠ {rows[filepath][0]} изменился во время анализа — "
+                                  f"частоты корпуса могут быть неточными")
+                        subtract_frequencies(corpus_freq, result['word_freq'])
+                        if ngrams is not None and result['ngram_freq'] is not None:
+                            ngrams.subtract(result['ngram_freq'])
+
+        with PROFILER.stage('merge'):
+            # Строки собираются в порядке имён файлов, независимо от того,
+            # какие файлы взяты из кэша
+            included = [filepath for filepath in filepaths
+                        if not (dedup == 'exclude' and rows[filepath][0] in variants)]
+            included_names = {rows[filepath][0] for filepath in included}
+            for filepath in included:
+                data.append(rows[filepath])
+            rows.clear()
+
+        if ngrams is not None:
+            with PROFILER.stage('ngrams'):
+                data.ngram_summary = ngrams.summarize(corpus_freq)
+    finally:
+        if ngrams is not None:
+            ngrams.cleanup()  # Сброшенные на диск частоты удаляются и при ошибке
+        if cache_writer is not None:
+            cache_writer.abort()  # После commit() ничего не делает
+
+    if facets is not None:
+        with PROFILER.stage('facets'):
+            # Вклад файлов уже обновлён; убираем удалённые файлы и исключённые варианты
+            facets.prune(included_names)
+            save_facets(facets, facets_path)
+            data.facets = facets
     
-    # 3. Сохраняем результаты в CSV файл
+    # 3. Экспортируем результаты в CSV файл
     results_folder = 'results'
     # Создаём папку results, если её нет
     os.makedirs(results_folder, exist_ok=True)
     
     csv_file_path = os.path.join(results_folder, 'statistics.csv')
-    write_csv_file(csv_file_path, 
-                   ['filename', 'word_count', 'words_ucount', 'lines_count', 'ttr_count'], 
-                   data)
+    with PROFILER.stage('csv_export'):
+        data.to_csv(csv_file_path)
+
+    columnar_path = os.path.join(results_folder, 'columnar')
+    if export_format:
+        with PROFILER.stage('columnar_export'):
+            # Строки экспорта — те же файлы, что в таблице (без исключённых вариантов)
+            file_freqs = [export_freqs.pop(filepath) for filepath in included]
+            export_format = export_columnar(data, file_freqs, export_vocabulary, columnar_path,
+                                            export_format)
 
     print(f"\n✓ Проанализировано файлов: {len(data)}")
+    if use_cache:
+        print(f"✓ Взято из кэша: {len(filepaths) - len(to_analyze)}, проанализировано заново: {len(to_analyze)}")
     print(f"✓ Результаты сохранены в {csv_file_path}")
-
-    # 4. Загружаем результаты из CSV файла
-    stats = read_csv_file(csv_file_path)
+    if export_format:
+        print(f"✓ Метрики и частоты слов ({export_format}) сохранены в {columnar_path}")
+    if dedup:
+        print(f"✓ Групп почти одинаковых текстов: {len(data.duplicates)}, вариантов: {len(variants)}"
+              + {'exclude': ' (исключены из статистики)',
+                 'collapse': ' (не учитываются в частотах корпуса)'}.get(dedup, ''))
+        for cluster in data.duplicates:
+            members = ', '.join(f"{name} ({jaccard})" for name, jaccard in cluster['members'])
+            print(f"   • {cluster['representative']} ≈ {members}")
 
     print("\n📖 Статистика по файлам:\n")
 
-    # 5. Выводим имя каждого файла и количество слов
-    total_words = 0  # переменная для хранения суммы всех слов
-    for i, row in enumerate(stats, start=1):
-        # Получаем имя файла и количество слов (строка → число)
-        filename = row['filename']
-        word_count = int(row['word_count'])
-        words_ucount = int(row['words_ucount'])
-        lines_count = int(row['lines_count'])
-        ttr_count = round(float(row['ttr_count']), 3)
-        print(f"{i}. {filename}: {word_count}, {words_ucount}, {lines_count}, {ttr_count}")
-        total_words += word_count
+    # 4-5. Выводим имя каждого файла и метрики прямо из таблицы в памяти
+    for i, (filename, word_count, words_ucount, lines_count, ttr_count,
+            mattr_count, mtld_count, hdd_count) in enumerate(data.rows(), start=1):
+        print(f"{i}. {filename}: {word_count}, {words_ucount}, {lines_count}, {round(ttr_count, 3)}, "
+              f"MATTR {mattr_count}, MTLD {mtld_count}, HD-D {hdd_count}")
+    total_words = sum(data.column('word_count'))  # сумма всех слов
+    stats_count = len(data)
 
     # 6. Выводим общую статистику: всего слов и среднее на файл
     print("\n📈 Общая статистика:")
     print(f"   Всего текстов в корпусе: {len(files)}")
     print(f"   Всего слов в корпусе: {total_words}")
     # Чтобы найти среднее количество слов — делим на число файлов
-    if len(stats) > 0:
-        average = total_words // len(stats)
+    if stats_count > 0:
+        average = total_words // stats_count
     else:
         average = 0
     print(f"   Среднее количество слов: {average}")
-    top_words = get_most_common_words(all_text)
-    print(f"\nНаиболее употребляемые слова во всём корпусе: {top_words}")
+    top_words = corpus_freq.most_common(5)
+    print(f"\nНаиболее употребляемые слова во всём корпусе: {top_words}{describe_top_error(corpus_freq)}")
+    if data.ngram_summary:
+        top_bigrams = data.ngram_summary['top'].get(2, [])[:5]
+        print(f"Наиболее частые словосочетания: {top_bigrams}")
     
-    return csv_file_path  # Возвращаем путь к CSV файлу
+    return data  # Возвращаем таблицу результатов
+
+def print_concordance(query, corpus_folder='corpus', index_path='results/corpus_index.pkl',
+                      rebuild=False, width=40):
+    """
+    Выводит конкорданс (слово в контексте) по обратному индексу корпуса.
+    Индекс строится при первом запросе и сохраняется на диск; если тексты
+    корпуса с тех пор изменились, он строится заново.
+
+    Args:
+        query (str): Слово или фраза
+        corpus_folder (str): Путь к папке с текстами
+        index_path (str): Путь к файлу индекса
+        rebuild (bool): Перестроить индекс, даже если он уже сохранён
+        width (int): Сколько символов контекста показывать слева и справа
+    """
+    index = None if rebuild else load_index(index_path)
+    if index is None or index.corpus_folder != corpus_folder:
+        index = build_index(corpus_folder)
+        save_index(index, index_path)
+        print(f"✓ Индекс сохранён в {index_path}")
+
+    hits = index.concordance(query, width)
+    print(f"🔎 «{query}»: найдено вхождений: {len(hits)}\n")
+    for hit in hits:
+        print(f"{hit['filename']}:{hit['line']} ({hit['title']}, {hit['year']})")
+        print(f"   {hit['left']:>{width}}[{hit['keyword']}]{hit['right']}")
+
+def print_similar_texts(corpus_folder='corpus', k=3):
+    """
+    Выводит для каждого текста самые близкие по лексике (TF-IDF, косинус).
+
+    Args:
+        corpus_folder (str): Путь к папке с текстами
+        k (int): Сколько соседей показывать
+    """
+    print(f"🔗 Ближайшие тексты (TF-IDF, косинусная близость, топ-{k}):\n")
+    for text in find_similar_texts(corpus_folder, k=k):
+        print(f"{text['filename']} ({text['title']}, {text['year']})")
+        for neighbour in text['neighbours']:
+            print(f"   {neighbour['similarity']:.3f}  {neighbour['filename']} "
+                  f"({neighbour['title']}, {neighbour['year']})")
+
+def print_facets(facet='year', values=None, facets_path='results/facets.pkl'):
+    """
+    Выводит итоги корпуса по годам, авторам или периодам из сохранённых
+    итогов — без повторного анализа корпуса.
+
+    Args:
+        facet (str): 'year', 'author' или 'years'
+        values (list): Какие значения показать (по умолчанию все); для годов
+                       можно указать диапазон вида 1905-1909 (дефис или тире)
+        facets_path (str): Путь к итогам, сохранённым analyze_corpus
+    """
+    facets = load_facets(facets_path)
+    if facets is None:
+        print(f"✗ Итоги не найдены: {facets_path}. Сначала запустите анализ корпуса.")
+        return
+    if not values:
+        selected = facets.groups(facet)
+    else:
+        selected = []
+        for value in values:
+            value = value.replace('–', '-')  # Диапазон и период можно записать и через тире
+            if facet == 'year' and '-' in value.strip('-'):
+                # Диапазон лет складывается из готовых итогов по годам
+                start, _, end = (part.strip() for part in value.partition('-'))
+                if not (start.isdigit() and end.isdigit()) or int(start) > int(end):
+                    print(f"✗ Неверный диапазон лет: {value} (нужно, например, 1905-1909)")
+                    continue
+                selected.append((value, facets.query_years(int(start), int(end))))
+                continue
+            key = int(value) if facet == 'year' and value.isdigit() else value
+            group = facets.group(facet, key)
+            if group is None:
+                print(f"⚠ Нет текстов со значением {value}")
+            else:
+                selected.append((key, group))
+    for key, group in selected:
+        print(describe_group(key, group))
+
+def run_daemon(corpus_folder='corpus', host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None,
+               interval=WATCH_INTERVAL, debounce=DEBOUNCE_DELAY, workers=1, ngram_orders=(2, 3),
+               recursive=False, stem_cache_size=None, html_folder='html'):
+    """
+    Постоянно работающий режим: корпус загружается один раз, изменённые
+    файлы анализируются заново по мере правок, запросы идут по HTTP.
+    statistics.csv, report.txt и сайт пишутся, когда правки затихли.
+    Остановка — Ctrl+C.
+
+    Args:
+        corpus_folder (str): Путь к папке с текстами
+        host (str): Адрес сервера (по умолчанию только локальный)
+        port (int): Порт сервера
+        socket_path (str): Слушать Unix-сокет вместо TCP-порта
+        interval (float): Период опроса папки в секундах (без inotify)
+        debounce (float): Сколько секунд тишины ждать перед записью результатов
+        workers (int): Количество процессов для анализа изменённых файлов
+        ngram_orders (tuple): Длины n-грамм для подсчёта
+        recursive (bool): Следить и за вложенными папками
+        stem_cache_size (int): Размер кэша стеммера; None — без стемминга
+        html_folder (str): Папка сайта (None — страницы не обновлять)
+    """
+    def analyze(filepaths):
+        return run_file_analysis(filepaths, workers=workers, ngram_orders=ngram_orders,
+                                 root=corpus_folder, stem_cache_size=stem_cache_size, cache_entries=True)
 
-def load_csv_data(filepath):
+    def write_results():
+        data = model.table()
+        os.makedirs('results', exist_ok=True)
+        data.to_csv(os.path.join('results', 'statistics.csv'))
+        model.save()
+        get_report(data, html_folder=html_folder)
+
+    model = CorpusModel(corpus_folder, analyze, ngram_orders=ngram_orders, recursive=recursive,
+                        stem_cache_size=stem_cache_size)
+    print(f"✓ Загружено файлов: {model.load()}")
+    writer = DebouncedWriter(write_results, delay=debounce)
+    writer.mark()
+    writer.flush(force=True)
+    watcher = CorpusWatcher(model, writer, interval=interval)
+    server = start_server(model, host, port, socket_path)
+    address = socket_path or f"http://{host}:{port}"
+    print(f"✓ Запросы: {address} (/corpus, /files, /file?name=..., /top?n=..., /ngrams, "
+          f"/facet?facet=year&value=..., POST /text)")
+    print(f"✓ Слежение за {corpus_folder}: {watcher.mode}; Ctrl+C — остановить")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass  # Незаписанные изменения записывает watcher.run перед выходом
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def load_csv_data(filepath, schema=None):
     """
     Загружает данные из CSV файла.
     
     Args:
         filepath (str): Путь к CSV файлу
+        schema (dict): Столбец -> тип (см. STATISTICS_SCHEMA, METADATA_SCHEMA);
+                       значения приводятся к типам один раз, при чтении
         
     Returns:
         list: Список словарей с данными
     """
-    data = []
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                data.append(row)
-        return data
-    except FileNotFoundError:
+    if not os.path.exists(filepath):
         print(f"✗ Файл не найден: {filepath}")
         return []
+    try:
+        return list(iter_csv_rows(filepath, schema))
     except Exception as e:
         print(f"✗ Ошибка при загрузке {filepath}: {e}")
         return []
 
+def load_columnar_data(folder='results/columnar', use_numpy=None):
+    """
+    Загружает метрики и частоты слов, экспортированные analyze_corpus
+    (export_format), без разбора CSV: столбцы отображаются в память.
+
+    Args:
+        folder (str): Папка экспорта
+        use_numpy (bool): Открывать .npy через NumPy (по умолчанию — если он установлен)
+
+    Returns:
+        ColumnarData: Столбцы метрик, словарь и частоты по файлам или None при ошибке
+    """
+    if not os.path.exists(os.path.join(folder, 'manifest.json')):
+        print(f"✗ Экспорт не найден: {folder}")
+        return None
+    try:
+        return load_columnar(folder, use_numpy)
+    except Exception as e:
+        print(f"✗ Ошибка при загрузке {folder}: {e}")
+        return None
+
 def prepare_results_for_report(csv_filepath):
     """
-    Преобразует данные из statistics.csv в формат для generate_report.
+    Загружает данные из statistics.csv в таблицу для generate_report.
     
     Args:
         csv_filepath (str): Путь к statistics.csv
         
     Returns:
-        list: Данные в правильном формате
+        StatsTable: Таблица метрик (пустая, если файла нет)
     """
-    raw_data = load_csv_data(csv_filepath)
-    if not raw_data:
-        return []
-    
-    results = []
-    for row in raw_data:
-        # Преобразуем данные из CSV в формат для отчета
-        result = {
-            'filename': row.get('filename', ''),
-            'word_count': int(row.get('word_count', 0)),
-            'words_ucount': int(row.get('words_ucount', 0)),  # Оставляем как есть
-            'ttr_count': float(row.get('ttr_count', 0.0)),    # Оставляем как есть
-            'lines_count': int(row.get('lines_count', 0))     # Добавляем если нужно
-        }
-        results.append(result)
-    
-    return results
+    if not os.path.exists(csv_filepath):
+        print(f"✗ Файл не найден: {csv_filepath}")
+        return StatsTable()
+    return StatsTable.from_csv(csv_filepath)
 
 def generate_report(results, metadata):
     """
     Генерирует текстовый отчёт с объединением данных анализа и метаданных.
 
+    Сводные величины считаются одним проходом (report_utils.summarize_results),
+    сам отчёт пишется построчно (report_utils.write_text_report). get_report
+    пишет его сразу в файл; эта функция возвращает его строкой.
+
     Args:
-        results (list): Список словарей с результатами анализа
-                       (должен содержать ключи: filename, word_count, words_ucount, ttr_count)
+        results (StatsTable | list): Результаты анализа (строки — словари)
+                       (должен содержать ключи: filename, word_count, words_ucount, ttr_count,
+                       mattr_count, mtld_count, hdd_count)
         metadata (list): Список словарей с метаданными о текстах
 
     Returns:
@@ -172,96 +754,25 @@ def generate_report(results, metadata):
     # Проверяем, есть ли данные
     if not results:
         return "Ошибка: Нет данных для генерации отчета."
-    
-    # Создаём словарь метаданных для быстрого поиска по имени файла
-    metadata_map = {}
-    if metadata:
-        try:
-            for item in metadata:
-                if 'filename' in item:
-                    metadata_map[item['filename']] = item
-        except Exception as e:
-            print(f"Внимание: Ошибка при обработке метаданных: {e}")
-
-    # Начинаем составлять отчёт
-    report_lines = []
-    report_lines.append("=" * 70)
-    report_lines.append("📊 ОТЧЁТ ПО АНАЛИЗУ КОРПУСА ТЕКСТОВ")
-    report_lines.append("=" * 70)
-
-    # ========== ОБЩАЯ СТАТИСТИКА ==========
-    report_lines.append("\n📈 ОБЩАЯ СТАТИСТИКА:")
-    report_lines.append("-" * 70)
-
-    # Считаем общие метрики
-    total_files = len(results)
-    total_words = sum(r.get('word_count', 0) for r in results)
-    total_unique = sum(r.get('words_ucount', 0) for r in results)  # Используем words_ucount
-    avg_ttr = sum(r.get('ttr_count', 0) for r in results) / len(results) if results else 0  # Используем ttr_count
-
-    report_lines.append(f"  Всего текстов в корпусе: {total_files}")
-    report_lines.append(f"  Всего слов: {total_words}")
-    report_lines.append(f"  Всего уникальных слов: {total_unique}")
-    report_lines.append(f"  Средний Type-Token Ratio (TTR): {round(avg_ttr, 3)}")
-
-    # ========== ДЕТАЛЬНАЯ СТАТИСТИКА ==========
-    report_lines.append("\n📄 ДЕТАЛЬНАЯ СТАТИСТИКА ПО ФАЙЛАМ:")
-    report_lines.append("-" * 70)
-
-    for i, result in enumerate(results, start=1):
-        filename = result.get('filename', f'Файл_{i}')
-        meta = metadata_map.get(filename, {})
-
-        report_lines.append(f"\n{i}. {filename}")
-        report_lines.append(f"   Название: {meta.get('title', 'Неизвестно')}")
-        report_lines.append(f"   Автор: {meta.get('author', 'Неизвестен')}")
-        report_lines.append(f"   Год: {meta.get('year', 'N/A')}")
-        report_lines.append(f"   Слов: {result.get('word_count', 'N/A')}")
-        report_lines.append(f"   Уникальных слов: {result.get('words_ucount', 'N/A')}")  # Используем words_ucount
-        report_lines.append(f"   TTR: {result.get('ttr_count', 0):.3f}")  # Используем ttr_count и форматируем
-
-    # ========== ВЫВОДЫ ==========
-    report_lines.append("\n" + "=" * 70)
-    report_lines.append("📌 ВЫВОДЫ И ИНТЕРПРЕТАЦИЯ:")
-    report_lines.append("=" * 70)
-
-    if results:
-        # Находим текст с максимальным TTR (лексическое разнообразие)
-        max_ttr_result = max(results, key=lambda x: x.get('ttr_count', 0))  # Используем ttr_count
-        min_ttr_result = min(results, key=lambda x: x.get('ttr_count', 0))  # Используем ttr_count
-
-        report_lines.append(f"\n1. Лексическое разнообразие:")
-        report_lines.append(
-            f"   • Максимальное разнообразие: {max_ttr_result.get('filename', 'N/A')} "
-            f"(TTR = {max_ttr_result.get('ttr_count', 0):.3f})"  # Используем ttr_count
-        )
-        report_lines.append(
-            f"   • Минимальное разнообразие: {min_ttr_result.get('filename', 'N/A')} "
-            f"(TTR = {min_ttr_result.get('ttr_count', 0):.3f})"  # Используем ttr_count
-        )
-
-    report_lines.append(f"\n2. Общие наблюдения:")
-    report_lines.append(
-        f"   • Средний TTR всего корпуса составляет {round(avg_ttr, 3)}, "
-        f"что указывает на {'высокое' if avg_ttr > 0.6 else 'среднее' if avg_ttr > 0.4 else 'низкое'} "
-        f"лексическое разнообразие текстов."
-    )
-    report_lines.append(
-        f"   • Всего в корпусе проанализировано {total_words} слов "
-        f"и найдено {total_unique} уникальных слов."
-    )
-
-    # Объединяем всё в один текст
-    return "\n".join(report_lines)
-
-def get_report():
+    report = io.StringIO()
+    write_text_report(report, results, summarize_results(results, metadata))
+    return report.getvalue()
+
+def get_report(results_data=None, html_folder='html'):
     """
     Основная функция для генерации и сохранения отчета.
-    Загружает данные из файлов и сохраняет отчет в results/report.txt
+    Сохраняет отчет в results/report.txt и страницы статистики,
+    текстов и результатов в html_folder.
+
+    Args:
+        results_data (StatsTable): Результаты analyze_corpus; если не переданы,
+                                   загружаются из results/statistics.csv
+        html_folder (str): Папка сайта (None — страницы не создавать)
     """
     
     # 1. Подготавливаем данные для отчета
-    results_data = prepare_results_for_report('results/statistics.csv')
+    if results_data is None:
+        results_data = prepare_results_for_report('results/statistics.csv')
     
     if not results_data:
         print("✗ Не удалось загрузить данные статистики")
@@ -269,28 +780,118 @@ def get_report():
     
     # 2. Загружаем метаданные
     metadata_path = 'data/metadata.csv'
-    metadata_data = load_csv_data(metadata_path)
+    metadata_data = load_csv_data(metadata_path, METADATA_SCHEMA)
     
     if not metadata_data:
         print("⚠ Метаданные не загружены, отчет будет без дополнительной информации")
     
-    # 3. Генерируем отчет
-    report_text = generate_report(results_data, metadata_data)
-    
-    # 4. Сохраняем отчет в файл
-    report_path = 'results/report.txt'
-    try:
-        # Убедимся, что папка results существует
-        os.makedirs('results', exist_ok=True)
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_text)   
-        print(f"✅ Отчет сохранен в {report_path}")
-        
-    except Exception as e:
-        print(f"✗ Ошибка при сохранении отчета: {e}")
+    # 3. Считаем сводку один раз — из неё пишутся и report.txt, и страницы сайта
+    with PROFILER.stage('report'):
+        summary = summarize_results(results_data, metadata_data)
+
+        # 4. Пишем отчёт построчно прямо в файл
+        report_path = 'results/report.txt'
+        try:
+            # Убедимся, что папка results существует
+            os.makedirs('results', exist_ok=True)
+
+            with open(report_path, 'w', encoding='utf-8') as f:
+                write_text_report(f, results_data, summary)
+            print(f"✅ Отчет сохранен в {report_path}")
+
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении отчета: {e}")
+
+    # 5. Перерисовываем страницы сайта, входные данные которых изменились
+    if html_folder:
+        with PROFILER.stage('html'):
+            try:
+                written, skipped = render_html_site(results_data, summary, html_folder)
+                print(f"✅ Страницы сайта в {html_folder}: обновлено {written}, без изменений {skipped}")
+            except Exception as e:
+                print(f"✗ Ошибка при создании страниц сайта: {e}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Анализ корпуса текстов')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Количество процессов для анализа корпуса (по умолчанию 1)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Не использовать кэш и проанализировать все файлы заново')
+    parser.add_argument('--profile', nargs='?', const='results/profile.json', metavar='ПУТЬ',
+                        help='Замерить время и память этапов и файлов и сохранить '
+                             'трассировку Chrome (по умолчанию results/profile.json)')
+    parser.add_argument('--profile-top', type=int, default=10, metavar='N',
+                        help='Сколько самых медленных файлов показать в профиле')
+    parser.add_argument('--approx-top', type=int, metavar='N',
+                        help='Считать топ слов корпуса приближённо в N счётчиках (фиксированная память)')
+    parser.add_argument('--sketch', choices=['space-saving', 'count-min'], default='space-saving',
+                        help='Алгоритм приближённого топа (по умолчанию space-saving)')
+    parser.add_argument('--similar', type=int, nargs='?', const=3, metavar='K',
+                        help='Показать K самых близких текстов для каждого (нужен NumPy)')
+    parser.add_argument('--kwic', metavar='ЗАПРОС',
+                        help='Показать конкорданс слова или фразы вместо анализа корпуса')
+    parser.add_argument('--rebuild-index', action='store_true',
+                        help='Перестроить обратный индекс перед поиском')
+    parser.add_argument('--recursive', action='store_true',
+                        help='Искать тексты и во вложенных папках корпуса')
+    parser.add_argument('--prefetch', type=int, default=4, metavar='N',
+                        help='Сколько потоков читают файлы наперёд (0 — без чтения наперёд, по умолчанию 4)')
+    parser.add_argument('--no-html', action='store_true',
+                        help='Не обновлять страницы сайта в папке html')
+    parser.add_argument('--stem', action='store_true',
+                        help='Считать уникальные слова, TTR и топ слов по основам (стеммер Snowball)')
+    parser.add_argument('--stem-cache', type=int, default=STEM_CACHE_SIZE, metavar='N',
+                        help=f'Размер LRU-кэша основ (по умолчанию {STEM_CACHE_SIZE})')
+    parser.add_argument('--facet', choices=FACET_NAMES,
+                        help='Показать сохранённые итоги по годам (year), авторам (author) '
+                             'или периодам (years) вместо анализа корпуса')
+    parser.add_argument('--facet-values', nargs='+', metavar='ЗНАЧЕНИЕ',
+                        help='Значения для --facet, например 1906 1907 или 1905-1909')
+    parser.add_argument('--serve', nargs='?', const=f'{DEFAULT_HOST}:{DEFAULT_PORT}', metavar='АДРЕС:ПОРТ',
+                        help='Держать корпус в памяти, следить за изменениями и отвечать на '
+                             f'запросы по HTTP (по умолчанию {DEFAULT_HOST}:{DEFAULT_PORT})')
+    parser.add_argument('--socket', metavar='ПУТЬ',
+                        help='Для --serve: слушать Unix-сокет вместо TCP-порта')
+    parser.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL, metavar='СЕК',
+                        help=f'Период опроса папки корпуса без inotify (по умолчанию {WATCH_INTERVAL})')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_DELAY, metavar='СЕК',
+                        help='Через сколько секунд после последней правки записывать результаты '
+                             f'(по умолчанию {DEBOUNCE_DELAY})')
+    parser.add_argument('--export', nargs='?', const='auto', choices=('auto',) + EXPORT_FORMATS,
+                        help='Сохранить метрики и частоты слов в двоичном постолбцовом виде '
+                             'в results/columnar (auto — arrow, если установлен pyarrow, иначе npy)')
+    parser.add_argument('--dedup', nargs='?', const='report', choices=DEDUP_MODES,
+                        help='Искать почти одинаковые тексты (MinHash и LSH): report — показать, '
+                             'exclude — исключить варианты из статистики, collapse — учитывать '
+                             'группу в частотах корпуса один раз')
+    parser.add_argument('--dedup-threshold', type=float, default=DEDUP_THRESHOLD, metavar='J',
+                        help=f'Минимальная оценка коэффициента Жаккара (по умолчанию {DEDUP_THRESHOLD})')
+    parser.add_argument('--no-ngrams', action='store_true',
+                        help='Не считать словосочетания (биграммы и триграммы)')
+    args = parser.parse_args()
+
+    if args.kwic:
+        print_concordance(args.kwic, rebuild=args.rebuild_index)
+        raise SystemExit
+
+    if args.facet:
+        print_facets(args.facet, args.facet_values)
+        raise SystemExit
+
+    if args.similar:
+        print_similar_texts(k=args.similar)
+        raise SystemExit
+
+    if args.serve or args.socket:
+        host, _, port = (args.serve or f'{DEFAULT_HOST}:{DEFAULT_PORT}').rpartition(':')
+        run_daemon('corpus', host or DEFAULT_HOST, int(port), args.socket, args.watch_interval,
+                   args.debounce, args.workers, () if args.no_ngrams else (2, 3), args.recursive,
+                   args.stem_cache if args.stem else None, None if args.no_html else 'html')
+        raise SystemExit
+
+    if args.profile:
+        PROFILER.enable()
+
     # Пример использования:
     
     # 1. Анализ одного файла (опционально)
@@ -299,9 +900,20 @@ if __name__ == '__main__':
     # print("\n" + "=" * 70 + "\n")
     
     # 2. Анализ всего корпуса
-    stats_file = analyze_corpus('corpus')
+    top_sketch = make_top_sketch(args.sketch, args.approx_top) if args.approx_top else None
+    stats = analyze_corpus('corpus', workers=args.workers, use_cache=not args.no_cache,
+                           top_sketch=top_sketch, ngram_orders=() if args.no_ngrams else (2, 3),
+                           recursive=args.recursive, prefetch=args.prefetch,
+                           stem_cache_size=args.stem_cache if args.stem else None,
+                           export_format=args.export, dedup=args.dedup,
+                           dedup_threshold=args.dedup_threshold)
     
     print("\n" + "=" * 70 + "\n")
     
-    # 3. Генерация отчета
-    get_report()
\ No newline at end of file
+    # 3. Генерация отчета по результатам в памяти, без повторного чтения CSV
+    get_report(stats, html_folder=None if args.no_html else 'html')
+
+    if args.profile:
+        PROFILER.print_summary(args.profile_top)
+        if PROFILER.save_chrome_trace(args.profile):
+            print(f"✓ Профиль сохранён в {args.profile}")
\ No newline at end of file
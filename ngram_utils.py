@@ -0,0 +1,227 @@
+import os
+import math
+import heapq
+import tempfile
+from collections import Counter
+from collections.abc import Mapping
+
+# Словосочетания (биграммы и триграммы) и меры их устойчивости.
+#
+# N-граммы считаются в том же проходе по тексту, что и частоты слов
+# (TextStats с ngram_orders), и хранятся строками «слово слово».
+# Частоты корпуса копятся в CorpusNgrams: когда таблица превышает
+# max_entries записей, она сбрасывается на диск отсортированным файлом,
+# а в конце все файлы сливаются одним проходом (как внешняя сортировка).
+# При слиянии отбрасываются n-граммы реже min_count и сразу считаются
+# PMI и логарифмическое правдоподобие (G², Dunning 1993) для биграмм.
+
+def iter_ngrams(tokens, n):
+    """
+    Перебирает n-граммы списка слов как строки «слово слово».
+
+    Args:
+        tokens (list): Слова
+        n (int): Длина n-граммы
+
+    Returns:
+        iterator: Строки n-грамм
+    """
+    return map(' '.join, zip(*(tokens[i:] for i in range(n))))
+
+def word_frequency(word_freq, word):
+    """
+    Частота слова из Counter или оценка из скетча sketch_utils.
+
+    Args:
+        word_freq: Counter или скетч
+        word (str): Слово
+
+    Returns:
+        int: Частота (оценка частоты)
+    """
+    if isinstance(word_freq, Mapping):
+        return word_freq.get(word, 0)
+    if hasattr(word_freq, 'estimate'):
+        return word_freq.estimate(word)
+    return word_freq.counts.get(word, word_freq.max_error)
+
+def pmi(pair_count, first_count, second_count, total):
+    """
+    Поточечная взаимная информация: log2(P(xy) / (P(x) P(y))).
+
+    Args:
+        pair_count (int): Частота биграммы
+        first_count (int): Частота первого слова
+        second_count (int): Частота второго слова
+        total (int): Всего слов в корпусе
+
+    Returns:
+        float: PMI в битах
+    """
+    if not pair_count or not first_count or not second_count:
+        return 0.0
+    return math.log2(pair_count * total / (first_count * second_count))
+
+def log_likelihood(pair_count, first_count, second_count, total):
+    """
+    Логарифмическое правдоподобие G² для таблицы сопряжённости 2 x 2.
+
+    Args:
+        pair_count (int): Частота биграммы
+        first_count (int): Частота первого слова
+        second_count (int): Частота второго слова
+        total (int): Всего слов в корпусе
+
+    Returns:
+        float: G² (чем больше, тем устойчивее словосочетание)
+    """
+    # Частоты из скетчей могут быть неточными, поэтому не даём клеткам стать отрицательными
+    k11 = pair_count
+    k12 = max(first_count - pair_count, 0)
+    k21 = max(second_count - pair_count, 0)
+    k22 = max(total - first_count - second_count + pair_count, 0)
+    n = k11 + k12 + k21 + k22
+    if n == 0:
+        return 0.0
+    rows = (k11 + k12, k21 + k22)
+    cols = (k11 + k21, k12 + k22)
+    g2 = 0.0
+    for observed, row, col in ((k11, rows[0], cols[0]), (k12, rows[0], cols[1]),
+                               (k21, rows[1], cols[0]), (k22, rows[1], cols[1])):
+        if observed:
+            g2 += observed * math.log(observed * n / (row * col))
+    return 2.0 * g2
+
+class CorpusNgrams:
+    """
+    Частоты n-грамм корпуса с ограничением памяти и сбросом на диск.
+
+    Attributes:
+        max_entries (int): Сколько n-грамм держать в памяти до сброса на диск
+        min_count (int): Минимальная частота n-граммы в итоговых результатах
+        spill_files (list): Пути к сброшенным на диск частям
+    """
+
+    def __init__(self, max_entries=1_000_000, min_count=2, spill_dir=None):
+        self.max_entries = max_entries
+        self.min_count = min_count
+        self.spill_dir = spill_dir
+        self.spill_files = []
+        self.table = Counter()
+
+    def update(self, ngram_freq):
+        """
+        Добавляет частоты n-грамм одного документа.
+
+        Args:
+            ngram_freq (Counter): N-грамма -> частота
+        """
+        self.table.update(ngram_freq)
+        if len(self.table) > self.max_entries:
+            self.spill()
+
+    def subtract(self, ngram_freq):
+        """
+        Вычитает частоты n-грамм документа, добавленные раньше через update()
+        (например, варианта текста, найденного после подсчёта).
+
+        В памяти и в сброшенных частях частота может стать отрицательной —
+        при слиянии в iter_counts частоты складываются, и итог верный.
+
+        Args:
+            ngram_freq (Counter): N-грамма -> частота
+        """
+        self.table.subtract(ngram_freq)
+        if len(self.table) > self.max_entries:
+            self.spill()
+
+    def spill(self):
+        """Сбрасывает таблицу из памяти на диск отсортированным файлом."""
+        if not self.table:
+            return
+        fd, path = tempfile.mkstemp(prefix='ngrams_', suffix='.tsv', dir=self.spill_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for ngram in sorted(self.table):
+                f.write(f"{ngram}\t{self.table[ngram]}\n")
+        self.spill_files.append(path)
+        self.table = Counter()
+
+    def _iter_run(self, path):
+        """Читает сброшенный файл как пары (n-грамма, частота)."""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                ngram, count = line.rstrip('\n').split('\t')
+                yield ngram, int(count)
+
+    def iter_counts(self):
+        """
+        Перебирает итоговые частоты n-грамм (не реже min_count) в порядке строк.
+        Сброшенные на диск части сливаются за один проход.
+
+        Yields:
+            tuple: (n-грамма, частота)
+        """
+        runs = [self._iter_run(path) for path in self.spill_files]
+        runs.append(iter(sorted(self.table.items())))
+        current, total = None, 0
+        for ngram, count in heapq.merge(*runs):
+            if ngram != current:
+                if current is not None and total > 0 and total >= self.min_count:
+                    yield current, total
+                current, total = ngram, 0
+            total += count
+        if current is not None and total > 0 and total >= self.min_count:
+            yield current, total
+
+    def summarize(self, word_freq, top=10):
+        """
+        Находит самые частые n-граммы и самые устойчивые биграммы.
+
+        Args:
+            word_freq: Частоты слов корпуса (Counter или скетч) — для PMI и G²
+            top (int): Сколько n-грамм возвращать в каждом списке
+
+        Returns:
+            dict: {'top': {n: [(n-грамма, частота)]},
+                   'pmi': [(биграмма, частота, PMI)],
+                   'log_likelihood': [(биграмма, частота, G²)]}
+        """
+        total = sum(word_freq.values()) if isinstance(word_freq, Mapping) else word_freq.total
+        top_by_order = {}
+        top_pmi = []
+        top_llr = []
+        for ngram, count in self.iter_counts():
+            words = ngram.split(' ')
+            heap = top_by_order.setdefault(len(words), [])
+            _push_top(heap, (count, ngram), top)
+            if len(words) != 2:
+                continue
+            first = word_frequency(word_freq, words[0])
+            second = word_frequency(word_freq, words[1])
+            _push_top(top_pmi, (pmi(count, first, second, total), count, ngram), top)
+            _push_top(top_llr, (log_likelihood(count, first, second, total), count, ngram), top)
+        return {
+            'top': {n: [(ngram, count) for count, ngram in sorted(heap, key=_by_score)]
+                    for n, heap in sorted(top_by_order.items())},
+            'pmi': [(ngram, count, round(score, 3)) for score, count, ngram in sorted(top_pmi, key=_by_score)],
+            'log_likelihood': [(ngram, count, round(score, 3))
+                               for score, count, ngram in sorted(top_llr, key=_by_score)],
+        }
+
+    def cleanup(self):
+        """Удаляет сброшенные на диск файлы."""
+        for path in self.spill_files:
+            if os.path.exists(path):
+                os.remove(path)
+        self.spill_files = []
+
+def _push_top(heap, item, size):
+    """Держит в куче size наибольших элементов."""
+    if len(heap) < size:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+def _by_score(item):
+    """Ключ сортировки: по убыванию чисел, при равенстве — n-граммы по алфавиту."""
+    return tuple(-value for value in item[:-1]) + (item[-1],)
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# Инструментирование конвейера анализа. По умолчанию выключено и почти
+# ничего не стоит; включается флагом --profile или регистрацией хука.
+# Каждое событие — словарь с ключами:
+#   name, category ('stage' или 'file'), start (секунды perf_counter),
+#   wall, cpu (секунды), peak_memory (байты, если включён tracemalloc),
+#   pid, tid и необязательные bytes_read, tokens. У событий файлов есть ещё
+#   фазы анализа (секунды): read_time — ожидание текста файла, clean_time —
+#   разбиение и очистка слов, count_time — подсчёт метрик и частот.
+
+PHASES = ('read_time', 'clean_time', 'count_time')
+
+# Пики памяти открытых замеров. tracemalloc хранит один пик на процесс, и
+# каждый замер сбрасывает его, поэтому перед сбросом пик запоминается во
+# внешнем замере, а при завершении внутреннего переносится в него же.
+_PEAK_STACK = []
+
+class Span:
+    """
+    Замер одного этапа или файла: время, процессорное время и пик памяти.
+    Пик памяти вложенных замеров (например, файлов внутри этапа) учитывается
+    и во внешнем замере.
+    """
+
+    def __init__(self, name, category, trace_memory=False):
+        self.name = name
+        self.category = category
+        self.trace_memory = trace_memory
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        if trace_memory:
+            if _PEAK_STACK:
+                # Сохраняем пик внешнего замера до сброса счётчика
+                _PEAK_STACK[-1] = max(_PEAK_STACK[-1], tracemalloc.get_traced_memory()[1])
+            self._depth = len(_PEAK_STACK)
+            _PEAK_STACK.append(0)
+            tracemalloc.reset_peak()
+
+    def finish(self, **extra):
+        """
+        Завершает замер.
+
+        Args:
+            **extra: Дополнительные поля события (bytes_read, tokens и т.п.)
+
+        Returns:
+            dict: Событие
+        """
+        peak_memory = None
+        if self.trace_memory:
+            # Вместе со своим снимаются и незавершённые вложенные замеры (после ошибки)
+            peak_memory = max([tracemalloc.get_traced_memory()[1]] + _PEAK_STACK[self._depth:])
+            del _PEAK_STACK[self._depth:]
+            if _PEAK_STACK:
+                _PEAK_STACK[-1] = max(_PEAK_STACK[-1], peak_memory)
+        event = {
+            'name': self.name,
+            'category': self.category,
+            'start': self.start,
+            'wall': time.perf_counter() - self.start,
+            'cpu': time.process_time() - self.cpu_start,
+            'peak_memory': peak_memory,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        event.update(extra)
+        return event
+
+def timed(iterable, timings, key):
+    """
+    Перебирает iterable, прибавляя к timings[key] время ожидания каждого
+    элемента (например, чтения очередной части файла), но не его обработки.
+
+    Args:
+        iterable: Источник элементов
+        timings (dict): Словарь замеров
+        key (str): Ключ, к которому прибавляется время
+
+    Yields:
+        Элементы iterable
+    """
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timings[key] += time.perf_counter() - started
+            return
+        timings[key] += time.perf_counter() - started
+        yield item
+
+class Profiler:
+    """
+    Собирает события этапов и файлов и передаёт их зарегистрированным хукам.
+
+    Attributes:
+        enabled (bool): Сохранять ли события (включается флагом --profile)
+        trace_memory (bool): Замерять ли пик памяти через tracemalloc
+        events (list): Собранные события
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.events = []
+        self.hooks = []
+
+    @property
+    def active(self):
+        """bool: Нужно ли вообще делать замеры (включён профиль или есть хуки)."""
+        return self.enabled or bool(self.hooks)
+
+    def enable(self, trace_memory=True):
+        """
+        Включает сбор событий.
+
+        Args:
+            trace_memory (bool): Замерять пик памяти (tracemalloc замедляет работу)
+        """
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def register_hook(self, callback):
+        """
+        Регистрирует функцию, которая вызывается для каждого события.
+
+        Args:
+            callback (callable): Функция от одного аргумента — словаря события
+        """
+        self.hooks.append(callback)
+
+    def unregister_hook(self, callback):
+        """
+        Удаляет ранее зарегистрированный хук.
+
+        Args:
+            callback (callable): Функция, переданная в register_hook
+        """
+        if callback in self.hooks:
+            self.hooks.remove(callback)
+
+    def add_event(self, event):
+        """
+        Добавляет готовое событие (например, присланное процессом-воркером).
+
+        Args:
+            event (dict): Событие
+        """
+        if self.enabled:
+            self.events.append(event)
+        for hook in self.hooks:
+            hook(event)
+
+    @contextmanager
+    def stage(self, name, **extra):
+        """
+        Замеряет этап конвейера: with PROFILER.stage('reading'): ...
+
+        Пик памяти вложенных этапов и файлов учитывается и во внешнем этапе.
+
+        Args:
+            name (str): Название этапа
+            **extra: Дополнительные поля события
+
+        Yields:
+            dict: Словарь, в который этап может дописать поля (bytes_read, tokens)
+        """
+        if not self.active:
+            yield {}
+            return
+        span = Span(name, 'stage', self.trace_memory and tracemalloc.is_tracing())
+        fields = dict(extra)
+        try:
+            yield fields
+        finally:
+            self.add_event(span.finish(**fields))
+
+    def slowest_files(self, n=10):
+        """
+        Возвращает самые медленные файлы.
+
+        Args:
+            n (int): Сколько файлов вернуть
+
+        Returns:
+            list: События файлов, отсортированные по убыванию времени
+        """
+        file_events = [event for event in self.events if event['category'] == 'file']
+        return sorted(file_events, key=lambda event: event['wall'], reverse=True)[:n]
+
+    def save_chrome_trace(self, filepath):
+        """
+        Сохраняет события в формате Chrome Trace (открывается в chrome://tracing
+        или https://ui.perfetto.dev).
+
+        Args:
+            filepath (str): Путь к JSON-файлу
+
+        Returns:
+            bool: True, если запись прошла успешно, иначе False
+        """
+        origin = min((event['start'] for event in self.events), default=0.0)
+        trace_events = []
+        for event in self.events:
+            args = {key: value for key, value in event.items()
+                    if key not in ('name', 'category', 'start', 'wall', 'pid', 'tid')}
+            trace_events.append({
+                'name': event['name'],
+                'cat': event['category'],
+                'ph': 'X',  # Событие с длительностью
+                'ts': round((event['start'] - origin) * 1e6, 3),  # Микросекунды
+                'dur': round(event['wall'] * 1e6, 3),
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': args,
+            })
+        folder = os.path.dirname(filepath)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        try:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"Ошибка при записи профиля {filepath}: {e}")
+            return False
+
+    def print_summary(self, top=10):
+        """
+        Выводит время этапов и самые медленные файлы.
+
+        Args:
+            top (int): Сколько самых медленных файлов показать
+        """
+        print("\n⏱ Профиль этапов:")
+        for event in self.events:
+            if event['category'] != 'stage':
+                continue
+            line = f"   {event['name']}: {event['wall'] * 1000:.1f} мс (CPU {event['cpu'] * 1000:.1f} мс)"
+            if event.get('peak_memory') is not None:
+                line += f", пик памяти {event['peak_memory'] / (1024 * 1024):.2f} МБ"
+            print(line)
+        file_events = [event for event in self.events if event['category'] == 'file']
+        if file_events:
+            totals = [sum(event.get(phase, 0.0) for event in file_events) * 1000 for phase in PHASES]
+            print("   фазы анализа файлов: чтение {:.1f} мс, очистка {:.1f} мс, подсчёт {:.1f} мс".format(*totals))
+        slowest = self.slowest_files(top)
+        if slowest:
+            print(f"\n🐢 Самые медленные файлы (топ-{len(slowest)}):")
+            for event in slowest:
+                print(f"   {event['name']}: {event['wall'] * 1000:.2f} мс, "
+                      f"{event.get('bytes_read', 0)} байт, {event.get('tokens', 0)} слов")
+
+# Общий профайлер конвейера: хуки регистрируются через PROFILER.register_hook
+PROFILER = Profiler()
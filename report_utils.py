@@ -0,0 +1,509 @@
+import os
+import json
+import hashlib
+from html import escape
+from string import Template
+from diversity_utils import MATTR_WINDOW
+from facet_utils import describe_group
+from cache_utils import file_content_hash
+
+# Отчёты по результатам анализа: results/report.txt и страницы html/.
+#
+# Все сводные величины (суммы, средние, максимумы и минимумы) считаются
+# одним проходом по таблице в summarize_results. Дальше и текстовый отчёт,
+# и HTML-страницы пишутся из этой сводки построчно прямо в файл, без сборки
+# всего отчёта в памяти. Большие таблицы разбиваются на страницы, и для
+# каждой страницы запоминается отпечаток её входных данных (html/.pages.json):
+# при следующем запуске перезаписываются только страницы, входные данные
+# которых изменились.
+
+# Увеличивается при изменении шаблонов, чтобы все страницы перерисовались
+HTML_TEMPLATE_VERSION = 2
+STATISTICS_PAGE_SIZE = 500
+TEXTS_PAGE_SIZE = 100
+
+def summarize_results(results, metadata=None):
+    """
+    Считает все сводные величины для отчётов за один проход по результатам.
+
+    Args:
+        results (StatsTable | list): Результаты анализа (строки — словари)
+        metadata (list): Список словарей с метаданными о текстах
+
+    Returns:
+        dict: total_files, total_words, total_unique, avg_ttr, avg_mattr, avg_mtld, avg_hdd,
+              max_ttr, min_ttr, max_mtld, min_mtld (строки-словари), metadata_map,
+              word_freq, ngram_summary, facets и duplicates (если есть у таблицы)
+    """
+    # Создаём словарь метаданных для быстрого поиска по имени файла
+    metadata_map = {}
+    if metadata:
+        try:
+            for item in metadata:
+                if 'filename' in item:
+                    metadata_map[item['filename']] = item
+        except Exception as e:
+            print(f"Внимание: Ошибка при обработке метаданных: {e}")
+
+    total_files = total_words = total_unique = 0
+    sum_ttr = sum_mattr = sum_mtld = sum_hdd = 0
+    max_ttr = min_ttr = max_mtld = min_mtld = None
+    for result in results:
+        total_files += 1
+        total_words += result.get('word_count', 0)
+        total_unique += result.get('words_ucount', 0)
+        ttr = result.get('ttr_count', 0)
+        mtld = result.get('mtld_count', 0)
+        sum_ttr += ttr
+        sum_mattr += result.get('mattr_count', 0)
+        sum_mtld += mtld
+        sum_hdd += result.get('hdd_count', 0)
+        # Строгие сравнения: при равенстве остаётся первый файл, как у max() и min()
+        if max_ttr is None or ttr > max_ttr.get('ttr_count', 0):
+            max_ttr = result
+        if min_ttr is None or ttr < min_ttr.get('ttr_count', 0):
+            min_ttr = result
+        if max_mtld is None or mtld > max_mtld.get('mtld_count', 0):
+            max_mtld = result
+        if min_mtld is None or mtld < min_mtld.get('mtld_count', 0):
+            min_mtld = result
+
+    def average(total):
+        return total / total_files if total_files else 0
+
+    return {
+        'total_files': total_files,
+        'total_words': total_words,
+        'total_unique': total_unique,
+        'avg_ttr': average(sum_ttr),
+        # Меры разнообразия, которые не зависят от длины текста, — их среднее по файлам корректно
+        'avg_mattr': average(sum_mattr),
+        'avg_mtld': average(sum_mtld),
+        'avg_hdd': average(sum_hdd),
+        'max_ttr': max_ttr,
+        'min_ttr': min_ttr,
+        'max_mtld': max_mtld,
+        'min_mtld': min_mtld,
+        'metadata_map': metadata_map,
+        'word_freq': getattr(results, 'word_freq', None),
+        'ngram_summary': getattr(results, 'ngram_summary', None),
+        'facets': getattr(results, 'facets', None),
+        'duplicates': getattr(results, 'duplicates', None),
+    }
+
+def describe_ttr(avg_ttr):
+    """Словесная оценка среднего TTR."""
+    return 'высокое' if avg_ttr > 0.6 else 'среднее' if avg_ttr > 0.4 else 'низкое'
+
+def write_text_report(out, results, summary):
+    """
+    Пишет текстовый отчёт построчно в открытый файл (или io.StringIO).
+
+    Args:
+        out: Объект с методом write
+        results (StatsTable | list): Результаты анализа (строки — словари)
+        summary (dict): Сводка из summarize_results
+    """
+    first_line = True
+
+    def line(text=''):
+        # Строки разделяются переводом строки, в конце отчёта его нет
+        nonlocal first_line
+        out.write(text if first_line else '\n' + text)
+        first_line = False
+
+    line("=" * 70)
+    line("📊 ОТЧЁТ ПО АНАЛИЗУ КОРПУСА ТЕКСТОВ")
+    line("=" * 70)
+
+    # ========== ОБЩАЯ СТАТИСТИКА ==========
+    line("\n📈 ОБЩАЯ СТАТИСТИКА:")
+    line("-" * 70)
+    line(f"  Всего текстов в корпусе: {summary['total_files']}")
+    line(f"  Всего слов: {summary['total_words']}")
+    line(f"  Всего уникальных слов: {summary['total_unique']}")
+    line(f"  Средний Type-Token Ratio (TTR): {round(summary['avg_ttr'], 3)}")
+    line(f"  Средний MATTR (окно {MATTR_WINDOW} слов): {round(summary['avg_mattr'], 3)}")
+    line(f"  Средний MTLD: {round(summary['avg_mtld'], 3)}")
+    line(f"  Средний HD-D: {round(summary['avg_hdd'], 3)}")
+
+    # ========== ДЕТАЛЬНАЯ СТАТИСТИКА ==========
+    line("\n📄 ДЕТАЛЬНАЯ СТАТИСТИКА ПО ФАЙЛАМ:")
+    line("-" * 70)
+    metadata_map = summary['metadata_map']
+    for i, result in enumerate(results, start=1):
+        filename = result.get('filename', f'Файл_{i}')
+        meta = metadata_map.get(filename, {})
+        line(f"\n{i}. {filename}")
+        line(f"   Название: {meta.get('title', 'Неизвестно')}")
+        line(f"   Автор: {meta.get('author', 'Неизвестен')}")
+        line(f"   Год: {meta.get('year', 'N/A')}")
+        line(f"   Слов: {result.get('word_count', 'N/A')}")
+        line(f"   Уникальных слов: {result.get('words_ucount', 'N/A')}")
+        line(f"   TTR: {result.get('ttr_count', 0):.3f}")
+        line(f"   MATTR: {result.get('mattr_count', 0):.3f}")
+        line(f"   MTLD: {result.get('mtld_count', 0):.3f}")
+        line(f"   HD-D: {result.get('hdd_count', 0):.3f}")
+
+    # ========== ПО ГОДАМ, АВТОРАМ И ПЕРИОДАМ ==========
+    facets = summary['facets']
+    if facets:
+        line("\n🗂 ПО ГОДАМ, АВТОРАМ И ПЕРИОДАМ:")
+        line("-" * 70)
+        for facet, title in (('year', 'По годам'), ('years', 'По периодам'), ('author', 'По авторам')):
+            line(f"\n  {title}:")
+            for key, group in facets.groups(facet):
+                line(f"   • {describe_group(key, group)}")
+
+    # ========== ВАРИАНТЫ И ПЕРЕПЕЧАТКИ ==========
+    duplicates = summary['duplicates']
+    if duplicates:
+        line("\n🪞 ПОЧТИ ОДИНАКОВЫЕ ТЕКСТЫ (MinHash, оценка коэффициента Жаккара):")
+        line("-" * 70)
+        for cluster in duplicates:
+            line(f"   • {cluster['representative']}")
+            for name, jaccard in cluster['members']:
+                line(f"       ≈ {name} — {jaccard:.3f}")
+
+    # ========== СЛОВОСОЧЕТАНИЯ ==========
+    ngram_summary = summary['ngram_summary']
+    if ngram_summary:
+        line("\n🔗 СЛОВОСОЧЕТАНИЯ:")
+        line("-" * 70)
+        for n, top_ngrams in ngram_summary['top'].items():
+            line(f"\n  Частые {n}-граммы:")
+            for ngram, count in top_ngrams:
+                line(f"   • {ngram} — {count}")
+        line("\n  Устойчивые биграммы (PMI):")
+        for ngram, count, score in ngram_summary['pmi']:
+            line(f"   • {ngram} — PMI = {score:.3f} (встречается {count} раз)")
+        line("\n  Устойчивые биграммы (логарифмическое правдоподобие G²):")
+        for ngram, count, score in ngram_summary['log_likelihood']:
+            line(f"   • {ngram} — G² = {score:.3f} (встречается {count} раз)")
+
+    # ========== ВЫВОДЫ ==========
+    line("\n" + "=" * 70)
+    line("📌 ВЫВОДЫ И ИНТЕРПРЕТАЦИЯ:")
+    line("=" * 70)
+
+    if summary['total_files']:
+        max_ttr, min_ttr = summary['max_ttr'], summary['min_ttr']
+        max_mtld, min_mtld = summary['max_mtld'], summary['min_mtld']
+        line("\n1. Лексическое разнообразие:")
+        line(f"   • Максимальное разнообразие: {max_ttr.get('filename', 'N/A')} "
+             f"(TTR = {max_ttr.get('ttr_count', 0):.3f})")
+        line(f"   • Минимальное разнообразие: {min_ttr.get('filename', 'N/A')} "
+             f"(TTR = {min_ttr.get('ttr_count', 0):.3f})")
+        # TTR падает с длиной текста, поэтому сравниваем ещё и по MTLD
+        line(f"   • С поправкой на длину текста (MTLD) максимальное разнообразие: "
+             f"{max_mtld.get('filename', 'N/A')} (MTLD = {max_mtld.get('mtld_count', 0):.3f}), "
+             f"минимальное: {min_mtld.get('filename', 'N/A')} "
+             f"(MTLD = {min_mtld.get('mtld_count', 0):.3f})")
+
+    avg_ttr = summary['avg_ttr']
+    line("\n2. Общие наблюдения:")
+    line(f"   • Средний TTR всего корпуса составляет {round(avg_ttr, 3)}, "
+         f"что указывает на {describe_ttr(avg_ttr)} лексическое разнообразие текстов.")
+    line(f"   • Всего в корпусе проанализировано {summary['total_words']} слов "
+         f"и найдено {summary['total_unique']} уникальных слов.")
+
+# ---------- HTML ----------
+
+# Оформление и меню — как у страниц сайта, которые раньше правились вручную
+PAGE_TEMPLATE = Template('''<!doctype html>
+<html lang="ru">
+
+<head>
+    <meta charset="utf-8">
+    <meta content="width=device-width, initial-scale=1" name="viewport">
+    <title>$title</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet"
+        integrity="sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH" crossorigin="anonymous">
+    <style>
+        .csv-table {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 20px 0;
+        }
+        .csv-table th, .csv-table td {
+            border: 1px solid #ddd;
+            padding: 12px;
+            text-align: left;
+        }
+        .csv-table th {
+            background-color:blue;
+            color: white;
+            font-weight: bold;
+        }
+        .csv-table tr:nth-child(even) {
+            background-color: #f2f2f2;
+        }
+        .csv-table tr:hover {
+            background-color: #ddd;
+        }
+        .table-container {
+            overflow-x: auto;
+            margin: 20px 0;
+        }
+        .text-file {
+            background: #f8f9fa;
+            padding: 20px;
+            margin: 20px 0;
+            border-radius: 10px;
+            border-left: 5px solid blue;
+        }
+        .file-title {
+            color: #2c3e50;
+            border-bottom: 2px solid #3498db;
+            padding-bottom: 10px;
+            margin-bottom: 15px;
+        }
+        .file-content {
+            white-space: pre-wrap;
+            font-family: 'Courier New', monospace;
+            line-height: 1.6;
+        }
+    </style>
+</head>
+
+<body>
+    <div class="container" style="color: blue; font-family: 'Roboto Mono', monospace;">
+        <header class="card card-header" style="background-color:lightskyblue;">
+            <div class="card-body">
+                <h3 class="card-title text-center" id="start">Анализ корпуса текстов<br>В.Ходасевича</h3>
+            </div>
+        </header>
+
+        <div class="card text-center" style="font-size: 20px;">
+            <div class="card-header" style="background-color: rgb(7, 132, 234);">
+                <ul class="nav nav-pills card-header-pills">
+                    <li class="nav-item">
+                        <a class="nav-link" style="color: white;" href="../index.html">О проекте</a>
+                    </li>
+                    <li class="nav-item">
+                        <a class="nav-link" style="color: white;" href="metadata.html">Метаданные</a>
+                    </li>
+                    <li class="nav-item">
+                        <a class="nav-link" style="color: white;" href="statistics.html">Статистика</a>
+                    </li>
+                    <li class="nav-item">
+                        <a class="nav-link" style="color: white;" href="results.html">Результаты</a>
+                    </li>
+                    <li class="nav-item">
+                        <a class="nav-link" style="color: white;" href="texts.html">Тексты</a>
+                    </li>
+                </ul>
+            </div>
+        </div>
+
+        <div class="container" style="font-size: 20px; line-height: 1.6; padding: 20px; background-color:whitesmoke;">
+            <h4 class="text-center mb-4">$heading</h4>
+$pager
+$content
+$pager
+        </div>
+    </div>
+</body>
+</html>
+''')
+
+STATISTICS_COLUMNS = ['filename', 'word_count', 'words_ucount', 'lines_count', 'ttr_count',
+                      'mattr_count', 'mtld_count', 'hdd_count']
+
+def page_filename(name, number):
+    """Имя файла страницы: name.html для первой, name_N.html для остальных."""
+    return f"{name}.html" if number == 1 else f"{name}_{number}.html"
+
+def render_pager(name, number, page_count):
+    """Ссылки на страницы раздела (пусто, если страница одна)."""
+    if page_count <= 1:
+        return ''
+    items = []
+    for other in range(1, page_count + 1):
+        active = ' active' if other == number else ''
+        items.append(f'<li class="page-item{active}">'
+                     f'<a class="page-link" href="{page_filename(name, other)}">{other}</a></li>')
+    return f'            <ul class="pagination flex-wrap justify-content-center">{"".join(items)}</ul>'
+
+def write_page(filepath, title, heading, pager, write_content):
+    """
+    Пишет страницу по шаблону: заголовок и меню, затем содержимое
+    функцией write_content(f) построчно, затем окончание страницы.
+    Файл подменяется целиком, чтобы не оставить его наполовину записанным.
+    """
+    head, tail = PAGE_TEMPLATE.safe_substitute(title=escape(title), heading=escape(heading),
+                                               pager=pager).split('$content')
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(head)
+        write_content(f)
+        f.write(tail)
+    os.replace(tmp_path, filepath)
+
+def write_escaped_file(out, filepath, block_size=64 * 1024):
+    """
+    Переписывает текстовый файл в страницу целиком, по частям и с
+    экранированием HTML, не загружая его в память.
+
+    Args:
+        out: Объект с методом write
+        filepath (str): Путь к файлу
+        block_size (int): Размер части в символах
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for block in iter(lambda: f.read(block_size), ''):
+                out.write(escape(block))
+    except (OSError, UnicodeDecodeError) as e:
+        out.write(escape(f"Ошибка чтения файла: {e}"))
+
+def file_state(filepath):
+    """
+    Хэш содержимого файла (None, если файла нет) — для отпечатка страницы.
+    Время изменения не учитывается: после git clone оно у всех файлов новое,
+    а страницы от этого меняться не должны.
+    """
+    try:
+        return file_content_hash(filepath)
+    except OSError:
+        return None
+
+def fingerprint(inputs):
+    """Отпечаток входных данных страницы."""
+    data = json.dumps([HTML_TEMPLATE_VERSION, inputs], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def load_manifest(path):
+    """Загружает отпечатки страниц (пустой словарь, если их нет)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def render_html_site(results, summary, html_folder='html', corpus_folder='corpus',
+                     report_path='results/report.txt', statistics_page_size=STATISTICS_PAGE_SIZE, texts_page_size=TEXTS_PAGE_SIZE):
+    """
+    Перерисовывает страницы statistics, texts и results из той же сводки,
+    что и текстовый отчёт. Страница пишется, только если её входные данные
+    изменились с прошлого запуска (или файла страницы нет).
+
+    Args:
+        results (StatsTable | list): Результаты анализа (строки — словари)
+        summary (dict): Сводка из summarize_results
+        html_folder (str): Папка сайта
+        corpus_folder (str): Папка с текстами (тексты целиком на страницах texts)
+        report_path (str): Текстовый отчёт, который встраивается в страницу results
+        statistics_page_size (int): Строк таблицы на странице статистики
+        texts_page_size (int): Текстов на странице texts
+
+    Returns:
+        tuple: (сколько страниц записано, сколько оставлено без изменений)
+    """
+    os.makedirs(html_folder, exist_ok=True)
+    manifest_path = os.path.join(html_folder, '.pages.json')
+    old_manifest = load_manifest(manifest_path)
+    manifest = {}
+    written = skipped = 0
+
+    def publish(page, inputs, title, heading, pager, write_content):
+        nonlocal written, skipped
+        filepath = os.path.join(html_folder, page)
+        manifest[page] = fingerprint(inputs)
+        if old_manifest.get(page) == manifest[page] and os.path.exists(filepath):
+            skipped += 1
+            return
+        write_page(filepath, title, heading, pager, write_content)
+        written += 1
+
+    rows = [[result.get(column, '') for column in STATISTICS_COLUMNS] for result in results]
+
+    # Таблица метрик
+    page_count = max(1, -(-len(rows) // statistics_page_size))
+    for number in range(1, page_count + 1):
+        page_rows = rows[(number - 1) * statistics_page_size:number * statistics_page_size]
+
+        def write_table(f, page_rows=page_rows):
+            f.write('            <div class="table-container">\n')
+            f.write('                <table id="csv-table" class="csv-table">\n')
+            f.write('                    <thead><tr>'
+                    + ''.join(f'<th>{column}</th>' for column in STATISTICS_COLUMNS) + '</tr></thead>\n')
+            f.write('                    <tbody>\n')
+            for row in page_rows:
+                f.write('                    <tr>' + ''.join(f'<td>{escape(str(value))}</td>' for value in row)
+                        + '</tr>\n')
+            f.write('                    </tbody>\n                </table>\n            </div>')
+
+        publish(page_filename('statistics', number), [page_count, page_rows],
+                'Общая статистика', 'Статистика по метрикам',
+                render_pager('statistics', number, page_count), write_table)
+
+    # Тексты целиком с метаданными и метриками
+    metadata_map = summary['metadata_map']
+    page_count = max(1, -(-len(rows) // texts_page_size))
+    for number in range(1, page_count + 1):
+        page_rows = rows[(number - 1) * texts_page_size:number * texts_page_size]
+        inputs = [page_count]
+        for row in page_rows:
+            inputs.append([row, metadata_map.get(row[0]), file_state(os.path.join(corpus_folder, row[0]))])
+
+        def write_texts(f, page_rows=page_rows):
+            for row in page_rows:
+                filename = row[0]
+                meta = metadata_map.get(filename, {})
+                f.write('            <div class="text-file">\n')
+                f.write(f'                <h3 class="file-title">{escape(str(meta.get("title", filename)))}</h3>\n')
+                f.write(f'                <p class="text-muted">{escape(filename)} · '
+                        f'{escape(str(meta.get("author", "Неизвестен")))} · {escape(str(meta.get("year", "N/A")))} · '
+                        f'слов: {row[1]}, TTR {row[4]}, MATTR {row[5]}, MTLD {row[6]}, HD-D {row[7]}</p>\n')
+                f.write('                <div class="file-content">')
+                write_escaped_file(f, os.path.join(corpus_folder, filename))
+                f.write('</div>\n')
+                f.write('            </div>\n')
+
+        publish(page_filename('texts', number), inputs, 'Корпус текстов', 'Корпус текстов В. Ходасевича',
+                render_pager('texts', number, page_count), write_texts)
+
+    # Итоги: сводка и самые частые слова и словосочетания
+    word_freq = summary['word_freq']
+    top_words = word_freq.most_common(5) if word_freq else []
+    ngram_summary = summary['ngram_summary']
+    totals = {key: summary[key] for key in ('total_files', 'total_words', 'total_unique',
+                                            'avg_ttr', 'avg_mattr', 'avg_mtld', 'avg_hdd')}
+
+    def write_results(f):
+        f.write('            <ul class="list-group">\n')
+        for label, value in (('Всего текстов в корпусе', totals['total_files']),
+                             ('Всего слов', totals['total_words']),
+                             ('Всего уникальных слов', totals['total_unique']),
+                             ('Средний TTR', round(totals['avg_ttr'], 3)),
+                             (f'Средний MATTR (окно {MATTR_WINDOW} слов)', round(totals['avg_mattr'], 3)),
+                             ('Средний MTLD', round(totals['avg_mtld'], 3)),
+                             ('Средний HD-D', round(totals['avg_hdd'], 3))):
+            f.write(f'                <li class="list-group-item">{escape(label)}: {value}</li>\n')
+        f.write('            </ul>\n')
+        f.write(f'            <p class="mt-3">Наиболее употребляемые слова во всём корпусе: '
+                f'{escape(", ".join(f"{word} ({count})" for word, count in top_words))}</p>\n')
+        if ngram_summary:
+            bigrams = ngram_summary['top'].get(2, [])
+            f.write(f'            <p>Наиболее частые словосочетания: '
+                    f'{escape(", ".join(f"{ngram} ({count})" for ngram, count in bigrams))}</p>\n')
+            f.write(f'            <p>Устойчивые словосочетания (G²): '
+                    f'{escape(", ".join(ngram for ngram, _, _ in ngram_summary["log_likelihood"]))}</p>\n')
+        # Полный отчёт — как раньше на этой странице, но без загрузки через fetch
+        f.write('            <pre class="file-content mt-4">')
+        write_escaped_file(f, report_path)
+        f.write('</pre>')
+
+    # report.txt перезаписывается при каждом запуске, поэтому отпечаток — по содержимому
+    publish('results.html', [totals, top_words, ngram_summary, file_state(report_path)], 'Результаты', 'Результаты анализа', '',
+            write_results)
+
+    # Удаляем страницы, которые остались от корпуса большего размера
+    for page in old_manifest:
+        if page not in manifest and os.path.exists(os.path.join(html_folder, page)):
+            os.remove(os.path.join(html_folder, page))
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    return written, skipped
@@ -0,0 +1,124 @@
+from array import array
+from collections import Counter
+from file_utils import iter_csv_rows, write_csv_file, STATISTICS_SCHEMA
+
+# Типы столбцов схемы -> способ хранения столбца в памяти.
+# Числа лежат в array (8 байт на значение), а не в списке объектов int/float.
+COLUMN_TYPECODES = {int: 'q', float: 'd'}
+
+class StatsTable:
+    """
+    Таблица метрик по файлам, хранящаяся по столбцам.
+
+    Передаётся из analyze_corpus прямо в вывод и в generate_report,
+    поэтому statistics.csv больше не нужно перечитывать между этапами:
+    CSV — только экспорт (to_csv) и загрузка сохранённых результатов (from_csv).
+
+    Attributes:
+        schema (dict): Столбец -> тип (по умолчанию STATISTICS_SCHEMA)
+        columns (dict): Столбец -> array или list значений
+        word_freq (Counter): Частоты слов во всём корпусе (если считались)
+        ngram_summary (dict): Сводка CorpusNgrams.summarize по словосочетаниям
+                              (None, если словосочетания не считались)
+        facets (FacetIndex): Итоги по годам, авторам и периодам (None, если не считались)
+        duplicates (list): Группы почти одинаковых текстов из dedup_utils.find_near_duplicates
+                           (None, если не искались)
+        invalid_values (int): Сколько неразобранных чисел from_csv заменил значением по умолчанию
+    """
+
+    def __init__(self, schema=None):
+        self.schema = dict(schema or STATISTICS_SCHEMA)
+        self.columns = {}
+        for column, column_type in self.schema.items():
+            typecode = COLUMN_TYPECODES.get(column_type)
+            self.columns[column] = array(typecode) if typecode else []
+        self.word_freq = Counter()
+        self.ngram_summary = None
+        self.facets = None
+        self.duplicates = None
+        self.invalid_values = 0
+
+    def append(self, row):
+        """
+        Добавляет строку метрик.
+
+        Args:
+            row (list): Значения в порядке столбцов схемы
+        """
+        for values, value in zip(self.columns.values(), row):
+            values.append(value)
+
+    def __len__(self):
+        return len(self.columns[next(iter(self.columns))])
+
+    def column(self, name):
+        """
+        Возвращает столбец целиком.
+
+        Args:
+            name (str): Имя столбца
+
+        Returns:
+            array | list: Значения столбца
+        """
+        return self.columns[name]
+
+    def rows(self):
+        """
+        Перебирает строки как списки значений (в порядке столбцов схемы).
+
+        Yields:
+            list: Строка таблицы
+        """
+        for row in zip(*self.columns.values()):
+            yield list(row)
+
+    def __iter__(self):
+        """Перебирает строки как словари — так с таблицей работает generate_report."""
+        names = list(self.columns)
+        for row in zip(*self.columns.values()):
+            yield dict(zip(names, row))
+
+    def to_csv(self, filepath):
+        """
+        Экспортирует таблицу в CSV-файл.
+
+        Args:
+            filepath (str): Путь к CSV-файлу
+
+        Returns:
+            bool: True, если запись прошла успешно, иначе False
+        """
+        return write_csv_file(filepath, list(self.columns), self.rows())
+
+    @classmethod
+    def from_csv(cls, filepath, schema=None):
+        """
+        Загружает таблицу из CSV-файла, сохранённого to_csv.
+
+        Числовые столбцы хранятся в array, поэтому число, которое не удалось
+        разобрать, заменяется значением по умолчанию для типа (0 или 0.0), как
+        пустое значение в parse_csv_row. О каждой такой ячейке выводится
+        предупреждение, а их количество сохраняется в invalid_values.
+
+        Args:
+            filepath (str): Путь к CSV-файлу
+            schema (dict): Столбец -> тип (по умолчанию STATISTICS_SCHEMA)
+
+        Returns:
+            StatsTable: Таблица (пустая, если файла нет)
+        """
+        table = cls(schema)
+        numeric = [column for column, column_type in table.schema.items() if column_type in COLUMN_TYPECODES]
+        for line, row in enumerate(iter_csv_rows(filepath, table.schema), start=2):
+            for column in numeric:
+                if isinstance(row[column], str):
+                    default = table.schema[column]()
+                    print(f"⚠ {filepath}, строка {line}: неверное значение {column}={row[column]!r}, "
+                          f"используется {default}")
+                    row[column] = default
+                    table.invalid_values += 1
+            table.append([row[column] for column in table.columns])
+        if table.invalid_values:
+            print(f"⚠ {filepath}: заменено неверных значений: {table.invalid_values}")
+        return table
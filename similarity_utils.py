@@ -0,0 +1,179 @@
+import os
+from array import array
+from collections import Counter
+from file_utils import get_files_in_folder, read_text_chunks, read_csv_file, METADATA_SCHEMA
+from vocab_utils import Vocabulary, encode_text, count_ids, to_numpy
+
+# Матрица «документ x слово», TF-IDF и косинусная близость текстов.
+# Нужен NumPy; если установлен SciPy, матрица хранится разреженной (CSR),
+# иначе — плотным массивом NumPy. Близость считается блоками строк
+# матричным умножением, без циклов Python по парам документов.
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # pragma: no cover - зависит от окружения
+    sparse = None
+
+def _require_numpy():
+    """Проверяет, что NumPy установлен."""
+    if np is None:
+        raise ImportError("Для матрицы близости нужен NumPy: pip install numpy (и по желанию scipy)")
+
+def build_term_document_matrix(corpus_folder, vocabulary=None):
+    """
+    Строит матрицу частот «документ x слово» по всем текстам папки.
+
+    Слова очищаются так же, как в остальном анализе (text_utils.tokenize:
+    без знаков препинания, стоп-слов и чисел).
+
+    Args:
+        corpus_folder (str): Путь к папке с текстами
+        vocabulary (Vocabulary): Общий словарь (по умолчанию создаётся новый)
+
+    Returns:
+        tuple: (матрица n_docs x n_terms — scipy CSR или numpy.ndarray,
+                список имён файлов, Vocabulary)
+    """
+    _require_numpy()
+    vocabulary = vocabulary or Vocabulary()
+    files = sorted(get_files_in_folder(corpus_folder, '.txt'))
+
+    # Сразу собираем массивы формата CSR: indptr, indices, data
+    indptr = array('q', [0])
+    indices = array('I')
+    counts = array('I')
+    for filename in files:
+        doc_counts = Counter()
+        for chunk in read_text_chunks(os.path.join(corpus_folder, filename)):
+            doc_counts.update(count_ids(encode_text(chunk, vocabulary)))
+        for term_id in sorted(doc_counts):
+            indices.append(term_id)
+            counts.append(doc_counts[term_id])
+        indptr.append(len(indices))
+
+    shape = (len(files), len(vocabulary))
+    data = to_numpy(counts).astype(np.float64)
+    index_array = to_numpy(indices).astype(np.int64)
+    indptr_array = np.frombuffer(indptr, dtype=np.int64)
+    if sparse is not None:
+        matrix = sparse.csr_matrix((data, index_array, indptr_array), shape=shape)
+    else:
+        matrix = np.zeros(shape)
+        rows = np.repeat(np.arange(shape[0]), np.diff(indptr_array))
+        matrix[rows, index_array] = data
+    return matrix, files, vocabulary
+
+def tfidf(matrix):
+    """
+    Переводит частоты в TF-IDF и нормирует строки (длина вектора = 1).
+
+    IDF сглаженный: ln((1 + n_docs) / (1 + df)) + 1.
+
+    Args:
+        matrix: Матрица частот из build_term_document_matrix
+
+    Returns:
+        Матрица того же типа с нормированными TF-IDF весами
+    """
+    _require_numpy()
+    n_docs = matrix.shape[0]
+    if sparse is not None and sparse.issparse(matrix):
+        df = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+        weighted = matrix.multiply(idf).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ weighted
+    df = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+    weighted = matrix * idf
+    norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return weighted / norms
+
+def cosine_similarity(weights):
+    """
+    Полная матрица косинусной близости (для небольших корпусов).
+
+    Args:
+        weights: Нормированная матрица из tfidf
+
+    Returns:
+        numpy.ndarray: Матрица n_docs x n_docs
+    """
+    _require_numpy()
+    product = weights @ weights.T
+    return product.toarray() if sparse is not None and sparse.issparse(product) else np.asarray(product)
+
+def nearest_neighbours(weights, k=5, block_size=1024):
+    """
+    Находит для каждого документа k самых близких по косинусу.
+
+    Близость считается блоками по block_size строк, поэтому в памяти
+    никогда не лежит вся матрица n_docs x n_docs.
+
+    Args:
+        weights: Нормированная матрица из tfidf
+        k (int): Сколько соседей искать
+        block_size (int): Сколько документов обрабатывать за одно умножение
+
+    Returns:
+        list: Для каждого документа — список пар (номер соседа, близость) по убыванию
+    """
+    _require_numpy()
+    n_docs = weights.shape[0]
+    k = min(k, n_docs - 1)
+    if k <= 0:
+        return [[] for _ in range(n_docs)]
+    transposed = weights.T
+    neighbours = []
+    for start in range(0, n_docs, block_size):
+        block = weights[start:start + block_size] @ transposed
+        block = block.toarray() if sparse is not None and sparse.issparse(block) else np.asarray(block)
+        rows = np.arange(block.shape[0])
+        block[rows, rows + start] = -np.inf  # Документ не сосед самому себе
+        # argpartition выбирает k лучших за линейное время, сортируем только их
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for doc_top, doc_scores in zip(top, top_scores):
+            neighbours.append([(int(j), round(float(score), 3)) for j, score in zip(doc_top, doc_scores)])
+    return neighbours
+
+def find_similar_texts(corpus_folder, metadata_path='data/metadata.csv', k=3):
+    """
+    Находит ближайшие по TF-IDF тексты и добавляет названия и годы из метаданных.
+
+    Args:
+        corpus_folder (str): Путь к папке с текстами
+        metadata_path (str): Путь к metadata.csv
+        k (int): Сколько соседей искать
+
+    Returns:
+        list: Словари с ключами filename, title, year, neighbours;
+              neighbours — список словарей filename, title, year, similarity
+    """
+    matrix, files, _ = build_term_document_matrix(corpus_folder)
+    neighbours = nearest_neighbours(tfidf(matrix), k)
+    metadata_map = {row['filename']: row for row in read_csv_file(metadata_path, METADATA_SCHEMA)}
+
+    def describe(filename):
+        meta = metadata_map.get(filename, {})
+        return {'filename': filename,
+                'title': meta.get('title', 'Неизвестно'),
+                'year': meta.get('year', 'N/A')}
+
+    results = []
+    for filename, doc_neighbours in zip(files, neighbours):
+        result = describe(filename)
+        result['neighbours'] = [dict(describe(files[j]), similarity=score)
+                                for j, score in doc_neighbours]
+        results.append(result)
+    return results
@@ -0,0 +1,393 @@
+import heapq
+import math
+import zlib
+from array import array
+from collections.abc import Mapping
+
+# Приближённый топ частых слов в ограниченной памяти.
+#
+# SpaceSaving хранит не больше capacity счётчиков. Оценка частоты слова
+# завышена не более чем на его error, а error любого слова не больше N / capacity
+# (N — всего учтённых слов). CountMinTopK хранит таблицу depth x width
+# счётчиков и кучу из k кандидатов: оценка завышена не более чем на
+# e / width * N с вероятностью 1 - e ** -depth.
+#
+# Оба скетча можно объединять (merge): скетчи отдельных файлов или процессов
+# складываются в скетч корпуса с теми же гарантиями.
+
+class SpaceSaving:
+    """
+    Алгоритм Space-Saving (Metwally и др., 2005) с возможностью объединения.
+
+    Поддерживает update() и most_common() как у Counter, поэтому может
+    заменить Counter частот в TextStats и StatsTable.
+
+    Attributes:
+        capacity (int): Максимальное количество счётчиков
+        total (int): Сколько всего слов учтено
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError("capacity должна быть положительной")
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # (count, word); устаревшие записи пропускаются при вытеснении
+
+    def empty(self):
+        """
+        Пустой скетч с теми же параметрами — например, для частот одного процесса.
+
+        Returns:
+            SpaceSaving: Новый скетч
+        """
+        return SpaceSaving(self.capacity)
+
+    def update(self, items):
+        """
+        Учитывает слова.
+
+        Args:
+            items: Итерируемый объект слов, словарь слово -> количество
+                   (например, Counter) или другой SpaceSaving (тогда это merge)
+        """
+        if isinstance(items, SpaceSaving):
+            self.merge(items)
+            return
+        pairs = items.items() if isinstance(items, Mapping) else ((item, 1) for item in items)
+        for item, count in pairs:
+            self.add(item, count)
+
+    def add(self, item, count=1):
+        """
+        Учитывает count вхождений одного слова.
+
+        Args:
+            item (str): Слово
+            count (int): Количество вхождений
+        """
+        self.total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (count, item))
+            return
+        # Вытесняем слово с минимальным счётчиком, новое наследует его счёт как погрешность
+        min_count, min_item = self._pop_min()
+        del counts[min_item]
+        del self.errors[min_item]
+        counts[item] = min_count + count
+        self.errors[item] = min_count
+        heapq.heappush(self._heap, (counts[item], item))
+
+    def subtract(self, items):
+        """
+        Вычитает слова, учтённые раньше (например, частоты варианта текста,
+        найденного уже после подсчёта). Оценки остаются не меньше настоящих
+        частот: у отслеживаемого слова вычитается точное количество его
+        вхождений, а для остальных слов оценка — min_count.
+
+        Args:
+            items (Mapping): Слово -> количество
+        """
+        counts = self.counts
+        for item, count in items.items():
+            self.total -= count
+            if item in counts:
+                counts[item] -= count
+                heapq.heappush(self._heap, (counts[item], item))  # Старая запись в куче теперь устарела
+
+    def _pop_min(self):
+        """Снимает с кучи слово с минимальным актуальным счётчиком."""
+        heap = self._heap
+        counts = self.counts
+        while True:
+            count, item = heapq.heappop(heap)
+            actual = counts.get(item)
+            if actual == count:
+                return count, item
+            if actual is not None:
+                # Счётчик вырос после попадания в кучу — возвращаем с новым значением
+                heapq.heappush(heap, (actual, item))
+            if len(heap) > 4 * self.capacity:
+                self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        """Перестраивает кучу, выбрасывая устаревшие записи."""
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def min_count(self):
+        """int: Минимальный счётчик, если скетч заполнен, иначе 0."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other):
+        """
+        Добавляет к скетчу другой скетч (Agarwal и др., «Mergeable summaries»).
+
+        Args:
+            other (SpaceSaving): Скетч другого файла или процесса
+        """
+        self_min = self.min_count()
+        other_min = other.min_count()
+        merged = {}
+        for item in set(self.counts) | set(other.counts):
+            count = self.counts.get(item, self_min) + other.counts.get(item, other_min)
+            error = self.errors.get(item, self_min) + other.errors.get(item, other_min)
+            merged[item] = (count, error)
+        top = heapq.nlargest(self.capacity, merged.items(), key=lambda pair: pair[1][0])
+        self.counts = {item: count for item, (count, _) in top}
+        self.errors = {item: error for item, (_, error) in top}
+        self.total += other.total
+        self._rebuild_heap()
+
+    def error(self, item):
+        """
+        Насколько оценка частоты слова может быть завышена.
+
+        Args:
+            item (str): Слово
+
+        Returns:
+            int: Верхняя граница погрешности
+        """
+        return self.errors.get(item, self.min_count())
+
+    @property
+    def max_error(self):
+        """int: Граница погрешности для любого слова (не больше total / capacity)."""
+        return self.min_count()
+
+    def most_common(self, n=None):
+        """
+        Возвращает самые частые слова с оценками частоты.
+
+        Args:
+            n (int): Сколько слов вернуть (None — все)
+
+        Returns:
+            list: Пары (слово, оценка частоты) по убыванию
+        """
+        if n is None:
+            return sorted(self.counts.items(), key=lambda pair: pair[1], reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=lambda pair: pair[1])
+
+    def is_exact_top(self, n):
+        """
+        Проверяет, что топ-n гарантированно совпадает с точным.
+
+        Args:
+            n (int): Размер топа
+
+        Returns:
+            bool: True, если нижняя граница каждого слова топа не меньше
+                  оценки следующего за топом слова
+        """
+        ranked = self.most_common(n + 1)
+        if len(ranked) <= n:
+            return self.max_error == 0
+        threshold = max(ranked[n][1], self.max_error)
+        return all(count - self.errors[item] >= threshold for item, count in ranked[:n])
+
+def _hash_pair(item):
+    """Два независимых 32-битных хэша слова, одинаковые во всех процессах."""
+    data = item.encode('utf-8')
+    return zlib.crc32(data), zlib.crc32(data, 0x9E3779B9) | 1
+
+class CountMinTopK:
+    """
+    Count-Min sketch (Cormode, Muthukrishnan) с кучей из k самых частых слов.
+
+    Память — depth * width счётчиков плюс k кандидатов, независимо от словаря.
+
+    Attributes:
+        k (int): Сколько кандидатов в топ хранить
+        width (int): Ширина таблицы
+        depth (int): Количество хэш-функций (строк таблицы)
+        total (int): Сколько всего слов учтено
+    """
+
+    def __init__(self, k=100, width=2048, depth=4):
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = array('Q', bytes(8 * width * depth))
+        self.candidates = {}  # Слово -> последняя оценка
+        self._heap = []  # (оценка, слово); устаревшие записи пропускаются
+
+    def _cells(self, item):
+        first, second = _hash_pair(item)
+        width = self.width
+        return [row * width + (first + row * second) % width for row in range(self.depth)]
+
+    def empty(self):
+        """
+        Пустой скетч с теми же параметрами — например, для частот одного процесса.
+
+        Returns:
+            CountMinTopK: Новый скетч
+        """
+        return CountMinTopK(self.k, self.width, self.depth)
+
+    def estimate(self, item):
+        """
+        Оценка частоты слова (не меньше настоящей).
+
+        Args:
+            item (str): Слово
+
+        Returns:
+            int: Оценка частоты
+        """
+        table = self.table
+        return min(table[cell] for cell in self._cells(item))
+
+    def update(self, items):
+        """
+        Учитывает слова.
+
+        Args:
+            items: Итерируемый объект слов, словарь слово -> количество
+                   или другой CountMinTopK (тогда это merge)
+        """
+        if isinstance(items, CountMinTopK):
+            self.merge(items)
+            return
+        pairs = items.items() if isinstance(items, Mapping) else ((item, 1) for item in items)
+        for item, count in pairs:
+            self.add(item, count)
+
+    def add(self, item, count=1):
+        """
+        Учитывает count вхождений одного слова.
+
+        Args:
+            item (str): Слово
+            count (int): Количество вхождений
+        """
+        self.total += count
+        table = self.table
+        cells = self._cells(item)
+        for cell in cells:
+            table[cell] += count
+        self._offer(item, min(table[cell] for cell in cells))
+
+    def subtract(self, items):
+        """
+        Вычитает слова, учтённые раньше (например, частоты варианта текста,
+        найденного уже после подсчёта). Оценки остаются не меньше настоящих частот.
+
+        Args:
+            items (Mapping): Слово -> количество
+        """
+        table = self.table
+        for item, count in items.items():
+            self.total -= count
+            for cell in self._cells(item):
+                table[cell] -= count
+        # Оценки кандидатов могли уменьшиться — пересчитываем их (кандидатов всего k)
+        self.candidates = {item: self.estimate(item) for item in self.candidates}
+        self._rebuild_heap()
+
+    def _offer(self, item, estimate):
+        """Предлагает слово в кучу кандидатов."""
+        candidates = self.candidates
+        if item in candidates:
+            # В куче у каждого кандидата одна запись; устаревшая оценка
+            # обновится, когда запись окажется на вершине
+            candidates[item] = estimate
+            return
+        heap = self._heap
+        if len(candidates) < self.k:
+            candidates[item] = estimate
+            heapq.heappush(heap, (estimate, item))
+            return
+        # Вершина кучи может быть устаревшей: оценка кандидата с тех пор выросла
+        while candidates[heap[0][1]] != heap[0][0]:
+            _, stale_item = heapq.heappop(heap)
+            heapq.heappush(heap, (candidates[stale_item], stale_item))
+        if estimate > heap[0][0]:
+            _, weakest = heapq.heapreplace(heap, (estimate, item))
+            del candidates[weakest]
+            candidates[item] = estimate
+
+    def _rebuild_heap(self):
+        """Перестраивает кучу кандидатов, выбрасывая устаревшие записи."""
+        self._heap = [(estimate, item) for item, estimate in self.candidates.items()]
+        heapq.heapify(self._heap)
+
+    def merge(self, other):
+        """
+        Добавляет к скетчу другой скетч с той же шириной и глубиной.
+
+        Args:
+            other (CountMinTopK): Скетч другого файла или процесса
+        """
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Нельзя объединить скетчи разного размера")
+        table = self.table
+        for i, value in enumerate(other.table):
+            if value:
+                table[i] += value
+        self.total += other.total
+        pool = set(self.candidates) | set(other.candidates)
+        ranked = heapq.nlargest(self.k, ((self.estimate(item), item) for item in pool))
+        self.candidates = {item: estimate for estimate, item in ranked}
+        self._rebuild_heap()
+
+    def error(self, item=None):
+        """
+        Граница завышения оценки (выполняется с вероятностью 1 - e ** -depth).
+
+        Args:
+            item (str): Не используется — граница одинакова для всех слов
+
+        Returns:
+            int: Верхняя граница погрешности
+        """
+        return math.ceil(math.e / self.width * self.total)
+
+    @property
+    def max_error(self):
+        """int: Граница погрешности для любого слова."""
+        return self.error()
+
+    def most_common(self, n=None):
+        """
+        Возвращает самые частые слова с оценками частоты.
+
+        Args:
+            n (int): Сколько слов вернуть (None — все кандидаты)
+
+        Returns:
+            list: Пары (слово, оценка частоты) по убыванию
+        """
+        ranked = sorted(((item, self.estimate(item)) for item in self.candidates),
+                        key=lambda pair: pair[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+def make_top_sketch(mode='space-saving', capacity=1000):
+    """
+    Создаёт скетч для приближённого топа слов.
+
+    Args:
+        mode (str): 'space-saving' или 'count-min'
+        capacity (int): Количество счётчиков (space-saving) или кандидатов (count-min)
+
+    Returns:
+        SpaceSaving | CountMinTopK: Пустой скетч
+    """
+    if mode == 'space-saving':
+        return SpaceSaving(capacity)
+    if mode == 'count-min':
+        return CountMinTopK(k=capacity)
+    raise ValueError(f"Неизвестный режим скетча: {mode}")
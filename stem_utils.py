@@ -0,0 +1,163 @@
+from functools import lru_cache
+
+# Стеммер для русского языка по алгоритму Snowball (Porter, snowball.tartarus.org):
+# от слова отрезаются окончания и суффиксы, так что «поля», «полей», «полям»
+# дают одну основу «пол». Словарей и сети не нужно.
+#
+# Отрезание окончаний — самая дорогая часть нормализации, а частоты слов
+# подчиняются закону Ципфа: немногие формы встречаются очень часто.
+# Поэтому стеммер оборачивается в LRU-кэш (make_stemmer): основа каждой
+# формы вычисляется один раз, а размер кэша ограничивает память.
+
+STEM_CACHE_SIZE = 100_000
+
+VOWELS = set('аеиоуыэюя')
+
+# Группы окончаний; окончания группы 1 отрезаются, только если перед ними «а» или «я»
+PERFECTIVE_GERUND = (('в', 'вши', 'вшись'),
+                     ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'))
+ADJECTIVE = (('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым',
+              'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'),)
+PARTICIPLE = (('ем', 'нн', 'вш', 'ющ', 'щ'),
+              ('ивш', 'ывш', 'ующ'))
+REFLEXIVE = (('ся', 'сь'),)
+VERB = (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны',
+         'ть', 'ешь', 'нно'),
+        ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл',
+         'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить',
+         'ыть', 'ишь', 'ую', 'ю'))
+NOUN = (('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей',
+         'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях',
+         'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я'),)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+def _longest_first(groups):
+    """
+    Окончания класса от длинных к коротким. Если в классе две группы,
+    у окончаний первой группы отмечено, что перед ними должна быть «а» или «я».
+    """
+    endings = [(ending, index == 0 and len(groups) == 2)
+               for index, group in enumerate(groups) for ending in group]
+    return sorted(endings, key=lambda item: -len(item[0]))
+
+_PERFECTIVE_GERUND = _longest_first(PERFECTIVE_GERUND)
+_ADJECTIVE = _longest_first(ADJECTIVE)
+_PARTICIPLE = _longest_first(PARTICIPLE)
+_REFLEXIVE = _longest_first(REFLEXIVE)
+_VERB = _longest_first(VERB)
+_NOUN = _longest_first(NOUN)
+
+def _remove_ending(rv, endings):
+    """
+    Отрезает самое длинное подходящее окончание.
+
+    Как в Snowball, если самое длинное окончание стоит не после нужной
+    «а»/«я», более короткие окончания не пробуются.
+
+    Returns:
+        str: Слово без окончания или None, если окончание не найдено
+    """
+    for ending, after_a_ya in endings:
+        if rv.endswith(ending):
+            stem = rv[:-len(ending)]
+            if after_a_ya and not stem.endswith(('а', 'я')):
+                return None
+            return stem
+    return None
+
+def _regions(word):
+    """Начала областей RV и R2 (см. описание алгоритма Snowball)."""
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+def stem(word):
+    """
+    Находит основу русского слова по алгоритму Snowball.
+
+    Args:
+        word (str): Слово в нижнем регистре
+
+    Returns:
+        str: Основа слова (слова без гласных и нерусские слова не меняются)
+    """
+    word = word.replace('ё', 'е')
+    rv_start, r2_start = _regions(word)
+    prefix, rv = word[:rv_start], word[rv_start:]
+    if not rv:
+        return word
+
+    # Шаг 1: деепричастие, иначе возвратная частица и затем
+    # прилагательное (причастие), глагол или существительное
+    stemmed = _remove_ending(rv, _PERFECTIVE_GERUND)
+    if stemmed is not None:
+        rv = stemmed
+    else:
+        stemmed = _remove_ending(rv, _REFLEXIVE)
+        if stemmed is not None:
+            rv = stemmed
+        stemmed = _remove_ending(rv, _ADJECTIVE)
+        if stemmed is not None:
+            rv = stemmed
+            participle = _remove_ending(rv, _PARTICIPLE)
+            if participle is not None:
+                rv = participle
+        else:
+            stemmed = _remove_ending(rv, _VERB)
+            if stemmed is None:
+                stemmed = _remove_ending(rv, _NOUN)
+            if stemmed is not None:
+                rv = stemmed
+
+    # Шаг 2: конечная «и»
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательный суффикс, если он целиком в области R2
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending):
+            if len(prefix) + len(rv) - len(ending) >= r2_start:
+                rv = rv[:-len(ending)]
+            break
+
+    # Шаг 4: превосходная степень, удвоенная «н» и мягкий знак
+    for ending in SUPERLATIVE:
+        if rv.endswith(ending):
+            rv = rv[:-len(ending)]
+            if rv.endswith('нн'):
+                rv = rv[:-1]
+            break
+    else:
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+
+    return prefix + rv
+
+def make_stemmer(cache_size=STEM_CACHE_SIZE):
+    """
+    Создаёт стеммер с LRU-кэшем основ.
+
+    Статистику кэша (попадания, промахи, размер) возвращает
+    метод cache_info() созданной функции.
+
+    Args:
+        cache_size (int): Сколько словоформ хранить в кэше (None — без ограничения)
+
+    Returns:
+        function: stem с кэшем
+    """
+    return lru_cache(maxsize=cache_size)(stem)
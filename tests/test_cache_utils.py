@@ -0,0 +1,73 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import analyze_corpus  # noqa: E402
+from cache_utils import (file_fingerprint, make_cache_entry, get_cached_result,  # noqa: E402
+                         save_analysis_cache, load_analysis_cache)
+
+RESULT = {'row': ['a.txt', 2, 2, 1, 1.0, 1.0, 2.0, 1.0],
+          'word_freq': Counter({'вечер': 1, 'туман': 1}),
+          'ngram_freq': Counter({'вечер туман': 1})}
+
+
+@pytest.fixture
+def cached_file(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_text('вечер туман', encoding='utf-8')
+    cache_path = str(tmp_path / 'cache.jsonl')
+    entry = make_cache_entry(str(path), file_fingerprint(str(path)), RESULT, (2, 3))
+    assert save_analysis_cache(cache_path, {str(path): entry})
+    return path, cache_path
+
+
+def test_unchanged_file_is_a_hit(cached_file):
+    path, cache_path = cached_file
+    cached = get_cached_result(load_analysis_cache(cache_path), str(path), (2, 3))
+    assert cached == RESULT
+
+
+def test_same_content_with_new_mtime_is_a_hit(cached_file):
+    path, cache_path = cached_file
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    cache = load_analysis_cache(cache_path)
+    assert get_cached_result(cache, str(path), (2, 3)) == RESULT
+    assert cache[str(path)]['mtime_ns'] == stat.st_mtime_ns + 10 ** 9
+
+
+# Другой размер при том же времени изменения или тот же размер при новом времени
+@pytest.mark.parametrize('new_text, mtime_shift', [('вечер туман река', 0), ('вечер тумай', 10 ** 9)])
+def test_changed_content_is_a_miss(cached_file, new_text, mtime_shift):
+    path, cache_path = cached_file
+    stat = os.stat(path)
+    path.write_text(new_text, encoding='utf-8')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_shift))
+    assert get_cached_result(load_analysis_cache(cache_path), str(path), (2, 3)) is None
+
+
+def test_entry_without_requested_data_is_a_miss(cached_file):
+    path, cache_path = cached_file
+    cache = load_analysis_cache(cache_path)
+    assert get_cached_result(cache, str(path), (2,)) is None
+    assert get_cached_result(cache, str(path), (2, 3), stem=True) is None
+    assert get_cached_result(cache, str(path), (2, 3), minhash=True) is None
+
+
+def test_corpus_run_reanalyzes_only_changed_files(tmp_path, monkeypatch, capsys):
+    folder = tmp_path / 'corpus'
+    folder.mkdir()
+    for name, text in (('a.txt', 'тихий вечер'), ('b.txt', 'туман над рекой'), ('c.txt', 'осень')):
+        (folder / name).write_text(text, encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    first = analyze_corpus('corpus', prefetch=0)
+    (folder / 'b.txt').write_text('туман над рекой и полем', encoding='utf-8')
+    capsys.readouterr()
+    second = analyze_corpus('corpus', prefetch=0)
+    assert 'Взято из кэша: 2, проанализировано заново: 1' in capsys.readouterr().out
+    assert list(second.column('word_count')) == [2, 5, 1]
+    assert second.word_freq == first.word_freq + Counter({'полем': 1})
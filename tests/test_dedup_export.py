@@ -0,0 +1,53 @@
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import analyze_corpus  # noqa: E402
+from export_utils import load_columnar  # noqa: E402
+from text_utils import TextStats  # noqa: E402
+
+WORDS = ['вечер', 'сердце', 'туман', 'звезда', 'река', 'ветер', 'поле', 'дорога', 'тишина',
+         'память', 'осень', 'город', 'окно', 'свеча', 'море', 'песня', 'берег', 'сон']
+
+
+def make_poem(rng, length=80):
+    lines = []
+    for _ in range(length // 8):
+        lines.append(' '.join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(8)))
+    return '\n'.join(lines) + '\n'
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    rng = random.Random(7)
+    folder = tmp_path / 'corpus'
+    folder.mkdir()
+    original = make_poem(rng)
+    (folder / 'a.txt').write_text(original, encoding='utf-8')
+    # Вариант с одной заменённой строкой: слова этой строки есть только в варианте
+    lines = original.split('\n')
+    lines[0] = 'единственноеслово только варианте здесь'
+    (folder / 'a_variant.txt').write_text('\n'.join(lines), encoding='utf-8')
+    (folder / 'b.txt').write_text(make_poem(rng), encoding='utf-8')
+    (folder / 'c.txt').write_text(make_poem(rng), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    return folder
+
+
+@pytest.mark.parametrize('mode, expected_files', [('exclude', 3), ('collapse', 4)])
+def test_dedup_with_columnar_export(corpus, mode, expected_files):
+    table = analyze_corpus('corpus', use_cache=False, prefetch=0, export_format='npy', dedup=mode)
+    assert [cluster['representative'] for cluster in table.duplicates] == ['a.txt']
+    assert len(table) == expected_files
+
+    exported = load_columnar(os.path.join('results', 'columnar'), use_numpy=False)
+    assert exported.filenames == list(table.column('filename'))
+    assert len(exported.tf_indptr) == len(table) + 1
+    for index, filename in enumerate(exported.filenames):
+        expected = TextStats((corpus / filename).read_text(encoding='utf-8')).word_freq
+        assert exported.file_frequencies(index) == expected
+    assert sum(exported.corpus_counts) == sum(exported.tf_counts)
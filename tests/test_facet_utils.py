@@ -0,0 +1,67 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import print_facets  # noqa: E402
+from facet_utils import FacetIndex, save_facets  # noqa: E402
+
+FILES = [
+    ('a.txt', 1905, Counter({'вечер': 3, 'сердце': 1})),
+    ('b.txt', 1907, Counter({'вечер': 1, 'туман': 2})),
+    ('c.txt', 1909, Counter({'река': 4})),
+    ('d.txt', 1911, Counter({'поле': 2})),
+]
+
+
+def make_row(filename, word_freq, ttr):
+    return {'filename': filename, 'word_count': sum(word_freq.values()), 'ttr_count': ttr,
+            'mattr_count': ttr, 'mtld_count': 10.0, 'hdd_count': ttr}
+
+
+@pytest.fixture
+def facets():
+    index = FacetIndex()
+    for number, (filename, year, word_freq) in enumerate(FILES):
+        index.add_file(filename, make_row(filename, word_freq, 0.5 + number / 10), word_freq,
+                       {'year': year, 'author': 'Ходасевич'})
+    return index
+
+
+def test_year_range_matches_period(facets):
+    period = facets.group('years', '1905-1909')
+    years = facets.query_years(1905, 1909)
+    assert period.files == years.files == 3
+    assert period.word_count == years.word_count == 11
+    assert period.word_freq == years.word_freq
+    assert period.median() == years.median() == 0.6
+    assert facets.query_years(1910, 1914).files == 1
+
+
+def test_period_key_accepts_hyphen_and_dash(facets):
+    assert [key for key, _ in facets.groups('years')] == ['1905-1909', '1910-1914']
+    assert facets.group('years', '1905–1909') is facets.group('years', '1905-1909')
+
+
+@pytest.mark.parametrize('facet, value', [('year', '1905-1909'), ('year', '1905–1909'),
+                                          ('years', '1905-1909'), ('years', '1905–1909')])
+def test_print_facets_range(facets, tmp_path, capsys, facet, value):
+    path = str(tmp_path / 'facets.pkl')
+    save_facets(facets, path)
+    print_facets(facet, [value], path)
+    output = capsys.readouterr().out
+    assert 'Нет текстов' not in output
+    assert 'текстов 3, слов 11' in output
+
+
+def test_top_words_do_not_depend_on_insertion_order():
+    tops = []
+    for files in (FILES, FILES[::-1]):
+        index = FacetIndex()
+        for filename, year, word_freq in files:
+            index.add_file(filename, make_row(filename, word_freq, 0.5), word_freq, {'year': year})
+        tops.append(index.group('author', 'Неизвестен').most_common(3))
+    assert tops[0] == tops[1] == [('вечер', 4), ('река', 4), ('поле', 2)]
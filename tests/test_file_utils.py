@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_utils import read_text_chunks, prefetch_text_files  # noqa: E402
+from text_utils import TextStats  # noqa: E402
+
+
+@pytest.mark.parametrize('newline', ['\r\n', '\r', '\n'])
+def test_reading_paths_agree_on_line_endings(tmp_path, newline):
+    lines = ['Я помню чудное мгновенье:', 'Передо мной явилась ты,', 'Как мимолётное виденье,', '']
+    path = tmp_path / 'poem.txt'
+    path.write_bytes(newline.join(lines * 50).encode('utf-8'))
+
+    # Маленькие блоки разрезают и \r\n, и двухбайтовые буквы
+    texts = {
+        'prefetch': next(prefetch_text_files([str(path)], workers=1))[1],
+        'mmap': ''.join(read_text_chunks(str(path), chunk_size=7, use_mmap=True)),
+        'open': ''.join(read_text_chunks(str(path), chunk_size=7)),
+    }
+    assert texts['prefetch'] == texts['mmap'] == texts['open']
+    assert '\r' not in texts['open']
+    line_counts = {name: TextStats(text).line_count for name, text in texts.items()}
+    assert set(line_counts.values()) == {len(lines) * 50}
@@ -0,0 +1,39 @@
+import os
+import sys
+import shutil
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import analyze_corpus  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    folder = tmp_path / 'corpus'
+    folder.mkdir()
+    for filename in sorted(os.listdir(os.path.join(ROOT, 'corpus')))[:12]:
+        shutil.copy(os.path.join(ROOT, 'corpus', filename), folder / filename)
+    monkeypatch.chdir(tmp_path)
+    return folder
+
+
+def run(workers, prefetch=0, chunk_size=1024 * 1024):
+    table = analyze_corpus('corpus', chunk_size, workers=workers, batch_size=2, use_cache=False,
+                           prefetch=prefetch)
+    with open(os.path.join('results', 'statistics.csv'), encoding='utf-8') as f:
+        return f.read(), table
+
+
+# chunk_size=256 — файлы читаются по частям через mmap
+@pytest.mark.parametrize('workers, prefetch, chunk_size', [(3, 0, 1024 * 1024), (1, 2, 1024 * 1024),
+                                                          (3, 2, 256)])
+def test_parallel_run_matches_sequential(corpus, workers, prefetch, chunk_size):
+    expected_csv, expected = run(1)
+    actual_csv, actual = run(workers, prefetch, chunk_size)
+    assert actual_csv == expected_csv
+    assert actual.word_freq == expected.word_freq
+    assert actual.ngram_summary == expected.ngram_summary
@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_utils import summarize_results, render_html_site  # noqa: E402
+
+ROWS = [
+    {'filename': 'a.txt', 'word_count': 2, 'words_ucount': 2, 'lines_count': 1, 'ttr_count': 1.0,
+     'mattr_count': 1.0, 'mtld_count': 2.0, 'hdd_count': 1.0},
+    {'filename': 'b.txt', 'word_count': 3, 'words_ucount': 3, 'lines_count': 1, 'ttr_count': 1.0,
+     'mattr_count': 1.0, 'mtld_count': 3.0, 'hdd_count': 1.0},
+    {'filename': 'c.txt', 'word_count': 1, 'words_ucount': 1, 'lines_count': 1, 'ttr_count': 1.0,
+     'mattr_count': 1.0, 'mtld_count': 1.0, 'hdd_count': 1.0},
+]
+
+
+@pytest.fixture
+def site(tmp_path):
+    corpus = tmp_path / 'corpus'
+    corpus.mkdir()
+    for name, text in (('a.txt', 'тихий вечер'), ('b.txt', 'туман над рекой'), ('c.txt', 'осень')):
+        (corpus / name).write_text(text, encoding='utf-8')
+    report = tmp_path / 'report.txt'
+    report.write_text('отчёт', encoding='utf-8')
+    html = tmp_path / 'html'
+
+    def render(rows=ROWS):
+        # Две страницы texts: a.txt и b.txt на первой, c.txt на второй
+        return render_html_site(rows, summarize_results(rows), str(html), str(corpus), str(report),
+                                texts_page_size=2)
+
+    return corpus, report, html, render
+
+
+def test_unchanged_site_is_skipped(site):
+    corpus, report, html, render = site
+    assert render() == (4, 0)
+    assert render() == (0, 4)
+    assert sorted(json.loads((html / '.pages.json').read_text(encoding='utf-8'))) == \
+        ['results.html', 'statistics.html', 'texts.html', 'texts_2.html']
+
+
+def test_new_mtime_alone_does_not_rewrite_pages(site):
+    corpus, report, html, render = site
+    render()
+    for path in list(corpus.iterdir()) + [report]:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))  # Как после git clone
+    assert render() == (0, 4)
+
+
+def test_only_pages_with_changed_inputs_are_rewritten(site):
+    corpus, report, html, render = site
+    render()
+    (corpus / 'c.txt').write_text('поздняя осень', encoding='utf-8')
+    assert render() == (1, 3)
+    assert 'поздняя осень' in (html / 'texts_2.html').read_text(encoding='utf-8')
+    report.write_text('новый отчёт', encoding='utf-8')
+    assert render() == (1, 3)
+    (html / 'statistics.html').unlink()
+    assert render() == (1, 3)
+
+
+def test_pages_of_a_smaller_corpus_are_removed(site):
+    corpus, report, html, render = site
+    render()
+    assert render(ROWS[:2]) == (3, 0)  # Изменились строки таблицы, число страниц texts и итоги
+    assert not (html / 'texts_2.html').exists()
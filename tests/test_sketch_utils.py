@@ -0,0 +1,86 @@
+import os
+import sys
+import math
+import random
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sketch_utils import SpaceSaving, CountMinTopK  # noqa: E402
+
+
+def zipf_stream(seed=3, size=20000, vocabulary=2000):
+    rng = random.Random(seed)
+    words = [f'слово{i}' for i in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return rng.choices(words, weights, k=size)
+
+
+def parts(stream, count=4):
+    size = -(-len(stream) // count)
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+@pytest.mark.parametrize('merged', [False, True])
+def test_space_saving_error_bounds(merged):
+    stream = zipf_stream()
+    exact = Counter(stream)
+    sketch = SpaceSaving(capacity=100)
+    if merged:
+        # Как в --workers: свой скетч у каждого процесса, затем merge
+        for part in parts(stream):
+            part_sketch = sketch.empty()
+            part_sketch.update(Counter(part))
+            sketch.merge(part_sketch)
+    else:
+        sketch.update(stream)
+    assert sketch.total == len(stream)
+    assert sketch.max_error <= len(stream) / sketch.capacity
+    for word, estimate in sketch.most_common():
+        assert exact[word] <= estimate <= exact[word] + sketch.error(word)
+    # Слово чаще total / capacity обязательно есть в скетче
+    for word, count in exact.items():
+        if count > len(stream) / sketch.capacity:
+            assert word in sketch.counts
+    assert [word for word, _ in sketch.most_common(5)] == [word for word, _ in exact.most_common(5)]
+    assert sketch.is_exact_top(5)
+
+
+def test_count_min_error_bounds_and_merge():
+    stream = zipf_stream()
+    exact = Counter(stream)
+    sketch = CountMinTopK(k=20, width=512, depth=4)
+    sketch.update(stream)
+    merged = sketch.empty()
+    for part in parts(stream):
+        part_sketch = merged.empty()
+        part_sketch.update(Counter(part))
+        merged.merge(part_sketch)
+    # Таблица складывается точно, поэтому оценки после merge те же
+    assert merged.table == sketch.table
+    assert merged.most_common(5) == sketch.most_common(5)
+
+    bound = sketch.error()
+    assert bound == math.ceil(math.e / sketch.width * len(stream))
+    over = 0
+    for word, count in exact.items():
+        estimate = sketch.estimate(word)
+        assert estimate >= count
+        over += estimate - count > bound
+    # Граница выполняется с вероятностью 1 - e ** -depth (около 98%) для каждого слова
+    assert over <= 0.05 * len(exact)
+    assert [word for word, _ in sketch.most_common(5)] == [word for word, _ in exact.most_common(5)]
+
+
+def test_subtract_keeps_estimates_above_true_counts():
+    stream = zipf_stream(size=5000)
+    removed = Counter(stream[:1000])
+    exact = Counter(stream[1000:])
+    for sketch in (SpaceSaving(capacity=2000), CountMinTopK(k=20, width=512, depth=4)):
+        sketch.update(Counter(stream))
+        sketch.subtract(removed)
+        assert sketch.total == len(stream) - 1000
+        for word, estimate in sketch.most_common(10):
+            assert estimate >= exact[word]
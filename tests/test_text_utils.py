@@ -0,0 +1,64 @@
+import os
+import re
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_utils import TextStats, STOP_WORDS_RU  # noqa: E402
+from file_utils import read_text_chunks  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = ['poem_01.txt', 'poem_07.txt', 'poem_23.txt']
+
+
+# Исходные функции до однопроходного TextStats: каждая метрика — своим проходом
+def baseline_metrics(text):
+    words = text.split()
+    cleaned = re.sub(r'\s+', ' ', re.sub(r'[^\w\s-]', ' ', text)).split()
+    cleaned = [word.lower() for word in cleaned
+               if word.lower() not in STOP_WORDS_RU and len(word) > 1 and not word.isdigit()]
+    return {
+        'word_count': len(words),
+        'unique_count': len(set(words)),
+        'line_count': len(text.split('\n')),
+        'ttr': round(len(set(words)) / len(words), 3),
+        'word_freq': Counter(cleaned),
+    }
+
+
+def metrics(stats):
+    return {
+        'word_count': stats.word_count,
+        'unique_count': stats.unique_count,
+        'line_count': stats.line_count,
+        'ttr': stats.ttr,
+        'word_freq': stats.word_freq,
+    }
+
+
+@pytest.mark.parametrize('filename', SAMPLES)
+@pytest.mark.parametrize('ngram_orders', [None, (2, 3)])
+def test_text_stats_matches_baseline(filename, ngram_orders):
+    path = os.path.join(ROOT, 'corpus', filename)
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    expected = baseline_metrics(text)
+    assert metrics(TextStats(text, ngram_orders=ngram_orders)) == expected
+
+    # По частям (слово не разрезается) — те же метрики, что и целиком
+    stats = TextStats(ngram_orders=ngram_orders)
+    for chunk in read_text_chunks(path, chunk_size=64):
+        stats.update(chunk)
+    assert metrics(stats) == expected
+
+
+def test_ngrams_join_chunks_but_not_lines_or_stop_words():
+    text = 'тихий вечер\nтихий вечер и туман\nтуман над рекой'
+    whole = TextStats(text, ngram_orders=(2, 3)).ngram_freq
+    stats = TextStats(ngram_orders=(2, 3))
+    for chunk in ('тихий ', 'вечер\nтихий ', 'вечер и ', 'туман\nтуман над рекой'):
+        stats.update(chunk)
+    assert stats.ngram_freq == whole == Counter({'тихий вечер': 2})
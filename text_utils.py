@@ -1,4 +1,6 @@
 import os
+import time
+from diversity_utils import LexicalDiversity, MATTR_WINDOW, mattr, mtld, hdd
 def count_words(text):
     """
     Подсчитывает количество слов в тексте.
@@ -9,36 +11,67 @@ def count_words(text):
     Returns:
         int: Количество слов
     """
-    words = text.split()
-    return len(words) 
+    return TextStats(text, with_frequencies=False, with_diversity=False).word_count
 
-def count_unique_words (text):
+def count_unique_words (text, stemmer=None):
     """
     Ищет в тексте уникальные слова
 
     Args:
         text(str): Текст для анализа
+        stemmer(function): Стеммер (stem_utils.make_stemmer) — считать разные формы
+                           одного слова одним словом
 
     Returns:
         int: Количество слов
     """
-    words = text.split()
-    unique_words= set(words) # Удаляет все дубликаты, оставляя только уникальные элементы
-    return len(unique_words) 
+    return TextStats(text, with_frequencies=False, with_diversity=False, stemmer=stemmer).unique_count
 
-def calculate_ttr(text):
+def calculate_ttr(text, stemmer=None):
     """
     Функция вычисляет отношение уникальных слов ко всем в тексте
 
     Args:
         text(str):текст для анализа
+        stemmer(function): Стеммер — считать TTR по основам слов
     Returns:
         float: Числовой коэффициент уникальных слов
     """
-    numberofu_words = count_unique_words(text)
-    words_count = count_words(text)
-    ttr_number = numberofu_words/words_count
-    return round(ttr_number, 3)
+    return TextStats(text, with_frequencies=False, with_diversity=False, stemmer=stemmer).ttr
+
+def calculate_mattr(text, window=MATTR_WINDOW):
+    """
+    Вычисляет средний TTR по скользящему окну (MATTR) — он не зависит от длины текста
+
+    Args:
+        text(str): Текст для анализа
+        window(int): Длина окна в словах
+    Returns:
+        float: MATTR
+    """
+    return mattr(text.split(), window)
+
+def calculate_mtld(text):
+    """
+    Вычисляет MTLD — среднюю длину отрезка текста, на котором TTR не опускается ниже 0.72
+
+    Args:
+        text(str): Текст для анализа
+    Returns:
+        float: MTLD
+    """
+    return mtld(text.split())
+
+def calculate_hdd(text):
+    """
+    Вычисляет HD-D — ожидаемый TTR случайной выборки из 42 слов текста
+
+    Args:
+        text(str): Текст для анализа
+    Returns:
+        float: HD-D
+    """
+    return hdd(Counter(text.split()).values())
 
 def count_lines(text):
     """
@@ -50,13 +83,14 @@ def count_lines(text):
     Returns:
         int: Количество строк
     """
-    lines = text.split('\n')
-    return (len(lines))
+    return TextStats(text, with_frequencies=False, with_diversity=False).line_count
 
 from collections import Counter
 
 from collections import Counter
 import re
+from ngram_utils import iter_ngrams
+from dedup_utils import MinHash, SHINGLE_SIZE
 
 # Список русских стоп-слов (предлоги, союзы, частицы и т.д.)
 STOP_WORDS_RU = {
@@ -73,6 +107,42 @@ STOP_WORDS_RU = {
     'ах', 'ох', 'эй', 'увы', 'вот', 'вон', 'ну'
 }
 
+# Слово — непрерывная последовательность букв, цифр, "_" и дефиса.
+# Это то же разбиение, что замена знаков препинания на пробелы и split(),
+# но за один проход скомпилированного выражения.
+TOKEN_PATTERN = re.compile(r'[\w-]+')
+# То же разбиение, но концы строк остаются отдельными токенами — для n-грамм
+LINE_TOKEN_PATTERN = re.compile(r'[\w-]+|\n')
+# Знаки препинания, которые отрезаются с краёв слова перед стеммингом
+EDGE_PUNCTUATION = '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~«»„“”‘’—–…'
+
+def tokenize(text, remove_punctuation=True, remove_stopwords=True, lower=True):
+    """
+    Разбивает текст на слова за один проход: удаляет знаки препинания,
+    приводит к нижнему регистру и отбрасывает стоп-слова и числа.
+
+    Args:
+        text (str): Исходный текст
+        remove_punctuation (bool): Удалять знаки препинания
+        remove_stopwords (bool): Удалять стоп-слова, однобуквенные слова и числа
+        lower (bool): Приводить слова к нижнему регистру
+
+    Returns:
+        list: Список слов
+    """
+    if lower:
+        # Один вызов lower() для всего текста вместо вызова на каждое слово
+        text = text.lower()
+    words = TOKEN_PATTERN.findall(text) if remove_punctuation else text.split()
+    if not remove_stopwords:
+        return words
+    if lower:
+        return [word for word in words
+                if len(word) > 1 and word not in STOP_WORDS_RU and not word.isdigit()]
+    # Регистр сохраняем, но стоп-слова ищем в нижнем регистре
+    return [word for word in words
+            if len(word) > 1 and word.lower() not in STOP_WORDS_RU and not word.isdigit()]
+
 def clean_text_for_analysis(text, remove_punctuation=True, remove_stopwords=True):
     """
     Очищает текст для анализа.
@@ -85,57 +155,324 @@ def clean_text_for_analysis(text, remove_punctuation=True, remove_stopwords=True
     Returns:
         str: Очищенный текст
     """
-    if remove_punctuation:
-        # Удаляем знаки препинания, оставляя буквы, цифры, пробелы и дефис
-        text = re.sub(r'[^\w\s-]', ' ', text)
-        # Заменяем множественные пробелы на один
-        text = re.sub(r'\s+', ' ', text)
-    
-    words = text.split()
-    
-    if remove_stopwords:
-        # Фильтруем стоп-слова и короткие слова (меньше 2 букв)
-        filtered_words = []
-        for word in words:
-            word_lower = word.lower()
-            # Проверяем, не является ли слово стоп-словом и имеет ли достаточную длину
-            if (word_lower not in STOP_WORDS_RU and 
-                len(word) > 1 and 
-                not word.isdigit()):  # Исключаем чисто числовые значения
-                filtered_words.append(word)
-        words = filtered_words
-    
-    return ' '.join(words).strip()
+    return ' '.join(tokenize(text, remove_punctuation, remove_stopwords, lower=False))
 
-def get_most_common_words(text, n=5, cleaned=True, remove_punctuation=True, remove_stopwords=True):
+def count_word_frequencies(text, cleaned=True, remove_punctuation=True, remove_stopwords=True,
+                           stemmer=None):
     """
-    Функция выводит топ наиболее частых слов с опцией очистки текста.
-    
+    Подсчитывает частоту каждого слова в тексте.
+
     Args:
         text (str): Текст для анализа
-        n (int): Количество слов в топе (по умолчанию 5)
         cleaned (bool): Очищать ли текст перед анализом (по умолчанию True)
         remove_punctuation (bool): Удалять знаки препинания (по умолчанию True)
         remove_stopwords (bool): Удалять стоп-слова (по умолчанию True)
-    
+        stemmer (function): Стеммер — складывать частоты форм одного слова
+                            (ключами словаря становятся основы)
+
     Returns:
-        list: Самые популярные слова в употреблении (слово, количество)
+        Counter: Словарь слово -> количество употреблений
     """
+    if stemmer is not None:
+        return stem_frequencies(count_word_frequencies(text, cleaned, remove_punctuation, remove_stopwords),
+                                stemmer)
     if cleaned:
-        text = clean_text_for_analysis(text, remove_punctuation, remove_stopwords)
+        # Очистка и приведение к нижнему регистру — в одном проходе.
+        # Стоп-слова и числа удаляем уже из словаря частот: он намного
+        # меньше списка слов, поэтому проверок получается меньше.
+        text_freq = Counter(tokenize(text, remove_punctuation, remove_stopwords=False))
+        return remove_stop_words(text_freq) if remove_stopwords else text_freq
     
     # Разделяем на слова и приводим к нижнему регистру для корректного подсчета
     words = text.split()
     
-    # Дополнительная фильтрация (на случай если cleaned=False)
     if remove_stopwords:
         words = [word.lower() for word in words 
                 if word.lower() not in STOP_WORDS_RU and len(word) > 1]
     else:
-        words = [word.lower() for word in words if word.strip()]
+        words = [word.lower() for word in words]
     
     # Подсчитываем частоту
-    text_freq = Counter(words)
+    return Counter(words)
+
+def remove_stop_words(word_freq):
+    """
+    Удаляет из словаря частот стоп-слова, однобуквенные слова и числа.
+    Проверяется каждое различное слово один раз, а не каждое вхождение.
+
+    Args:
+        word_freq (Counter): Слово -> количество (изменяется на месте)
+
+    Returns:
+        Counter: Тот же словарь
+    """
+    for word in [word for word in word_freq if len(word) < 2 or word in STOP_WORDS_RU or word.isdigit()]:
+        del word_freq[word]
+    return word_freq
+
+def stem_frequencies(word_freq, stemmer):
+    """
+    Складывает частоты словоформ с одинаковой основой.
+    Стеммер вызывается один раз на каждую различную форму, а не на каждое слово.
+
+    Args:
+        word_freq (Counter): Словоформа -> количество
+        stemmer (function): Стеммер
+
+    Returns:
+        Counter: Основа -> количество
+    """
+    stem_freq = Counter()
+    for word, count in word_freq.items():
+        stem_freq[stemmer(word)] += count
+    return stem_freq
+
+def get_most_common_words(text, n=5, cleaned=True, remove_punctuation=True, remove_stopwords=True,
+                          stemmer=None):
+    """
+    Функция выводит топ наиболее частых слов с опцией очистки текста.
     
+    Args:
+        text (str): Текст для анализа
+        n (int): Количество слов в топе (по умолчанию 5)
+        cleaned (bool): Очищать ли текст перед анализом (по умолчанию True)
+        remove_punctuation (bool): Удалять знаки препинания (по умолчанию True)
+        remove_stopwords (bool): Удалять стоп-слова (по умолчанию True)
+        stemmer (function): Стеммер — считать формы одного слова вместе
+    
+    Returns:
+        list: Самые популярные слова в употреблении (слово, количество)
+    """
+    text_freq = count_word_frequencies(text, cleaned, remove_punctuation, remove_stopwords, stemmer)
     return text_freq.most_common(n)
 
+class TextStats:
+    """
+    Считает все метрики текста за один проход: текст разбивается на слова
+    один раз, а слова, строки, уникальные слова, TTR, MATTR, MTLD, HD-D
+    и частоты берутся из этого разбиения.
+
+    Текст можно подавать частями через update() — так большой файл
+    обрабатывается кусками, а в памяти хранится только словарь.
+    Части должны разрезаться по пробельным символам (см. read_text_chunks).
+
+    Attributes:
+        word_count (int): Количество слов
+        word_freq (Counter): Частоты очищенных слов (None, если не считались);
+                             скетч из sketch_utils, если задан top_sketch
+        ngram_freq (Counter): Частоты n-грамм «слово слово» (None, если не считались)
+        minhash (MinHash): Подпись для поиска почти одинаковых текстов (None, если не считалась)
+        diversity (LexicalDiversity): Слова текста для MATTR, MTLD и HD-D
+                                      (None, если не считались)
+    """
+
+    def __init__(self, text=None, with_frequencies=True, top_sketch=None, ngram_orders=None,
+                 with_diversity=True, stemmer=None, with_minhash=False, timings=None):
+        """
+        Args:
+            text (str): Текст для анализа (можно не передавать и вызывать update)
+            with_frequencies (bool): Считать ли частоты слов для топа
+            top_sketch: Скетч из sketch_utils для приближённого топа в
+                        ограниченной памяти (вместо точного Counter)
+            ngram_orders (tuple): Длины n-грамм для подсчёта, например (2, 3)
+            with_diversity (bool): Считать ли MATTR, MTLD и HD-D
+            stemmer (function): Стеммер (stem_utils.make_stemmer); если задан,
+                                уникальные слова, TTR и разнообразие считаются по
+                                основам тех же слов, что и без стеммера, а топ слов
+                                и n-граммы — по основам очищенных слов
+            with_minhash (bool): Считать ли подпись MinHash по шинглам из
+                                 SHINGLE_SIZE очищенных слов (dedup_utils)
+            timings (dict): Словарь с ключами clean_time и count_time, к которым
+                            прибавляется время очистки и подсчёта (для профиля)
+        """
+        self.word_count = 0
+        if top_sketch is not None:
+            self.word_freq = top_sketch
+        else:
+            self.word_freq = Counter() if with_frequencies else None
+        self.ngram_orders = tuple(ngram_orders or ())
+        self.ngram_freq = Counter() if self.ngram_orders else None
+        self._ngram_tail = []  # Последние слова предыдущей части — n-граммы на стыке частей
+        self.diversity = LexicalDiversity() if with_diversity else None
+        self.minhash = MinHash() if with_minhash else None
+        self._shingle_tail = []  # Как _ngram_tail, но для шинглов MinHash
+        self.stemmer = stemmer
+        self.timings = timings
+        self._type_tokens = 0  # Сколько слов попало в подсчёт уникальных (знаменатель TTR)
+        self._unique_words = set()
+        self._newlines = 0
+        if text is not None:
+            self.update(text)
+
+    def update(self, chunk):
+        """
+        Добавляет к статистике очередную часть текста.
+
+        Сначала часть очищается (разбиение на слова, нижний регистр, стоп-слова,
+        основы), затем считаются метрики и частоты; если задан timings, время
+        этих фаз прибавляется к clean_time и count_time.
+
+        Args:
+            chunk (str): Часть текста, разрезанная по пробельному символу
+        """
+        timings = self.timings
+        if timings is not None:
+            started = time.perf_counter()
+        words = chunk.split()
+        word_count = len(words)
+        if self.stemmer is not None:
+            # Те же слова, что и без стеммера, — меняется только то, какие из них
+            # считаются одним словом: у каждого берётся основа (в нижнем регистре
+            # и без знаков препинания по краям). Знак препинания сам по себе
+            # остаётся отдельным словом, как и без стеммера
+            stemmer = self.stemmer
+            cores = (word.strip(EDGE_PUNCTUATION) for word in chunk.lower().split())
+            words = [stemmer(core) if core else word for word, core in zip(words, cores)]
+        # Слова и n-граммы считаются по одному и тому же разбиению
+        marked = None
+        plain = self.ngram_freq is None and self.stemmer is None and self.minhash is None
+        if plain:
+            # Стоп-слова и числа удаляются потом из словаря частот, а не из списка слов
+            tokens = TOKEN_PATTERN.findall(chunk.lower()) if self.word_freq is not None else None
+        elif self.ngram_freq is not None:
+            marked = self._mark_words(chunk)
+            tokens = [word for word in marked if word]
+        elif self.stemmer is None:
+            tokens = tokenize(chunk)
+        else:
+            tokens = list(map(self.stemmer, tokenize(chunk)))
+        if timings is not None:
+            counted = time.perf_counter()
+            timings['clean_time'] += counted - started
+
+        self.word_count += word_count
+        self._type_tokens += len(words)
+        if self.diversity is not None:
+            self.diversity.update(words)  # Его словарь заодно хранит уникальные слова
+        else:
+            self._unique_words.update(words)  # Множество хранит только уникальные элементы
+        self._newlines += chunk.count('\n')
+        if marked is not None:
+            self._count_ngrams(marked)
+        if self.word_freq is not None:
+            self.word_freq.update(remove_stop_words(Counter(tokens)) if plain else tokens)
+        if self.minhash is not None:
+            extended = self._shingle_tail + tokens
+            self.minhash.update(iter_ngrams(extended[max(0, len(self._shingle_tail) - (SHINGLE_SIZE - 1)):],
+                                            SHINGLE_SIZE))
+            self._shingle_tail = extended[-(SHINGLE_SIZE - 1):]
+        if timings is not None:
+            timings['count_time'] += time.perf_counter() - counted
+
+    def _mark_words(self, chunk):
+        """
+        Разбивает часть текста на очищенные слова для n-грамм. Выброшенные
+        слова (стоп-слова, числа, однобуквенные) и концы строк заменяются
+        пустой строкой: на них последовательность слов прерывается.
+
+        Args:
+            chunk (str): Часть текста, разрезанная по пробельному символу
+
+        Returns:
+            list: Очищенные слова (основы, если задан стеммер) и пустые строки
+        """
+        words = LINE_TOKEN_PATTERN.findall(chunk.lower())
+        if self.stemmer is None:
+            return [word if len(word) > 1 and word not in STOP_WORDS_RU and not word.isdigit() else ''
+                    for word in words]
+        stemmer = self.stemmer
+        return [stemmer(word) if len(word) > 1 and word not in STOP_WORDS_RU and not word.isdigit()
+                else '' for word in words]
+
+    def _count_ngrams(self, marked):
+        """
+        Считает n-граммы по подряд идущим словам текста, поэтому n-грамма не
+        склеивает слова, которые в тексте не стоят рядом.
+
+        Args:
+            marked (list): Результат _mark_words — n-граммы с пустой строкой не считаются
+        """
+        tail = self._ngram_tail  # Незакрытая последовательность с конца предыдущей части
+        extended = tail + marked
+        for n in self.ngram_orders:
+            # С начала берём только n - 1 слов хвоста, чтобы не посчитать n-граммы дважды
+            start = max(0, len(tail) - (n - 1))
+            self.ngram_freq.update(map(' '.join, filter(all, zip(*(extended[start + i:] for i in range(n))))))
+        max_order = max(self.ngram_orders)
+        tail = extended[-(max_order - 1):] if max_order > 1 else []
+        if '' in tail:
+            tail = tail[len(tail) - tail[::-1].index(''):]
+        self._ngram_tail = tail
+
+    @property
+    def unique_count(self):
+        """int: Количество уникальных слов."""
+        if self.diversity is not None:
+            return len(self.diversity.word_to_id)
+        return len(self._unique_words)
+
+    @property
+    def line_count(self):
+        """int: Количество строк (то же, что len(text.split('\\n')))."""
+        return self._newlines + 1
+
+    @property
+    def ttr(self):
+        """float: Отношение уникальных слов ко всем (0.0 для пустого текста)."""
+        if self._type_tokens == 0:
+            return 0.0
+        return round(self.unique_count / self._type_tokens, 3)
+
+    @property
+    def mattr(self):
+        """float: Средний TTR по скользящему окну (0.0, если не считался)."""
+        return self.diversity.mattr if self.diversity is not None else 0.0
+
+    @property
+    def mtld(self):
+        """float: MTLD (0.0, если не считался)."""
+        return self.diversity.mtld if self.diversity is not None else 0.0
+
+    @property
+    def hdd(self):
+        """float: HD-D (0.0, если не считался)."""
+        return self.diversity.hdd if self.diversity is not None else 0.0
+
+    @property
+    def minhash_signature(self):
+        """list: Подпись MinHash (None, если не считалась или в тексте нет слов)."""
+        if self.minhash is None:
+            return None
+        if self.minhash.count == 0 and self._shingle_tail:
+            # Текст короче шингла — он сам и есть единственный шингл
+            self.minhash.update([' '.join(self._shingle_tail)])
+        return self.minhash.signature
+
+    def most_common(self, n=5):
+        """
+        Возвращает топ наиболее частых слов текста.
+
+        Args:
+            n (int): Количество слов в топе (по умолчанию 5)
+
+        Returns:
+            list: Список пар (слово, количество)
+        """
+        if self.word_freq is None:
+            return []
+        return self.word_freq.most_common(n)
+
+    def as_row(self, filename):
+        """
+        Возвращает строку для statistics.csv.
+
+        Args:
+            filename (str): Имя файла
+
+        Returns:
+            list: [filename, word_count, words_ucount, lines_count, ttr_count,
+                   mattr_count, mtld_count, hdd_count]
+        """
+        return [filename, self.word_count, self.unique_count, self.line_count, self.ttr,
+                self.mattr, self.mtld, self.hdd]
+
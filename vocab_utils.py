@@ -0,0 +1,182 @@
+import os
+from array import array
+from collections import Counter
+from text_utils import tokenize
+
+# Общий словарь корпуса: каждое нормализованное слово получает целый номер,
+# а документ хранится как array('I') номеров — 4 байта на слово вместо
+# отдельного объекта str (50+ байт). В номерах хранятся слова текста для
+# MATTR, MTLD и HD-D (diversity_utils), частоты файлов до двоичного экспорта
+# (export_utils), обратный индекс (index_utils) и матрица «документ x слово»
+# (similarity_utils).
+
+class Vocabulary:
+    """
+    Словарь «слово -> номер». Номера выдаются по порядку первого появления.
+
+    Attributes:
+        word_to_id (dict): Слово -> номер
+        id_to_word (list): Номер -> слово
+    """
+
+    def __init__(self, words=None):
+        self.word_to_id = {}
+        self.id_to_word = []
+        for word in words or []:
+            self.intern(word)
+
+    def __len__(self):
+        return len(self.id_to_word)
+
+    def __contains__(self, word):
+        return word in self.word_to_id
+
+    def intern(self, word):
+        """
+        Возвращает номер слова, добавляя слово в словарь при первой встрече.
+
+        Args:
+            word (str): Нормализованное слово
+
+        Returns:
+            int: Номер слова
+        """
+        word_id = self.word_to_id.get(word)
+        if word_id is None:
+            word_id = len(self.id_to_word)
+            self.word_to_id[word] = word_id
+            self.id_to_word.append(word)
+        return word_id
+
+    def get_id(self, word):
+        """
+        Возвращает номер слова, не добавляя его.
+
+        Args:
+            word (str): Слово
+
+        Returns:
+            int: Номер слова или None, если слова нет в словаре
+        """
+        return self.word_to_id.get(word)
+
+    def encode(self, words):
+        """
+        Переводит слова в массив номеров.
+
+        Args:
+            words (iterable): Нормализованные слова
+
+        Returns:
+            array: array('I') номеров
+        """
+        word_to_id = self.word_to_id
+        ids = array('I')
+        for word in words:
+            word_id = word_to_id.get(word)
+            if word_id is None:
+                word_id = self.intern(word)
+            ids.append(word_id)
+        return ids
+
+    def decode(self, ids):
+        """
+        Переводит номера обратно в слова.
+
+        Args:
+            ids (iterable): Номера слов
+
+        Returns:
+            list: Слова
+        """
+        id_to_word = self.id_to_word
+        return [id_to_word[word_id] for word_id in ids]
+
+    def encode_counts(self, word_freq):
+        """
+        Переводит частоты слов в два массива: номера слов и их частоты.
+        Массивы занимают 8 байт на слово вместо записи Counter со строкой.
+
+        Args:
+            word_freq (Counter): Слово -> количество
+
+        Returns:
+            tuple: (array('I') номеров, array('I') частот) в одном порядке
+        """
+        return self.encode(word_freq), array('I', word_freq.values())
+
+    def save(self, filepath):
+        """
+        Сохраняет словарь: одно слово на строку, номер — номер строки.
+
+        Args:
+            filepath (str): Путь к файлу
+
+        Returns:
+            bool: True, если запись прошла успешно, иначе False
+        """
+        folder = os.path.dirname(filepath)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        try:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                for word in self.id_to_word:
+                    f.write(word + '\n')
+            return True
+        except Exception as e:
+            print(f"Ошибка при записи словаря {filepath}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Загружает словарь, сохранённый save().
+
+        Args:
+            filepath (str): Путь к файлу
+
+        Returns:
+            Vocabulary: Словарь
+        """
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls(line.rstrip('\n') for line in f)
+
+def encode_text(text, vocabulary, remove_punctuation=True, remove_stopwords=True):
+    """
+    Разбивает текст на слова (text_utils.tokenize) и переводит их в номера.
+
+    Args:
+        text (str): Текст
+        vocabulary (Vocabulary): Общий словарь (пополняется новыми словами)
+        remove_punctuation (bool): Удалять знаки препинания
+        remove_stopwords (bool): Удалять стоп-слова, однобуквенные слова и числа
+
+    Returns:
+        array: array('I') номеров слов документа
+    """
+    return vocabulary.encode(tokenize(text, remove_punctuation, remove_stopwords))
+
+def count_ids(ids):
+    """
+    Частоты номеров слов в документе.
+
+    Args:
+        ids (array): Номера слов
+
+    Returns:
+        Counter: Номер -> количество
+    """
+    return Counter(ids)
+
+def to_numpy(ids):
+    """
+    Представляет массив номеров как массив NumPy без копирования.
+
+    Args:
+        ids (array): array('I') номеров
+
+    Returns:
+        numpy.ndarray: Массив uint32, разделяющий память с ids
+    """
+    import numpy as np  # Необязательная зависимость — нужна только здесь
+    return np.frombuffer(ids, dtype=np.uint32)